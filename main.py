@@ -1,6 +1,8 @@
+import os
 import sys
 from music_service import MusicService
 
 if __name__ == "__main__":
-    app = MusicService()
+    # песни с сервера music_service.stream_server вместо data/songs
+    app = MusicService(stream_url=os.environ.get("MUSIC_SERVICE_STREAM_URL"))
     sys.exit(app.run())
\ No newline at end of file
@@ -5,6 +5,7 @@ from .artist import Artist
 from .genre import Genre
 from .playlist import Playlist
 from .library import Library
+from .ordered_id_set import OrderedIdSet
 
 __all__ = [
     'User',
@@ -13,5 +14,6 @@ __all__ = [
     'Artist',
     'Genre',
     'Playlist',
-    'Library'
+    'Library',
+    'OrderedIdSet'
 ]
@@ -2,7 +2,7 @@ from typing import List
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Album:
     id: str
     title: str
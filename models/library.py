@@ -1,13 +1,25 @@
-from typing import List
+from typing import Iterable
 from dataclasses import dataclass
 
+from .ordered_id_set import OrderedIdSet
+
 
 @dataclass
 class Library:
     id: str
-    songs: List[str]
-    albums: List[str]
-    playlists: List[str]
+    songs: OrderedIdSet
+    albums: OrderedIdSet
+    playlists: OrderedIdSet
+
+    def __post_init__(self):
+        # списки id из JSON превращаем в наборы с быстрым поиском
+        self.songs = self._as_set(self.songs)
+        self.albums = self._as_set(self.albums)
+        self.playlists = self._as_set(self.playlists)
+
+    @staticmethod
+    def _as_set(items: Iterable[str]) -> OrderedIdSet:
+        return items if isinstance(items, OrderedIdSet) else OrderedIdSet(items)
 
     def __str__(self) -> str:
         return f"Library({self.id})"
@@ -0,0 +1,57 @@
+from typing import Dict, Iterable, Iterator, List, Union
+
+
+class OrderedIdSet:
+    """упорядоченный набор id: порядок добавления сохраняется,
+    проверка вхождения, добавление и удаление за O(1)"""
+
+    __slots__ = ('_items',)
+
+    def __init__(self, items: Iterable[str] = ()):
+        # dict помнит порядок вставки и служит индексом
+        self._items: Dict[str, None] = dict.fromkeys(items)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._items
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __reversed__(self) -> Iterator[str]:
+        return reversed(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index: Union[int, slice]):
+        # доступ по позиции - O(n), для совместимости со списком
+        return list(self._items)[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, OrderedIdSet):
+            return list(self._items) == list(other._items)
+        if isinstance(other, list):
+            return list(self._items) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"OrderedIdSet({list(self._items)!r})"
+
+    def append(self, item: str) -> None:
+        """добавить в конец; если уже есть - ничего не делать"""
+        self._items[item] = None
+
+    def remove(self, item: str) -> None:
+        try:
+            del self._items[item]
+        except KeyError:
+            raise ValueError(f"{item!r} not in OrderedIdSet")
+
+    def discard(self, item: str) -> None:
+        self._items.pop(item, None)
+
+    def index(self, item: str) -> int:
+        return list(self._items).index(item)
+
+    def to_list(self) -> List[str]:
+        return list(self._items)
@@ -1,6 +1,7 @@
-from typing import List
 from dataclasses import dataclass
 
+from .ordered_id_set import OrderedIdSet
+
 
 @dataclass
 class Playlist:
@@ -8,7 +9,11 @@ class Playlist:
     title: str
     description: str
     author: str
-    songs: List[str]
+    songs: OrderedIdSet
+
+    def __post_init__(self):
+        if not isinstance(self.songs, OrderedIdSet):
+            self.songs = OrderedIdSet(self.songs)
 
     def __str__(self) -> str:
         return self.title
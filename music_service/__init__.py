@@ -1,3 +1,10 @@
-from .music_service import MusicService
-
 __all__ = ['MusicService']
+
+
+def __getattr__(name: str):
+    # MusicService тянет PySide6 - импортируется только по обращению,
+    # чтобы music_service.database и сервер API работали без Qt
+    if name == 'MusicService':
+        from .music_service import MusicService
+        return MusicService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
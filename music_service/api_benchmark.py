@@ -0,0 +1,155 @@
+"""нагрузочная проверка API: N keep-alive соединений шлют GET по кругу
+
+python -m music_service.api_benchmark --url http://127.0.0.1:8080 -c 50 -n 5000
+python -m music_service.api_benchmark --serve --data-dir data -c 50 -n 5000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ("/songs?limit=50", "/albums?limit=50", "/artists", "/genres", "/search?q=a&limit=20")
+
+
+class HttpConnection:
+    """одно keep-alive соединение HTTP/1.1 (только ответы с Content-Length)"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self.connects = 0
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """(статус, заголовки в нижнем регистре, тело); переподключается, если сервер закрыл соединение"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self.connects += 1
+
+        data = json.dumps(body).encode('utf-8') if body is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(data)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + data)
+        await self._writer.drain()
+
+        head = await self._reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode('latin-1').rstrip("\r\n").split("\r\n")
+        status = int(status_line.split(" ")[1])
+        response_headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        length = int(response_headers.get('content-length', 0))
+        payload = await self._reader.readexactly(length) if length and method != 'HEAD' else b""
+        if response_headers.get('connection', "").lower() == "close":
+            await self.close()
+        return status, response_headers, payload
+
+    async def json(self, method: str, path: str, body: Optional[dict] = None,
+                   headers: Optional[Dict[str, str]] = None):
+        status, _, payload = await self.request(method, path, body, headers)
+        return status, json.loads(payload) if payload else None
+
+    async def close(self) -> None:
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+async def run_load(host: str, port: int, connections: int = 20, requests: int = 2000,
+                   paths: Sequence[str] = DEFAULT_PATHS) -> Dict[str, float]:
+    """requests запросов через connections соединений; Return: сводка"""
+    latencies: List[float] = []
+    errors = 0
+    connects = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors, connects
+        connection = HttpConnection(host, port)
+        try:
+            for number in counter:
+                started = time.perf_counter()
+                try:
+                    status, _, _ = await connection.request('GET', paths[number % len(paths)])
+                except (OSError, asyncio.IncompleteReadError):
+                    errors += 1
+                    await connection.close()
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if status >= 400:
+                    errors += 1
+        finally:
+            connects += connection.connects
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'connects': connects,
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, float]:
+    if not args.serve:
+        url = urlsplit(args.url)
+        return await run_load(url.hostname, url.port or 80, args.connections, args.requests)
+
+    # сервер в том же процессе - без сети и второго терминала
+    from music_service.api_server import ApiServer
+    from music_service.storage import open_database
+
+    database = open_database(args.data_dir)
+    server = ApiServer(database, port=0)
+    await server.start()
+    try:
+        return await run_load(server.host, server.port, args.connections, args.requests)
+    finally:
+        await server.close()
+        database.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="нагрузочная проверка API music_service")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--serve", action="store_true", help="запустить сервер в этом же процессе")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("-c", "--connections", type=int, default=20)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    print(f"{report['requests']} запросов за {report['seconds']:.2f} с: {report['rps']:.0f} req/s, "
+          f"ошибок {report['errors']}, соединений {report['connects']}")
+    print(f"задержка p50 {report['p50_ms']:.1f} мс, p95 {report['p95_ms']:.1f} мс, p99 {report['p99_ms']:.1f} мс")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
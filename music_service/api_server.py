@@ -0,0 +1,642 @@
+"""HTTP/JSON API без Qt: каталог, поиск, библиотека и плейлисты.
+
+python -m music_service.api_server --data-dir data --port 8080
+
+Соединения keep-alive (HTTP/1.1), списки постранично (?offset=&limit=),
+у ответов GET есть ETag - на If-None-Match с тем же тегом приходит 304.
+Вход: POST /auth/login -> token, дальше заголовок Authorization: Bearer <token>.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import secrets
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from models import Album, Genre, Library, Playlist, Song, User
+from music_service.auth_service import AuthService
+from music_service.database import Database
+from music_service.library_service import LibraryService
+from music_service.playlist_service import PlaylistService
+from music_service.search_service import SearchService
+from music_service.storage import open_database
+
+logger = logging.getLogger(__name__)
+
+# сколько секунд держать простаивающее соединение
+KEEP_ALIVE_SECONDS = 15
+# после стольких запросов соединение закрывается
+MAX_REQUESTS_PER_CONNECTION = 1000
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# как часто подхватывать изменения других процессов
+POLL_SECONDS = 1.0
+
+
+class ApiError(Exception):
+    """ответ с ошибкой: {"error": message}; headers - дополнительные заголовки ответа"""
+
+    def __init__(self, status: int, message: str, headers: Sequence[str] = ()):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = list(headers)
+
+
+class Request:
+    """разобранный запрос"""
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes = b""):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = unquote(parts.path)
+        self.query = dict(parse_qsl(parts.query))
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.params: Tuple[str, ...] = ()
+        self.user: Optional[User] = None
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise ApiError(400, "тело запроса - не JSON")
+        if not isinstance(data, dict):
+            raise ApiError(400, "ожидается JSON-объект")
+        return data
+
+    def page(self) -> Tuple[int, int]:
+        """offset, limit из строки запроса"""
+        try:
+            offset = int(self.query.get('offset', 0))
+            limit = int(self.query.get('limit', PAGE_SIZE))
+        except ValueError:
+            raise ApiError(400, "offset и limit - целые числа")
+        if offset < 0 or limit < 1:
+            raise ApiError(400, "offset >= 0, limit >= 1")
+        return offset, min(limit, MAX_PAGE_SIZE)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """следующий запрос соединения; None - клиент закрыл его между запросами"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise
+    except asyncio.LimitOverrunError:
+        raise ApiError(431, "слишком большие заголовки")
+
+    lines = head.decode('latin-1').split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise ApiError(400, "неверная строка запроса")
+    if not version.startswith("HTTP/1."):
+        raise ApiError(505, "поддерживается только HTTP/1.x")
+
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    if 'transfer-encoding' in headers:
+        raise ApiError(411, "нужен Content-Length")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise ApiError(400, "неверный Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise ApiError(413, "слишком большое тело запроса")
+
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, target, version, headers, body)
+
+
+def song_json(song: Song) -> Dict[str, Any]:
+    return {
+        'id': song.id,
+        'title': song.title,
+        'artist': song.artist,
+        'album': song.album,
+        'genre': song.genre,
+        'duration': song.duration,
+    }
+
+
+def album_json(album: Album) -> Dict[str, Any]:
+    return {
+        'id': album.id,
+        'title': album.title,
+        'artist': album.artist,
+        'cover': album.cover,
+        'release_date': album.release_date,
+        'songs': list(album.songs),
+    }
+
+
+def genre_json(genre: Genre) -> Dict[str, Any]:
+    return {'id': genre.id, 'name': genre.name, 'description': genre.description}
+
+
+def playlist_json(playlist: Playlist) -> Dict[str, Any]:
+    return {
+        'id': playlist.id,
+        'title': playlist.title,
+        'description': playlist.description,
+        'author': playlist.author,
+        'songs': list(playlist.songs),
+    }
+
+
+def user_json(user: User) -> Dict[str, Any]:
+    return {'email': user.email, 'username': user.username}
+
+
+def page_json(items: List[Any], offset: int, limit: int,
+              to_json: Callable[[Any], Any] = lambda item: item) -> Dict[str, Any]:
+    """страница списка; next - offset следующей страницы или null"""
+    page = items[offset:offset + limit]
+    end = offset + len(page)
+    return {
+        'items': [to_json(item) for item in page],
+        'offset': offset,
+        'limit': limit,
+        'total': len(items),
+        'next': end if end < len(items) else None,
+    }
+
+
+Handler = Callable[[Request], Any]
+
+
+class ApiServer:
+    """сервер API на asyncio; сервисы те же, что у приложения, без Qt
+
+    Цикл событий только читает и пишет сокеты. Обработчики и poll_changes()
+    выполняются по одному в отдельном потоке: изменения могут ждать flush()
+    с fsync и межпроцессными блокировками, а чтение не должно видеть
+    библиотеку или кэш сервиса посреди изменения.
+    """
+
+    def __init__(self, database: Database, host: str = "127.0.0.1", port: int = 8080,
+                 keep_alive: float = KEEP_ALIVE_SECONDS, poll_seconds: float = POLL_SECONDS):
+        self.database = database
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive
+        self.poll_seconds = poll_seconds
+
+        self.auth_service = AuthService(database)
+        self.library_service = LibraryService(database)
+        self.playlist_service = PlaylistService(database)
+        self.search_service = SearchService(database)
+
+        self._sessions: Dict[str, str] = {}  # token -> email
+        # каталог в порядке выдачи; сбрасывается, когда каталог меняется
+        self._song_ids: Optional[List[str]] = None
+        self._album_ids: Optional[List[str]] = None
+        self._artist_names: Optional[List[str]] = None
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connections: set = set()
+        self.requests_served = 0
+
+        self._routes: List[Tuple[str, Pattern, Handler]] = []
+        self._route('GET', r"/songs", self._get_songs)
+        self._route('GET', r"/songs/([^/]+)", self._get_song)
+        self._route('GET', r"/albums", self._get_albums)
+        self._route('GET', r"/albums/([^/]+)", self._get_album)
+        self._route('GET', r"/artists", self._get_artists)
+        self._route('GET', r"/artists/([^/]+)/songs", self._get_artist_songs)
+        self._route('GET', r"/genres", self._get_genres)
+        self._route('GET', r"/genres/([^/]+)/songs", self._get_genre_songs)
+        self._route('GET', r"/search", self._search)
+        self._route('GET', r"/playlists/([^/]+)", self._get_playlist)
+
+        self._route('POST', r"/auth/register", self._register)
+        self._route('POST', r"/auth/login", self._login)
+        self._route('POST', r"/auth/logout", self._logout)
+
+        self._route('GET', r"/me", self._get_me)
+        self._route('GET', r"/me/library/songs", self._get_library_songs)
+        self._route('PUT', r"/me/library/songs/([^/]+)", self._add_library_song)
+        self._route('DELETE', r"/me/library/songs/([^/]+)", self._remove_library_song)
+        self._route('GET', r"/me/library/albums", self._get_library_albums)
+        self._route('GET', r"/me/library/artists", self._get_library_artists)
+        self._route('GET', r"/me/library/genres", self._get_library_genres)
+        self._route('GET', r"/me/playlists", self._get_my_playlists)
+        self._route('POST', r"/me/playlists", self._create_playlist)
+        self._route('DELETE', r"/me/playlists/([^/]+)", self._delete_playlist)
+        self._route('PUT', r"/me/playlists/([^/]+)/songs/([^/]+)", self._add_playlist_song)
+        self._route('DELETE', r"/me/playlists/([^/]+)/songs/([^/]+)", self._remove_playlist_song)
+
+    def _route(self, method: str, pattern: str, handler: Handler) -> None:
+        self._routes.append((method, re.compile(pattern), handler))
+
+    # --- сервер ---
+
+    async def start(self) -> None:
+        """начать принимать соединения; port=0 - любой свободный (см. self.port)"""
+        self._server = await asyncio.start_server(
+            self._serve_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        # поток для работы с диском; один - изменения применяются по порядку
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-database")
+        if self.poll_seconds > 0:
+            self._poll_task = asyncio.create_task(self._poll_changes())
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def _poll_changes(self) -> None:
+        """изменения, сделанные приложением или другим сервером с той же папкой data"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await loop.run_in_executor(self._executor, self._apply_changes)
+            except Exception:
+                logger.exception("ошибка чтения изменений")
+
+    def _apply_changes(self) -> None:
+        """одна проверка изменений - в потоке обработчиков, вместе с ними по очереди"""
+        changed = self.database.poll_changes()
+        for collection, key in self.database.take_conflicts():
+            logger.warning("конфликт изменений: %s %s", collection, key)
+        if changed:
+            self.invalidate(changed)
+
+    def invalidate(self, collections) -> None:
+        """сбросить кэши после изменения коллекций"""
+        if {'songs', 'albums', 'genres'} & set(collections):
+            self._song_ids = self._album_ids = self._artist_names = None
+        if {'songs', 'albums', 'libraries'} & set(collections):
+            self.library_service.invalidate()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            for number in range(1, MAX_REQUESTS_PER_CONNECTION + 1):
+                try:
+                    request = await asyncio.wait_for(read_request(reader), self.keep_alive)
+                except ApiError as e:
+                    writer.write(self._response(None, e.status, {'error': e.message}, keep_alive=False))
+                    await writer.drain()
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                keep_alive = request.keep_alive and number < MAX_REQUESTS_PER_CONNECTION
+                status, payload = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self.dispatch, request
+                )
+                writer.write(self._response(request, status, payload, keep_alive))
+                await writer.drain()
+                self.requests_served += 1
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _response(self, request: Optional[Request], status: int, payload: Any, keep_alive: bool) -> bytes:
+        body = b""
+        headers = []
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            headers.append("Content-Type: application/json; charset=utf-8")
+
+        if request is not None and request.method in ('GET', 'HEAD') and status == 200:
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            headers += [f"ETag: {etag}", "Cache-Control: no-cache", "Vary: Authorization"]
+            if etag in request.headers.get('if-none-match', ""):
+                status, body = 304, b""
+                headers = headers[1:]
+
+        # у 204 и 304 тела нет по определению, остальным длина нужна для keep-alive
+        if status not in (204, 304):
+            headers.append(f"Content-Length: {len(body)}")
+        if keep_alive:
+            headers += ["Connection: keep-alive", f"Keep-Alive: timeout={int(self.keep_alive)}"]
+        else:
+            headers.append("Connection: close")
+
+        if request is not None and request.method == 'HEAD':
+            body = b""
+        head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"] + headers
+        return ("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body
+
+    def dispatch(self, request: Request) -> Tuple[int, Any]:
+        """(статус, JSON ответа или None)"""
+        method = 'GET' if request.method == 'HEAD' else request.method
+        path_found = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            path_found = True
+            if route_method != method:
+                continue
+
+            request.params = match.groups()
+            try:
+                result = handler(request)
+            except ApiError as e:
+                return e.status, {'error': e.message}
+            except Exception:
+                logger.exception("ошибка обработки %s %s", request.method, request.path)
+                return 500, {'error': "внутренняя ошибка"}
+
+            if isinstance(result, tuple):
+                return result
+            return (200, result) if result is not None else (204, None)
+
+        if path_found:
+            return 405, {'error': "метод не поддерживается"}
+        return 404, {'error': "не найдено"}
+
+    # --- каталог ---
+
+    def _catalog_song_ids(self) -> List[str]:
+        if self._song_ids is None:
+            songs = self.database.get_all_songs()
+            songs.sort(key=lambda song: (song.artist, song.title))
+            self._song_ids = [song.id for song in songs]
+        return self._song_ids
+
+    def _catalog_album_ids(self) -> List[str]:
+        if self._album_ids is None:
+            albums = self.database.get_all_albums()
+            albums.sort(key=lambda album: (album.artist, album.title))
+            self._album_ids = [album.id for album in albums]
+        return self._album_ids
+
+    def _get_songs(self, request: Request) -> Dict[str, Any]:
+        offset, limit = request.page()
+        page = page_json(self._catalog_song_ids(), offset, limit)
+        page['items'] = [song_json(song) for song in self.database.get_songs(page['items'])]
+        return page
+
+    def _get_song(self, request: Request) -> Dict[str, Any]:
+        song = self.database.get_song(request.params[0])
+        if song is None:
+            raise ApiError(404, "песня не найдена")
+        return song_json(song)
+
+    def _get_albums(self, request: Request) -> Dict[str, Any]:
+        offset, limit = request.page()
+        page = page_json(self._catalog_album_ids(), offset, limit)
+        page['items'] = [album_json(self.database.get_album(album_id)) for album_id in page['items']]
+        return page
+
+    def _get_album(self, request: Request) -> Dict[str, Any]:
+        album = self.database.get_album(request.params[0])
+        if album is None:
+            raise ApiError(404, "альбом не найден")
+        data = album_json(album)
+        data['songs'] = [song_json(song) for song in self.database.get_songs(album.songs)]
+        return data
+
+    def _get_artists(self, request: Request) -> Dict[str, Any]:
+        if self._artist_names is None:
+            self._artist_names = sorted(artist.name for artist in self.database.get_all_artists())
+        offset, limit = request.page()
+        return page_json(self._artist_names, offset, limit)
+
+    def _get_artist_songs(self, request: Request) -> Dict[str, Any]:
+        offset, limit = request.page()
+        return page_json(self.database.get_songs_by_artist(request.params[0]), offset, limit, song_json)
+
+    def _get_genres(self, request: Request) -> List[Dict[str, Any]]:
+        return [genre_json(genre) for genre in self.database.get_all_genres()]
+
+    def _get_genre_songs(self, request: Request) -> Dict[str, Any]:
+        offset, limit = request.page()
+        return page_json(self.database.get_songs_by_genre(request.params[0]), offset, limit, song_json)
+
+    def _search(self, request: Request) -> Dict[str, Any]:
+        offset, limit = request.page()
+        # результаты отсортированы по релевантности - берём до конца страницы и ещё одну
+        songs = self.search_service.search_songs(request.query.get('q', ""), offset + limit + 1)
+        page = page_json(songs, offset, limit, song_json)
+        page['total'] = None  # полное число совпадений не считается
+        return page
+
+    def _get_playlist(self, request: Request) -> Dict[str, Any]:
+        playlist = self.database.get_playlist(request.params[0])
+        if playlist is None:
+            raise ApiError(404, "плейлист не найден")
+        data = playlist_json(playlist)
+        data['songs'] = [song_json(song) for song in self.playlist_service.get_playlist_songs(playlist)]
+        return data
+
+    # --- аккаунт ---
+
+    def _new_session(self, user: User) -> Dict[str, Any]:
+        token = secrets.token_urlsafe(24)
+        self._sessions[token] = user.email
+        return {'token': token, 'user': user_json(user)}
+
+    def _register(self, request: Request) -> Tuple[int, Dict[str, Any]]:
+        data = request.json()
+        password = str(data.get('password', ""))
+        success, user, error = self.auth_service.register(
+            str(data.get('email', "")), str(data.get('username', "")),
+            password, str(data.get('repeat_password', password))
+        )
+        if not success:
+            raise ApiError(400, error)
+        return 201, self._new_session(user)
+
+    def _login(self, request: Request) -> Dict[str, Any]:
+        data = request.json()
+        success, user, error = self.auth_service.login(str(data.get('email', "")), str(data.get('password', "")))
+        if not success:
+            raise ApiError(401, error)
+        return self._new_session(user)
+
+    def _logout(self, request: Request) -> None:
+        self._user(request)
+        self._sessions.pop(self._token(request), None)
+
+    @staticmethod
+    def _token(request: Request) -> str:
+        scheme, _, token = request.headers.get('authorization', "").partition(" ")
+        return token if scheme.lower() == "bearer" else ""
+
+    def _user(self, request: Request) -> User:
+        email = self._sessions.get(self._token(request))
+        user = self.database.get_user(email) if email else None
+        if user is None:
+            raise ApiError(401, "нужен вход")
+        return user
+
+    def _library(self, request: Request) -> Tuple[User, Library]:
+        user = self._user(request)
+        library = self.database.get_library(user.library_id)
+        if library is None:
+            raise ApiError(404, "библиотека не найдена")
+        return user, library
+
+    def _get_me(self, request: Request) -> Dict[str, Any]:
+        return user_json(self._user(request))
+
+    # --- библиотека ---
+
+    def _get_library_songs(self, request: Request) -> Dict[str, Any]:
+        _, library = self._library(request)
+        offset, limit = request.page()
+        page = page_json(list(library.songs), offset, limit)
+        page['items'] = [song_json(song) for song in self.database.get_songs(page['items'])]
+        return page
+
+    def _add_library_song(self, request: Request) -> None:
+        _, library = self._library(request)
+        song_id = request.params[0]
+        if self.database.get_song(song_id) is None:
+            raise ApiError(404, "песня не найдена")
+        self.library_service.add_song_to_library(library, song_id)
+
+    def _remove_library_song(self, request: Request) -> None:
+        _, library = self._library(request)
+        self.library_service.remove_song_from_library(library, request.params[0])
+
+    def _get_library_albums(self, request: Request) -> Dict[str, Any]:
+        _, library = self._library(request)
+        offset, limit = request.page()
+        return page_json(self.library_service.get_library_albums(library), offset, limit, album_json)
+
+    def _get_library_artists(self, request: Request) -> Dict[str, Any]:
+        _, library = self._library(request)
+        offset, limit = request.page()
+        return page_json(self.library_service.get_library_artists(library), offset, limit)
+
+    def _get_library_genres(self, request: Request) -> Dict[str, Any]:
+        _, library = self._library(request)
+        offset, limit = request.page()
+        return page_json(self.library_service.get_library_genres(library), offset, limit)
+
+    # --- плейлисты ---
+
+    def _own_playlist(self, request: Request) -> Tuple[Library, Playlist]:
+        user, library = self._library(request)
+        playlist = self.database.get_playlist(request.params[0])
+        if playlist is None or playlist.id not in library.playlists:
+            raise ApiError(404, "плейлист не найден")
+        if playlist.author != user.email:
+            raise ApiError(403, "плейлист другого пользователя")
+        return library, playlist
+
+    def _get_my_playlists(self, request: Request) -> List[Dict[str, Any]]:
+        _, library = self._library(request)
+        return [playlist_json(playlist) for playlist in self.playlist_service.get_user_playlists(library)]
+
+    def _create_playlist(self, request: Request) -> Tuple[int, Dict[str, Any]]:
+        user, library = self._library(request)
+        data = request.json()
+        title = str(data.get('title', "")).strip()
+        if not title:
+            raise ApiError(400, "нужно название")
+        song_ids = data.get('songs', [])
+        if not isinstance(song_ids, list) or not all(isinstance(song_id, str) for song_id in song_ids):
+            raise ApiError(400, "songs - список id")
+
+        with self.database.transaction():
+            playlist = self.playlist_service.create_playlist(
+                title, str(data.get('description', "")), user.email, song_ids
+            )
+            self.playlist_service.add_playlist_to_library(library, playlist.id)
+        return 201, playlist_json(playlist)
+
+    def _delete_playlist(self, request: Request) -> None:
+        library, playlist = self._own_playlist(request)
+        self.playlist_service.delete_playlist(playlist.id, library)
+
+    def _add_playlist_song(self, request: Request) -> None:
+        _, playlist = self._own_playlist(request)
+        song_id = request.params[1]
+        if self.database.get_song(song_id) is None:
+            raise ApiError(404, "песня не найдена")
+        self.playlist_service.add_song_to_playlist(playlist, song_id)
+
+    def _remove_playlist_song(self, request: Request) -> None:
+        _, playlist = self._own_playlist(request)
+        self.playlist_service.remove_song_from_playlist(playlist, request.params[1])
+
+
+async def serve(data_dir: str, host: str, port: int) -> None:
+    database = open_database(data_dir)
+    server = ApiServer(database, host, port)
+    await server.start()
+    logger.info("API: http://%s:%s", host, server.port)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        database.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="HTTP API music_service без интерфейса")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args.data_dir, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -60,8 +60,7 @@ class AuthService:
             albums=[],
             playlists=[]
         )
-        self.database.libraries[library_id] = library
-        self.database.save_libraries()
+        self.database.add_library(library)
 
         # создаем нового пользователя
         user = User(
@@ -0,0 +1,428 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from models import Album, Artist, Genre
+from music_service.search_index import NGRAM
+from music_service.song_catalog import DELETED, EMPTY, SongCatalog, StringTable, id_hash
+
+if TYPE_CHECKING:
+    from music_service.database import Database
+
+SNAPSHOT_NAME = "catalog.snap"
+
+# менять при любом изменении формата: старый снимок просто пересоберется
+SNAPSHOT_VERSION = 1
+
+MAGIC = b"MSCATSNP"
+
+# файлы, из которых собран каталог
+SOURCE_FILES = ("songs.json", "songs.ndjson", "albums.json", "albums.ndjson", "genres.xml")
+
+_HEADER = struct.Struct("<8sIII")  # magic, версия, число секций, длина метаданных
+_SECTION = struct.Struct("<32sQQ")  # имя, смещение, длина
+_ALIGN = 8
+
+# песня альбома, которой нет в каталоге: вместо строки - индекс в таблице строк
+_NOT_IN_CATALOG = 0x80000000
+
+
+# --- источники ---
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(data_dir: Path) -> Dict[str, List[Any]]:
+    """Return: имя файла -> [размер, mtime_ns, хэш] для всех источников каталога"""
+    sources = {}
+    for name in SOURCE_FILES:
+        path = data_dir / name
+        if path.exists():
+            stat = path.stat()
+            sources[name] = [stat.st_size, stat.st_mtime_ns, _file_hash(path)]
+    return sources
+
+
+def _sources_match(data_dir: Path, saved: Dict[str, List[Any]]) -> bool:
+    """совпадают ли источники со снимком
+
+    Хэш считается только если mtime изменился, а размер нет (файл
+    скопировали или "потрогали").
+    """
+    for name in SOURCE_FILES:
+        path = data_dir / name
+        if not path.exists():
+            if name in saved:
+                return False
+            continue
+        if name not in saved:
+            return False
+
+        size, mtime_ns, digest = saved[name]
+        stat = path.stat()
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns != mtime_ns and _file_hash(path) != digest:
+            return False
+    return True
+
+
+# --- кодирование секций ---
+
+def _pack_strings(values: List[str]) -> bytes:
+    # завершающий \0, чтобы отличать [] от [""]
+    return "".join(value + "\0" for value in values).encode('utf-8')
+
+
+def _unpack_strings(data) -> List[str]:
+    return str(data, 'utf-8').split("\0")[:-1]
+
+
+def _pack_postings(postings: Dict[str, Any], rows: Dict[str, int]) -> Tuple[bytes, bytes, bytes]:
+    """Return: отсортированные ключи, смещения, номера строк песен (в порядке postings)"""
+    keys = sorted(postings)
+    offsets = array('Q', [0])
+    values = array('I')
+    for key in keys:
+        values.extend(rows[song_id] for song_id in postings[key])
+        offsets.append(len(values))
+    return _pack_strings(keys), offsets.tobytes(), values.tobytes()
+
+
+class _Postings:
+    """ключ -> номера строк песен, прямо из отображенного файла"""
+
+    def __init__(self, snapshot: '_SnapshotFile', name: str):
+        self.keys = _unpack_strings(snapshot.section(f"{name}.keys"))
+        self.offsets = snapshot.view(f"{name}.offsets", 'Q')
+        self.rows = snapshot.view(f"{name}.rows", 'I')
+
+    def index(self, key: str) -> int:
+        i = bisect_left(self.keys, key)
+        return i if i < len(self.keys) and self.keys[i] == key else -1
+
+    def get(self, key: str) -> Optional[memoryview]:
+        i = self.index(key)
+        if i < 0:
+            return None
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+
+class _SnapshotFile:
+    """прочитанный заголовок снимка и секции поверх mmap"""
+
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._mmap)
+
+        magic, version, count, meta_length = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("неизвестный формат снимка")
+
+        position = _HEADER.size
+        self.meta = json.loads(bytes(data[position:position + meta_length]))
+        position += meta_length
+
+        self._sections: Dict[str, memoryview] = {}
+        for _ in range(count):
+            name, offset, length = _SECTION.unpack_from(data, position)
+            position += _SECTION.size
+            if offset + length > len(data):
+                raise ValueError("снимок обрезан")
+            self._sections[name.rstrip(b"\0").decode('ascii')] = data[offset:offset + length]
+
+    def section(self, name: str) -> memoryview:
+        return self._sections[name]
+
+    def view(self, name: str, typecode: str) -> memoryview:
+        """массив без копирования"""
+        return self._sections[name].cast(typecode)
+
+
+class _LazyIdIndex(MutableMapping):
+    """вторичный индекс из снимка: список id собирается при первом обращении к ключу"""
+
+    def __init__(self, postings: _Postings, ids: List[str]):
+        self._postings = postings
+        self._ids = ids
+        self._lists: Dict[str, List[str]] = {}
+        self._removed: Set[str] = set()
+
+    def __getitem__(self, key: str) -> List[str]:
+        song_ids = self._lists.get(key)
+        if song_ids is None:
+            if key in self._removed:
+                raise KeyError(key)
+            rows = self._postings.get(key)
+            if rows is None:
+                raise KeyError(key)
+            ids = self._ids
+            song_ids = self._lists[key] = [ids[row] for row in rows]
+        return song_ids
+
+    def __setitem__(self, key: str, song_ids: List[str]) -> None:
+        self._lists[key] = song_ids
+        self._removed.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._lists.pop(key, None)
+        self._removed.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._lists:
+            return True
+        return isinstance(key, str) and key not in self._removed and self._postings.index(key) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._postings.keys:
+            if key not in self._removed and key not in self._lists:
+                yield key
+        yield from list(self._lists)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class SnapshotSearchBase:
+    """поисковый индекс из снимка: n-граммы и поля песен лежат в отображенном файле"""
+
+    def __init__(self, snapshot: _SnapshotFile, ids: List[str], catalog: SongCatalog):
+        self.ids = ids
+        self.count = len(ids)
+        self.rank = snapshot.view("search.rank", 'I')  # место песни при сортировке по исполнителю и названию
+        self._catalog = catalog
+        self._table = snapshot.view("songs.table", 'I')
+        self._strings = _unpack_strings(snapshot.section("search.strings"))
+        self._refs = snapshot.view("search.refs", 'I')
+        self._titles = snapshot.section("search.titles")
+        self._title_offsets = snapshot.view("search.title_offsets", 'Q')
+        self._grams = _Postings(snapshot, "search.grams")
+        self._prefixes = _Postings(snapshot, "search.prefixes")
+
+    def row(self, song_id: str) -> int:
+        """Return: строка песни в снимке или -1
+
+        Ищется по хэш-таблице из снимка, а не по каталогу: песня могла
+        быть уже удалена из каталога.
+        """
+        table = self._table
+        mask = len(table) - 1
+        i = id_hash(song_id) & mask
+        while True:
+            row = table[i]
+            if row == EMPTY:
+                return -1
+            if row < DELETED and self.ids[row] == song_id:
+                return row
+            i = (i + 1) & mask
+
+    def fields(self, row: int) -> Tuple[str, str, str, str]:
+        title = str(self._titles[self._title_offsets[row]:self._title_offsets[row + 1]], 'utf-8')
+        strings = self._strings
+        refs = self._refs
+        i = row * 3
+        return title, strings[refs[i]], strings[refs[i + 1]], strings[refs[i + 2]]
+
+    def sort_key(self, row: int) -> Tuple[str, str]:
+        song = self._catalog[self.ids[row]]
+        return song.artist, song.title
+
+    def candidates(self, query: str) -> Set[int]:
+        if len(query) < NGRAM:
+            rows = self._prefixes.get(query)
+            return set(rows) if rows is not None else set()
+
+        postings = []
+        for i in range(len(query) - NGRAM + 1):
+            rows = self._grams.get(query[i:i + NGRAM])
+            if rows is None:
+                return set()
+            postings.append(rows)
+
+        postings.sort(key=len)
+        result = set(postings[0])
+        for rows in postings[1:]:
+            result.intersection_update(rows)
+            if not result:
+                break
+        return result
+
+
+# --- запись и чтение ---
+
+def write_snapshot(path: Path, database: 'Database') -> None:
+    """записать собранный каталог, его индексы и поисковый индекс"""
+    ids, strings, columns = database.songs.dump_columns()
+    rows = {song_id: row for row, song_id in enumerate(ids)}
+
+    sections: Dict[str, bytes] = {
+        "songs.ids": _pack_strings(ids),
+        "songs.strings": _pack_strings(strings),
+    }
+    for name, data in columns.items():
+        sections[f"songs.{name}"] = data
+
+    # альбомы: 5 строк на запись + список песен
+    album_strings = StringTable()
+    records = array('I')
+    song_offsets = array('Q', [0])
+    song_refs = array('I')
+    for album in list(database.albums.values()):
+        records.extend(album_strings.add(value) for value in (
+            album.id, album.title, album.artist, album.cover, album.release_date
+        ))
+        for song_id in album.songs:
+            row = rows.get(song_id)
+            song_refs.append(row if row is not None else album_strings.add(song_id) | _NOT_IN_CATALOG)
+        song_offsets.append(len(song_refs))
+    sections.update({
+        "albums.strings": _pack_strings(album_strings.strings),
+        "albums.records": records.tobytes(),
+        "albums.song_offsets": song_offsets.tobytes(),
+        "albums.song_refs": song_refs.tobytes(),
+    })
+
+    sections["genres"] = _pack_strings([
+        value for genre in database.genres.values()
+        for value in (genre.id, genre.name, genre.description or "")
+    ])
+    sections["artists"] = _pack_strings(list(database.artists))
+
+    for field, index in (("artist", database.songs_by_artist),
+                         ("album", database.songs_by_album),
+                         ("genre", database.songs_by_genre)):
+        keys, offsets, values = _pack_postings(index, rows)
+        sections[f"index.{field}.keys"] = keys
+        sections[f"index.{field}.offsets"] = offsets
+        sections[f"index.{field}.rows"] = values
+
+    # поисковый индекс: поля в нижнем регистре по строкам каталога
+    fields, sort_keys, grams, prefixes = database.search_index.dump()
+    search_strings = StringTable()
+    refs = array('I')
+    titles = bytearray()
+    title_offsets = array('Q', [0])
+    for song_id in ids:
+        title, artist, album_title, genre_name = fields[song_id]
+        refs.extend((search_strings.add(artist), search_strings.add(album_title), search_strings.add(genre_name)))
+        titles += title.encode('utf-8')
+        title_offsets.append(len(titles))
+
+    rank = array('I', bytes(4 * len(ids)))
+    # при равных ключах поиск упорядочивает по id
+    for position, row in enumerate(sorted(range(len(ids)), key=lambda row: (sort_keys[ids[row]], ids[row]))):
+        rank[row] = position
+
+    sections.update({
+        "search.strings": _pack_strings(search_strings.strings),
+        "search.refs": refs.tobytes(),
+        "search.titles": bytes(titles),
+        "search.title_offsets": title_offsets.tobytes(),
+        "search.rank": rank.tobytes(),
+    })
+    for name, postings in (("grams", grams), ("prefixes", prefixes)):
+        keys, offsets, values = _pack_postings(postings, rows)
+        sections[f"search.{name}.keys"] = keys
+        sections[f"search.{name}.offsets"] = offsets
+        sections[f"search.{name}.rows"] = values
+
+    meta = json.dumps({'sources': source_fingerprint(database.data_dir)}).encode('utf-8')
+
+    # раскладка: заголовок, метаданные, оглавление, выровненные секции
+    position = _HEADER.size + len(meta) + _SECTION.size * len(sections)
+    directory = []
+    for name, data in sections.items():
+        position += -position % _ALIGN
+        directory.append((name, position, len(data)))
+        position += len(data)
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(sections), len(meta)))
+        f.write(meta)
+        for name, offset, length in directory:
+            f.write(_SECTION.pack(name.encode('ascii'), offset, length))
+        for name, offset, _ in directory:
+            f.write(bytes(offset - f.tell()))
+            f.write(sections[name])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: Path, database: 'Database') -> bool:
+    """загрузить каталог из снимка
+
+    Return: False, если снимка нет, он другой версии, поврежден или
+    исходные файлы изменились - тогда каталог надо собрать заново.
+    """
+    try:
+        snapshot = _SnapshotFile(path)
+        if not _sources_match(database.data_dir, snapshot.meta['sources']):
+            return False
+
+        ids = _unpack_strings(snapshot.section("songs.ids"))
+        songs = SongCatalog()
+        songs.load_columns(
+            list(ids),
+            _unpack_strings(snapshot.section("songs.strings")),
+            {name: snapshot.section(f"songs.{name}") for name in SongCatalog.COLUMNS}
+        )
+
+        album_strings = _unpack_strings(snapshot.section("albums.strings"))
+        records = snapshot.view("albums.records", 'I')
+        song_offsets = snapshot.view("albums.song_offsets", 'Q')
+        song_refs = snapshot.view("albums.song_refs", 'I')
+        albums = {}
+        for i in range(len(records) // 5):
+            album_id, title, artist, cover, release_date = (
+                album_strings[ref] for ref in records[i * 5:i * 5 + 5]
+            )
+            album_songs = [
+                album_strings[ref & ~_NOT_IN_CATALOG] if ref & _NOT_IN_CATALOG else ids[ref]
+                for ref in song_refs[song_offsets[i]:song_offsets[i + 1]]
+            ]
+            albums[album_id] = Album(
+                id=album_id, title=title, artist=artist, cover=cover,
+                songs=album_songs, release_date=release_date
+            )
+
+        values = _unpack_strings(snapshot.section("genres"))
+        genres = {
+            values[i]: Genre(id=values[i], name=values[i + 1], description=values[i + 2])
+            for i in range(0, len(values), 3)
+        }
+        artists = {name: Artist(name=name) for name in _unpack_strings(snapshot.section("artists"))}
+
+        indexes = [
+            _LazyIdIndex(_Postings(snapshot, f"index.{field}"), ids)
+            for field in ("artist", "album", "genre")
+        ]
+        search_base = SnapshotSearchBase(snapshot, ids, songs)
+    except (OSError, ValueError, KeyError, IndexError, TypeError, struct.error):
+        return False
+
+    database.songs = songs
+    database.albums = albums
+    database.genres = genres
+    database.artists = artists
+    database.songs_by_artist, database.songs_by_album, database.songs_by_genre = indexes
+    database.album_by_key = {(album.artist, album.title): album.id for album in albums.values()}
+    database.genre_by_name = {genre.name: genre.id for genre in genres.values()}
+    database.search_index.set_base(search_base)
+    return True
@@ -0,0 +1,172 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QSize, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+# обложка по умолчанию (cover_0.jpg)
+DEFAULT_COVER = "0"
+
+# сколько картинок держать в памяти
+CACHE_SIZE = 64
+
+# сколько обложек декодировать одновременно
+DECODE_THREADS = 2
+
+THUMBS_DIR = "thumbs"
+
+
+def cover_path(covers_dir: Path, cover: str) -> Path:
+    return covers_dir / f"cover_{cover}.jpg"
+
+
+def thumbnail_path(covers_dir: Path, cover: str, size: int) -> Path:
+    return covers_dir / THUMBS_DIR / f"cover_{cover}_{size}.jpg"
+
+
+def load_thumbnail(covers_dir: Path, cover: str, size: int) -> QImage:
+    """уменьшенная обложка: из кэша на диске или декодированием исходника
+
+    Пустой QImage, если обложки нет или она не читается.
+    """
+    source = cover_path(covers_dir, cover)
+    thumb = thumbnail_path(covers_dir, cover, size)
+
+    try:
+        source_mtime = source.stat().st_mtime_ns
+    except OSError:
+        return QImage()
+
+    try:
+        if thumb.stat().st_mtime_ns >= source_mtime:
+            image = QImage(str(thumb))
+            if not image.isNull():
+                return image
+    except OSError:
+        pass
+
+    # JPEG декодируется сразу в нужном размере - это в разы быстрее полного
+    reader = QImageReader(str(source))
+    original = reader.size()
+    if original.isValid():
+        reader.setScaledSize(original.scaled(QSize(size, size), Qt.KeepAspectRatioByExpanding))
+    image = reader.read()
+    if image.isNull():
+        return image
+
+    if image.width() != size or image.height() != size:
+        image = image.scaled(size, size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+        # неквадратную обложку обрезаем по центру
+        image = image.copy((image.width() - size) // 2, (image.height() - size) // 2, size, size)
+
+    _save_thumbnail(image, thumb)
+    return image
+
+
+def _save_thumbnail(image: QImage, thumb: Path) -> None:
+    # кэш на диске необязателен: не получилось записать - просто не будет кэша
+    tmp_path = thumb.with_name(f"{thumb.stem}.{os.getpid()}.tmp.jpg")
+    try:
+        thumb.parent.mkdir(parents=True, exist_ok=True)
+        if image.save(str(tmp_path), "JPG", 90):
+            os.replace(tmp_path, thumb)
+    except OSError:
+        pass
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+class _CoverSignals(QObject):
+    loaded = Signal(str, int, QImage)  # cover, size, image
+
+
+class _CoverTask(QRunnable):
+    """декодирование обложки в рабочем потоке"""
+
+    def __init__(self, cache: 'CoverCache', cover: str, size: int):
+        super().__init__()
+        self.cache = cache
+        self.cover = cover
+        self.size = size
+
+    def run(self) -> None:
+        image = load_thumbnail(self.cache.covers_dir, self.cover, self.size)
+        self.cache.signals.loaded.emit(self.cover, self.size, image)
+
+
+class CoverCache(QObject):
+    """обложки альбомов: декодирование в пуле потоков, LRU в памяти, миниатюры на диске"""
+
+    # Signals
+    cover_ready = Signal(str, int, QPixmap)  # cover, size, pixmap (пустой, если обложки нет)
+
+    def __init__(self, covers_dir: str = "data/covers", capacity: int = CACHE_SIZE,
+                 parent: QObject = None):
+        super().__init__(parent)
+        self.covers_dir = Path(covers_dir)
+        self.capacity = capacity
+
+        # QPixmap создаётся только в GUI-потоке, поэтому в LRU кладётся здесь
+        self._pixmaps: 'OrderedDict[Tuple[str, int], QPixmap]' = OrderedDict()
+        self._pending: Set[Tuple[str, int]] = set()
+        self._tasks: Dict[Tuple[str, int], _CoverTask] = {}
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(DECODE_THREADS)
+
+        self.signals = _CoverSignals()
+        self.signals.loaded.connect(self._on_loaded)
+
+    def get(self, cover: str, size: int) -> Optional[QPixmap]:
+        """обложка из памяти или None; отсутствующая в памяти начинает загружаться"""
+        key = (cover, size)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return pixmap
+
+        self.request(cover, size)
+        return None
+
+    def request(self, cover: str, size: int) -> None:
+        """загрузить обложку в фоне, результат придёт в cover_ready"""
+        key = (cover, size)
+        if key in self._pixmaps or key in self._pending:
+            return
+
+        task = _CoverTask(self, cover, size)
+        task.setAutoDelete(False)
+        self._pending.add(key)
+        self._tasks[key] = task
+        self._pool.start(task)
+
+    def cancel_pending(self) -> None:
+        """убрать из очереди ещё не начатые загрузки (быстрое листание треков)"""
+        for key, task in list(self._tasks.items()):
+            if self._pool.tryTake(task):
+                self._pending.discard(key)
+                del self._tasks[key]
+
+    def clear(self) -> None:
+        self._pixmaps.clear()
+
+    def wait(self) -> None:
+        """дождаться рабочих потоков (при закрытии окна)"""
+        self.cancel_pending()
+        self._pool.waitForDone()
+
+    def _on_loaded(self, cover: str, size: int, image: QImage) -> None:
+        key = (cover, size)
+        self._pending.discard(key)
+        self._tasks.pop(key, None)
+
+        pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        if not pixmap.isNull():
+            self._pixmaps[key] = pixmap
+            self._pixmaps.move_to_end(key)
+            while len(self._pixmaps) > self.capacity:
+                self._pixmaps.popitem(last=False)
+
+        self.cover_ready.emit(cover, size, pixmap)
@@ -1,41 +1,141 @@
+import dataclasses
 import json
+import threading
 import xml.etree.ElementTree as ET
+from bisect import insort
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 from models import User, Song, Album, Artist, Genre, Playlist, Library
+from music_service.catalog_snapshot import SNAPSHOT_NAME, load_snapshot, write_snapshot
+from music_service.file_lock import FileLock
+from music_service.journal import Journal, write_json_atomic
+from music_service.json_stream import iter_json_object, iter_ndjson, write_json_object, write_ndjson
+from music_service.search_index import SearchIndex
+from music_service.song_catalog import SongCatalog
+
+JOURNAL_NAME = "journal.log"
+
+# после стольких записей журнал сжимается в снимки
+COMPACT_RECORDS = 1000
+COMPACT_BYTES = 1024 * 1024
+
+# сколько секунд копить изменения перед записью на диск
+SAVE_DELAY = 0.5
+
+# файлы каталога, которые может переписать другой процесс (в порядке загрузки)
+CATALOG_FILES = ('genres', 'albums', 'songs')
+
+# части каталога в порядке загрузки и доля работы после каждой (для прогресса)
+CATALOG_COLLECTIONS = (
+    ("genres", 5),
+    ("albums", 20),
+    ("songs", 60),
+    ("artists", 65),
+    ("indexes", 75),
+    ("search", 100),
+)
 
 
 class Database:
     """Класс для управления JSON и XML данными"""
 
-    def __init__(self, data_dir: str = "data"):
+    # коллекции, снимки которых пишутся при сжатии общего журнала
+    JOURNAL_SNAPSHOTS = ('users', 'playlists', 'libraries')
+
+    def __init__(self, data_dir: str = "data", save_delay: float = SAVE_DELAY, load: bool = True):
         self.data_dir = Path(data_dir)
+        self.save_delay = save_delay
 
         # Data storage
         self.users: Dict[str, User] = {}
-        self.songs: Dict[str, Song] = {}
+        self.songs: SongCatalog = SongCatalog()  # колонки вместо объекта на песню
         self.albums: Dict[str, Album] = {}
         self.artists: Dict[str, Artist] = {}
         self.genres: Dict[str, Genre] = {}
         self.playlists: Dict[str, Playlist] = {}
         self.libraries: Dict[str, Library] = {}
 
-        # Load all data
-        self.load_all()
+        # Secondary indexes (song id lists are sorted by artist, title)
+        self.songs_by_artist: Dict[str, List[str]] = {}
+        self.songs_by_album: Dict[str, List[str]] = {}
+        self.songs_by_genre: Dict[str, List[str]] = {}
+        self.album_by_key: Dict[Tuple[str, str], str] = {}
+        self.genre_by_name: Dict[str, str] = {}
+
+        # Search index over songs
+        self.search_index = SearchIndex()
+
+        # Journal of changes to users, playlists and libraries
+        self.journal = Journal(self.data_dir / JOURNAL_NAME)
+
+        # Write-behind: changes wait here until flush()
+        self._save_lock = threading.RLock()
+        self._flush_lock = threading.Lock()  # один flush() за раз; берётся до _save_lock
+        self._pending: List[Dict[str, Any]] = []
+        self._dirty: Set[str] = set()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._transaction_depth = 0
+        self.last_save_error: Optional[Exception] = None
+
+        # Other processes: каталог пишется под своей блокировкой, журналы - под своими
+        self._catalog_lock = FileLock(self.data_dir / "catalog.lock")
+        self._catalog_stamps: Dict[str, Optional[Tuple[int, int]]] = {}  # (mtime, size) прочитанных файлов
+        self._changed: Set[str] = set()
+        self.conflicts: List[Tuple[str, str]] = []
+
+        # Load all data (load=False: caller loads it, e.g. DatabaseLoader in a thread)
+        if load:
+            self.load_all()
 
     def load_all(self) -> None:
         """подгружает ВСЕ данные"""
         try:
-            self.load_genres()
+            self.load_accounts()
+            self.load_catalog()
+        except Exception as e:
+            raise RuntimeError(f"Ошибка загрузки Database: {e}")
+
+    def load_accounts(self) -> None:
+        """пользователи, плейлисты и библиотеки - этого хватает для входа"""
+        # снимки и журнал - под одной блокировкой, иначе между ними может пройти сжатие
+        with self._save_lock, self.journal.lock:
             self.load_users()
-            self.load_albums()
-            self.load_songs()
             self.load_playlists()
             self.load_libraries()
-            self.extract_artists()
-        except Exception as e:
-            raise RuntimeError(f"Ошибка загрузки Database: {e}")
+            self.replay_journal()
+
+    def load_catalog(self, progress: Optional[Callable[[str, int], None]] = None) -> None:
+        """песни, альбомы, жанры и индексы: из снимка, если исходники не менялись
+
+        Каждая коллекция подменяется целиком, когда готова, так что читать
+        уже загруженные можно из другого потока. progress(коллекция, процент)
+        вызывается после каждой.
+        """
+        if load_snapshot(self.data_dir / SNAPSHOT_NAME, self):
+            steps = [None] * len(CATALOG_COLLECTIONS)
+        else:
+            steps = [self.load_genres, self.load_albums, self.load_songs,
+                     self.extract_artists, self.build_indexes, self.build_search_index]
+
+        for step, (collection, percent) in zip(steps, CATALOG_COLLECTIONS):
+            if step is not None:
+                step()
+            if progress is not None:
+                progress(collection, percent)
+
+        if steps[0] is not None:
+            self.save_snapshot()
+        self._stamp_catalog()
+
+    def save_snapshot(self) -> None:
+        """записать снимок каталога для быстрого запуска"""
+        try:
+            write_snapshot(self.data_dir / SNAPSHOT_NAME, self)
+        except OSError as e:
+            # без снимка все работает, просто следующий запуск будет медленнее
+            self.last_save_error = e
 
     def load_genres(self) -> None:
         xml_path = self.data_dir / "genres.xml"
@@ -43,118 +143,96 @@ class Database:
             tree = ET.parse(xml_path)
             root = tree.getroot()
 
+            genres = {}
             for genre_elem in root.findall('genre'):
                 genre_id = genre_elem.get('id')
                 name = genre_elem.find('name').text
                 description = genre_elem.find('description').text
 
-                self.genres[genre_id] = Genre(
+                genres[genre_id] = Genre(
                     id=genre_id,
                     name=name,
                     description=description
                 )
+            self.genres = genres
         except FileNotFoundError:
             raise FileNotFoundError(f"XML файл жанров не найден: {xml_path}")
         except ET.ParseError as e:
             raise ValueError(f"ошибка чтения XML: {e}")
 
     def load_users(self) -> None:
-        json_path = self.data_dir / "users.json"
+        users = self._read_snapshot('users')
+        if users is None:
+            # создаем пустой если что
+            self.save_users()
+        else:
+            self.users.update(users)
+
+    def _read_snapshot(self, collection: str) -> Optional[Dict[str, Any]]:
+        """записи из снимка коллекции журнала; None - снимка ещё нет"""
+        json_path = self.data_dir / f"{collection}.json"
+        _, from_dict = self._journaled(collection)
         try:
             with open(json_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-
-            for email, user_data in data.items():
-                self.users[email] = User(
-                    email=email,
-                    username=user_data['username'],
-                    password_hash=user_data['password_hash'],
-                    library_id=user_data['library_id']
-                )
         except FileNotFoundError:
-            # создаем пустой если что
-            self.save_users()
+            return None
         except json.JSONDecodeError as e:
-            raise ValueError(f"Ошибка чтения JSON: {e}")
+            raise ValueError(f"ошибка чтения {json_path.name}: {e}")
+        return {key: from_dict(key, value) for key, value in data.items()}
+
+    def _catalog_path(self, name: str) -> Path:
+        """songs/albums: построчный вариант .ndjson, если он есть, иначе .json"""
+        ndjson_path = self.data_dir / f"{name}.ndjson"
+        return ndjson_path if ndjson_path.exists() else self.data_dir / f"{name}.json"
+
+    def _iter_catalog(self, name: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """записи каталога по одной, без чтения всего файла в память"""
+        path = self._catalog_path(name)
+        if path.suffix == ".ndjson":
+            for data in iter_ndjson(path):
+                yield data.pop('id'), data
+        else:
+            yield from iter_json_object(path)
 
     def load_songs(self) -> None:
-        json_path = self.data_dir / "songs.json"
+        json_path = self._catalog_path("songs")
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            for song_id, song_data in data.items():
-                self.songs[song_id] = Song(
-                    id=song_id,
-                    title=song_data['title'],
-                    artist=song_data['artist'],
-                    album=song_data['album'],
-                    genre=song_data['genre'],
-                    duration=song_data['duration'],
-                    filename=song_data['filename']
-                )
+            songs = SongCatalog()
+            for song_id, song_data in self._iter_catalog("songs"):
+                songs[song_id] = self._song_from_dict(song_id, song_data)
+            self.songs = songs
         except FileNotFoundError:
             raise FileNotFoundError(f"JSON файл songs не найден: {json_path}")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"ошибка чтения songs.JSON: {e}")
+        except (json.JSONDecodeError, KeyError) as e:
+            raise ValueError(f"ошибка чтения {json_path.name}: {e}")
 
     def load_albums(self) -> None:
         """Load albums from JSON file"""
-        json_path = self.data_dir / "albums.json"
+        json_path = self._catalog_path("albums")
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            for album_id, album_data in data.items():
-                self.albums[album_id] = Album(
-                    id=album_id,
-                    title=album_data['title'],
-                    artist=album_data['artist'],
-                    cover=album_data['cover'],
-                    songs=album_data['songs'],
-                    release_date=album_data['release_date']
-                )
+            albums = {}
+            for album_id, album_data in self._iter_catalog("albums"):
+                albums[album_id] = self._album_from_dict(album_id, album_data)
+            self.albums = albums
         except FileNotFoundError:
             raise FileNotFoundError(f"Albums.json не найден: {json_path}")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"ошибка чтения albums.json: {e}")
+        except (json.JSONDecodeError, KeyError) as e:
+            raise ValueError(f"ошибка чтения {json_path.name}: {e}")
 
     def load_playlists(self) -> None:
-        json_path = self.data_dir / "playlists.json"
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            for playlist_id, playlist_data in data.items():
-                self.playlists[playlist_id] = Playlist(
-                    id=playlist_id,
-                    title=playlist_data['title'],
-                    description=playlist_data['description'],
-                    author=playlist_data['author'],
-                    songs=playlist_data['songs']
-                )
-        except FileNotFoundError:
+        playlists = self._read_snapshot('playlists')
+        if playlists is None:
             self.save_playlists()
-        except json.JSONDecodeError as e:
-            raise ValueError(f"ошибка чтения playlists.json: {e}")
+        else:
+            self.playlists.update(playlists)
 
     def load_libraries(self) -> None:
-        json_path = self.data_dir / "libraries.json"
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            for library_id, library_data in data.items():
-                self.libraries[library_id] = Library(
-                    id=library_id,
-                    songs=library_data['songs'],
-                    albums=library_data['albums'],
-                    playlists=library_data['playlists']
-                )
-        except FileNotFoundError:
+        libraries = self._read_snapshot('libraries')
+        if libraries is None:
             self.save_libraries()
-        except json.JSONDecodeError as e:
-            raise ValueError(f"ошибка чтения libraries.json: {e}")
+        else:
+            self.libraries.update(libraries)
 
     def extract_artists(self) -> None:
         """получить ВСЕХ исполнителей из songs"""
@@ -164,60 +242,598 @@ class Database:
         for album in self.albums.values():
             artist_names.add(album.artist)
 
-        for name in artist_names:
-            self.artists[name] = Artist(name=name)
+        self.artists = {name: Artist(name=name) for name in artist_names}
+
+    def build_indexes(self) -> None:
+        """построить вторичные индексы за один проход"""
+        by_artist: Dict[str, List[str]] = {}
+        by_album: Dict[str, List[str]] = {}
+        by_genre: Dict[str, List[str]] = {}
+
+        for song in sorted(self.songs.values(), key=self._song_sort_key):
+            by_artist.setdefault(song.artist, []).append(song.id)
+            by_album.setdefault(song.album, []).append(song.id)
+            by_genre.setdefault(song.genre, []).append(song.id)
+
+        self.songs_by_artist, self.songs_by_album, self.songs_by_genre = by_artist, by_album, by_genre
+
+        self.album_by_key = {(album.artist, album.title): album.id for album in self.albums.values()}
+        self.genre_by_name = {genre.name: genre.id for genre in self.genres.values()}
+
+    @staticmethod
+    def _song_sort_key(song: Song) -> Tuple[str, str]:
+        return song.artist, song.title
+
+    def _index_song_fields(self, song: Song) -> None:
+        def key(song_id: str) -> Tuple[str, str]:
+            return self._song_sort_key(self.songs[song_id])
+
+        insort(self.songs_by_artist.setdefault(song.artist, []), song.id, key=key)
+        insort(self.songs_by_album.setdefault(song.album, []), song.id, key=key)
+        insort(self.songs_by_genre.setdefault(song.genre, []), song.id, key=key)
+
+    def _unindex_song_fields(self, song: Song) -> None:
+        for index, value in ((self.songs_by_artist, song.artist),
+                             (self.songs_by_album, song.album),
+                             (self.songs_by_genre, song.genre)):
+            song_ids = index.get(value)
+            if song_ids and song.id in song_ids:
+                song_ids.remove(song.id)
+                if not song_ids:
+                    del index[value]
+
+    def build_search_index(self) -> None:
+        """построить поисковый индекс по всем песням"""
+        self.search_index.clear()
+        for song in self.songs.values():
+            self._index_song(song)
+
+    def _reindex_songs(self, song_ids: List[str]) -> None:
+        """обновить поисковые записи песен после переименования их альбома/жанра"""
+        for song_id in song_ids:
+            song = self.songs.get(song_id)
+            if song is not None:
+                self._index_song(song)
+
+    def _index_song(self, song: Song) -> None:
+        album = self.albums.get(song.album)
+        genre = self.genres.get(song.genre)
+        self.search_index.add(
+            song,
+            album_title=album.title if album else "",
+            genre_name=genre.name if genre else ""
+        )
+
+    @staticmethod
+    def _song_from_dict(song_id: str, data: Dict[str, Any]) -> Song:
+        return Song(
+            id=song_id,
+            title=data['title'],
+            artist=data['artist'],
+            album=data['album'],
+            genre=data['genre'],
+            duration=data['duration'],
+            filename=data['filename']
+        )
+
+    @staticmethod
+    def _song_to_dict(song: Song) -> Dict[str, Any]:
+        return {
+            'title': song.title,
+            'artist': song.artist,
+            'album': song.album,
+            'genre': song.genre,
+            'duration': song.duration,
+            'filename': song.filename
+        }
+
+    @staticmethod
+    def _album_from_dict(album_id: str, data: Dict[str, Any]) -> Album:
+        return Album(
+            id=album_id,
+            title=data['title'],
+            artist=data['artist'],
+            cover=data['cover'],
+            songs=data['songs'],
+            release_date=data['release_date']
+        )
+
+    @staticmethod
+    def _album_to_dict(album: Album) -> Dict[str, Any]:
+        return {
+            'title': album.title,
+            'artist': album.artist,
+            'cover': album.cover,
+            'songs': list(album.songs),
+            'release_date': album.release_date
+        }
+
+    @staticmethod
+    def _user_from_dict(email: str, data: Dict[str, Any]) -> User:
+        return User(
+            email=email,
+            username=data['username'],
+            password_hash=data['password_hash'],
+            library_id=data['library_id']
+        )
+
+    @staticmethod
+    def _user_to_dict(user: User) -> Dict[str, Any]:
+        return {
+            'username': user.username,
+            'password_hash': user.password_hash,
+            'library_id': user.library_id
+        }
+
+    @staticmethod
+    def _playlist_from_dict(playlist_id: str, data: Dict[str, Any]) -> Playlist:
+        return Playlist(
+            id=playlist_id,
+            title=data['title'],
+            description=data['description'],
+            author=data['author'],
+            songs=data['songs']
+        )
+
+    @staticmethod
+    def _playlist_to_dict(playlist: Playlist) -> Dict[str, Any]:
+        return {
+            'title': playlist.title,
+            'description': playlist.description,
+            'author': playlist.author,
+            'songs': list(playlist.songs)
+        }
+
+    @staticmethod
+    def _library_from_dict(library_id: str, data: Dict[str, Any]) -> Library:
+        return Library(
+            id=library_id,
+            songs=data['songs'],
+            albums=data['albums'],
+            playlists=data['playlists']
+        )
+
+    @staticmethod
+    def _library_to_dict(library: Library) -> Dict[str, Any]:
+        return {
+            'songs': list(library.songs),
+            'albums': list(library.albums),
+            'playlists': list(library.playlists)
+        }
+
+    def _write_json(self, name: str, data: Dict[str, Any]) -> None:
+        try:
+            write_json_atomic(self.data_dir / f"{name}.json", data)
+        except IOError as e:
+            raise IOError(f"ошибка сохранения {name}: {e}")
 
-    def save_users(self) -> None:
-        """сохранить users в JSON"""
-        json_path = self.data_dir / "users.json"
-        data = {}
-        for email, user in self.users.items():
-            data[email] = {
-                'username': user.username,
-                'password_hash': user.password_hash,
-                'library_id': user.library_id
-            }
+    def _write_catalog(self, name: str, items: Iterator[Tuple[str, Dict[str, Any]]]) -> None:
+        """записать каталог потоком в том же формате, в котором он был прочитан"""
+        path = self._catalog_path(name)
+        try:
+            if path.suffix == ".ndjson":
+                write_ndjson(path, ({'id': item_id, **data} for item_id, data in items))
+            else:
+                write_json_object(path, items)
+        except IOError as e:
+            raise IOError(f"ошибка сохранения {name}: {e}")
+
+    def save_songs(self) -> None:
+        """сохранить songs в JSON"""
+        self._write_catalog("songs", (
+            (song.id, self._song_to_dict(song)) for song in self.songs.values()
+        ))
+
+    def save_albums(self) -> None:
+        """сохранить albums в JSON"""
+        self._write_catalog("albums", (
+            (album_id, self._album_to_dict(album)) for album_id, album in list(self.albums.items())
+        ))
+
+    def save_genres(self) -> None:
+        """сохранить genres в XML"""
+        root = ET.Element('genres')
+        for genre_id, genre in list(self.genres.items()):
+            genre_elem = ET.SubElement(root, 'genre', id=genre_id)
+            ET.SubElement(genre_elem, 'name').text = genre.name
+            ET.SubElement(genre_elem, 'description').text = genre.description
 
+        xml_path = self.data_dir / "genres.xml"
+        tmp_path = xml_path.with_name(xml_path.name + ".tmp")
         try:
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            ET.ElementTree(root).write(tmp_path, encoding='utf-8', xml_declaration=True)
+            tmp_path.replace(xml_path)
         except IOError as e:
-            raise IOError(f"ошибка сохранения users: {e}")
+            raise IOError(f"ошибка сохранения genres: {e}")
+
+    def save_users(self) -> None:
+        """сохранить users в JSON"""
+        self._write_json("users", self._snapshot_data('users'))
 
     def save_playlists(self) -> None:
         """сохранить playlists в JSON"""
-        json_path = self.data_dir / "playlists.json"
-        data = {}
-        for playlist_id, playlist in self.playlists.items():
-            data[playlist_id] = {
-                'title': playlist.title,
-                'description': playlist.description,
-                'author': playlist.author,
-                'songs': playlist.songs
-            }
-
-        try:
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except IOError as e:
-            raise IOError(f"ошибка сохранения playlists: {e}")
+        self._write_json("playlists", self._snapshot_data('playlists'))
 
     def save_libraries(self) -> None:
         """сохраниьт libraries в JSON"""
-        json_path = self.data_dir / "libraries.json"
-        data = {}
-        for library_id, library in self.libraries.items():
-            data[library_id] = {
-                'songs': library.songs,
-                'albums': library.albums,
-                'playlists': library.playlists
-            }
-
+        self._write_json("libraries", self._snapshot_data('libraries'))
+
+    def _snapshot_data(self, collection: str) -> Dict[str, Any]:
+        """содержимое снимка коллекции журнала"""
+        to_dict = {
+            'users': self._user_to_dict,
+            'playlists': self._playlist_to_dict,
+            'libraries': self._library_to_dict,
+        }[collection]
+        items, _ = self._journaled(collection)
+        return {key: to_dict(item) for key, item in list(items.items())}
+
+    # --- журнал ---
+
+    def _journaled(self, collection: str):
+        """Return: словарь коллекции, функция чтения записи"""
+        if collection == 'users':
+            return self.users, self._user_from_dict
+        if collection == 'playlists':
+            return self.playlists, self._playlist_from_dict
+        if collection == 'libraries':
+            return self.libraries, self._library_from_dict
+        raise ValueError(f"коллекция {collection} не журналируется")
+
+    def _apply_record(self, record: Dict[str, Any], collections: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """применить запись журнала к данным в памяти (идемпотентно)
+
+        collections - словари вместо текущих, например перечитываемые заново
+        """
+        items, from_dict = self._journaled(record['c'])
+        if collections is not None:
+            items = collections[record['c']]
+        op = record['op']
+        key = record['key']
+
+        if op == 'put':
+            self._replace_item(items, key, from_dict(key, record['value']))
+        elif op == 'delete':
+            items.pop(key, None)
+        elif op in ('add', 'remove'):
+            obj = items.get(key)
+            if obj is None:
+                return
+            values = getattr(obj, record['field'])
+            if op == 'add' and record['item'] not in values:
+                values.append(record['item'])
+            elif op == 'remove' and record['item'] in values:
+                values.remove(record['item'])
+        else:
+            raise ValueError(f"неизвестная операция журнала: {op}")
+
+    @staticmethod
+    def _replace_item(items: Dict[str, Any], key: str, item: Any) -> None:
+        """заменить запись, сохранив объект: на него могут ссылаться сервисы и окна"""
+        old = items.get(key)
+        if old is None or type(old) is not type(item):
+            items[key] = item
+            return
+        for field in dataclasses.fields(item):
+            setattr(old, field.name, getattr(item, field.name))
+
+    def replay_journal(self) -> None:
+        """применить журнал поверх загруженных снимков"""
+        with self._save_lock, self.journal.lock:
+            for record in self.journal.replay():
+                self._apply_record(record)
+
+            if self._journal_is_full(self.journal):
+                self._compact_journal(self.journal)
+
+    def _journal_for(self, collection: str, key: str) -> Journal:
+        """журнал, в который пишутся изменения записи"""
+        return self.journal
+
+    def _pending_journals(self) -> List[Journal]:
+        """журналы, которые flush() берёт под блокировку - всегда в одном порядке"""
+        return [self.journal]
+
+    def _watched_journals(self) -> List[Journal]:
+        """журналы, которые проверяет poll_changes()"""
+        return [self.journal]
+
+    def _log(self, collection: str, op: str, key: str, **fields: Any) -> None:
+        record = {'c': collection, 'op': op, 'key': key}
+        record.update(fields)
+
+        with self._save_lock:
+            if op in ('put', 'delete'):
+                # предыдущие изменения этой записи больше не нужны
+                self._pending = [
+                    r for r in self._pending if r['c'] != collection or r['key'] != key
+                ]
+            self._pending.append(record)
+        self._schedule_flush()
+
+    def _mark_dirty(self, collection: str) -> None:
+        """коллекция будет целиком перезаписана при следующем flush()"""
+        with self._save_lock:
+            self._dirty.add(collection)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._transaction_depth:
+            return
+        if self.save_delay <= 0:
+            self.flush()
+            return
+
+        with self._save_lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.save_delay, self._flush_in_background)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_in_background(self) -> None:
         try:
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except IOError as e:
-            raise IOError(f"ошибка сохранения libraries: {e}")
+            self.flush()
+        except Exception as e:
+            # изменения остались в очереди, следующий flush() повторит запись
+            self.last_save_error = e
+
+    def flush(self) -> None:
+        """записать накопленные изменения одной записью в журнал
+
+        Журналы берутся под межпроцессную блокировку и сначала дочитываются,
+        так что изменения других процессов с той же папкой не затираются.
+        _save_lock держится, только пока журналы дочитываются и забираются
+        изменения: запись с fsync, перезапись каталога и сжатие идут без неё,
+        и изменения из других потоков не ждут диска.
+        """
+        with self._flush_lock:
+            with ExitStack() as stack:
+                with self._save_lock:
+                    if self._flush_timer is not None:
+                        self._flush_timer.cancel()
+                        self._flush_timer = None
+
+                    # журналы - под _save_lock, как в poll_changes(): один порядок блокировок
+                    journals = self._pending_journals()
+                    for journal in journals:
+                        stack.enter_context(journal.lock)
+                    for journal in journals:
+                        self._sync_journal(journal)
+
+                    records, self._pending = self._pending, []
+                    dirty, self._dirty = self._dirty, set()
+
+                try:
+                    self._append_records(records)
+                    self._save_catalog(dirty)
+                except Exception:
+                    # сначала отпустить журналы: _save_lock не ждут, держа их
+                    stack.close()
+                    with self._save_lock:
+                        self._pending = records + self._pending
+                        self._dirty |= dirty
+                    raise
+
+            self.last_save_error = None
+            for journal in journals:
+                if self._journal_is_full(journal):
+                    self._compact_journal(journal)
+
+    def _append_records(self, records: List[Dict[str, Any]]) -> None:
+        """дописать записи, каждую в журнал своей коллекции/шарда"""
+        by_journal: Dict[Journal, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_journal.setdefault(self._journal_for(record['c'], record['key']), []).append(record)
+        for journal, journal_records in by_journal.items():
+            journal.append(journal_records)
+
+    def _save_catalog(self, dirty: Set[str]) -> None:
+        """переписать изменённые части каталога, если другой процесс не успел раньше"""
+        if not dirty:
+            return
+
+        with self._catalog_lock:
+            for collection in dirty:
+                if self._catalog_file_changed(collection):
+                    # файл переписал другой процесс: его версия остаётся, poll_changes() её загрузит
+                    self.conflicts.append((collection, "*"))
+                    continue
+                getattr(self, f"save_{collection}")()
+                self._catalog_stamps[collection] = self._catalog_stamp(collection)
+
+    @contextmanager
+    def _mutation(self) -> Iterator[None]:
+        """изменение данных под _save_lock; flush() - уже после неё
+
+        flush() берёт _flush_lock, а её нельзя ждать, держа _save_lock.
+        """
+        with self._save_lock:
+            self._transaction_depth += 1
+            try:
+                yield
+            finally:
+                self._transaction_depth -= 1
+                done = self._transaction_depth == 0
+        if done and (self._pending or self._dirty):
+            self._schedule_flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator['Database']:
+        """все изменения внутри блока записываются на диск одним flush()"""
+        with self._save_lock:
+            self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            with self._save_lock:
+                self._transaction_depth -= 1
+                done = self._transaction_depth == 0
+            if done:
+                self.flush()
+
+    @staticmethod
+    def _journal_is_full(journal: Journal) -> bool:
+        return journal.records >= COMPACT_RECORDS or journal.size >= COMPACT_BYTES
+
+    def compact(self) -> None:
+        """записать снимки users/playlists/libraries и очистить журнал"""
+        self._compact_journal(self.journal)
+
+    def _compact_journal(self, journal: Journal) -> None:
+        """снимки коллекций журнала и пустой журнал
+
+        Под _save_lock снимки только собираются; пишутся они под одной
+        блокировкой журнала - дописать в него до очистки никто не успеет.
+        """
+        with ExitStack() as stack:
+            with self._save_lock:
+                stack.enter_context(journal.lock)
+                self._sync_journal(journal)
+                if not journal.records and not journal.size:
+                    return
+                snapshots = {collection: self._snapshot_data(collection) for collection in self.JOURNAL_SNAPSHOTS}
+
+            for collection, data in snapshots.items():
+                self._write_json(collection, data)
+            journal.truncate()
+
+    # --- изменения других процессов ---
+
+    def poll_changes(self) -> Set[str]:
+        """подхватить изменения, сделанные другими процессами с той же папкой data
+
+        Return: коллекции, изменившиеся с прошлого вызова (users, playlists, songs, ...)
+        """
+        with self._save_lock:
+            for journal in self._watched_journals():
+                with journal.lock:
+                    self._sync_journal(journal)
+            self._poll_catalog()
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def take_conflicts(self) -> List[Tuple[str, str]]:
+        """(коллекция, ключ) своих изменений, столкнувшихся с изменениями других процессов"""
+        with self._save_lock:
+            conflicts, self.conflicts = self.conflicts, []
+        return conflicts
+
+    def _sync_journal(self, journal: Journal) -> None:
+        """дочитать записи других процессов (под journal.lock)"""
+        records = journal.read_new()
+        if records is None:
+            # отстали больше чем на одно сжатие: что изменили другие, неизвестно -
+            # свои замены остаются, но сообщаются как возможные конфликты
+            self.conflicts.extend(self._pending_replacements(journal))
+            self._reload_journal(journal)
+        elif records:
+            self._merge_foreign(journal, records)
+
+    def _pending_replacements(self, journal: Journal) -> List[Tuple[str, str]]:
+        return [(r['c'], r['key']) for r in self._pending
+                if r['op'] in ('put', 'delete') and self._journal_for(r['c'], r['key']) is journal]
+
+    def _merge_foreign(self, journal: Journal, records: List[Dict[str, Any]]) -> None:
+        """применить записи других процессов к данным в памяти
+
+        Оптимистичная блокировка: свои put/delete сделаны без учёта этих
+        записей. Если другой процесс успел изменить ту же запись, побеждает
+        он - своя замена отбрасывается и попадает в conflicts. Поэлементные
+        add/remove сливаются: свои применяются после чужих.
+        """
+        touched = {(r['c'], r['key']) for r in records}
+        self._changed.update(collection for collection, _ in touched)
+
+        lost = touched & set(self._pending_replacements(journal))
+        if lost:
+            self._pending = [r for r in self._pending
+                             if (r['c'], r['key']) not in lost or r['op'] not in ('put', 'delete')]
+            self.conflicts.extend(sorted(lost))
+            # в памяти - своя замена; их версию проще перечитать целиком
+            self._reload_journal(journal)
+            return
+
+        # свои добавления убираются и возвращаются после чужих - порядок как в журнале
+        mine = [r for r in self._pending if (r['c'], r['key']) in touched]
+        for record in reversed(mine):
+            if record['op'] == 'add':
+                self._apply_record({**record, 'op': 'remove'})
+        for record in records:
+            self._apply_record(record)
+        for record in mine:
+            self._apply_record(record)
+
+    def _reload_journal(self, journal: Journal) -> None:
+        """перечитать снимки и журнал (под journal.lock), сверху - свои незаписанные изменения
+
+        Коллекции собираются в новых словарях и подменяются целиком: другие
+        потоки не видят их пустыми или наполовину прочитанными.
+        """
+        fresh = {collection: self._read_snapshot(collection) or {} for collection in self.JOURNAL_SNAPSHOTS}
+        for record in journal.replay():
+            self._apply_record(record, fresh)
+        self._reapply_pending(journal, fresh)
+
+        with self._save_lock:
+            for collection, items in fresh.items():
+                old_items = getattr(self, collection)
+                if items != old_items:
+                    self._changed.add(collection)
+                for key, item in list(items.items()):
+                    if key in old_items:
+                        self._replace_item(old_items, key, item)
+                        items[key] = old_items[key]
+                setattr(self, collection, items)
+
+    def _reapply_pending(self, journal: Journal, collections: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        for record in self._pending:
+            if self._journal_for(record['c'], record['key']) is journal:
+                self._apply_record(record, collections)
+
+    def _catalog_stamp(self, collection: str) -> Optional[Tuple[int, int]]:
+        path = self.data_dir / "genres.xml" if collection == 'genres' else self._catalog_path(collection)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _stamp_catalog(self) -> None:
+        for collection in CATALOG_FILES:
+            self._catalog_stamps[collection] = self._catalog_stamp(collection)
+
+    def _catalog_file_changed(self, collection: str) -> bool:
+        if collection not in self._catalog_stamps:
+            return False
+        return self._catalog_stamp(collection) != self._catalog_stamps[collection]
+
+    def _poll_catalog(self) -> None:
+        """перечитать части каталога, файлы которых переписал другой процесс"""
+        if not self._catalog_stamps:
+            return
+
+        with self._catalog_lock:
+            changed = [collection for collection in CATALOG_FILES if self._catalog_file_changed(collection)]
+            if not changed:
+                return
+
+            for collection in changed:
+                if collection in self._dirty:
+                    # свои несохранённые правки проигрывают уже записанным
+                    self._dirty.discard(collection)
+                    self.conflicts.append((collection, "*"))
+                getattr(self, f"load_{collection}")()
+                self._catalog_stamps[collection] = self._catalog_stamp(collection)
+
+            self.extract_artists()
+            self.build_indexes()
+            self.build_search_index()
+            self._changed.update(changed)
+
+    def close(self) -> None:
+        """записать всё на диск перед выходом"""
+        self.flush()
+        self.compact()
 
     def get_user(self, email: str) -> Optional[User]:
         """получить пользователя по почте))"""
@@ -226,6 +842,27 @@ class Database:
     def get_song(self, song_id: str) -> Optional[Song]:
         return self.songs.get(song_id)
 
+    def get_songs(self, song_ids: List[str]) -> List[Song]:
+        """получить несколько песен, несуществующие пропускаются"""
+        return [self.songs[song_id] for song_id in song_ids if song_id in self.songs]
+
+    def get_songs_by_artist(self, artist: str) -> List[Song]:
+        return self.get_songs(self.songs_by_artist.get(artist, []))
+
+    def get_songs_by_album(self, album_id: str) -> List[Song]:
+        return self.get_songs(self.songs_by_album.get(album_id, []))
+
+    def get_songs_by_genre(self, genre_id: str) -> List[Song]:
+        return self.get_songs(self.songs_by_genre.get(genre_id, []))
+
+    def find_album(self, artist: str, title: str) -> Optional[Album]:
+        album_id = self.album_by_key.get((artist, title))
+        return self.get_album(album_id) if album_id else None
+
+    def find_genre_by_name(self, name: str) -> Optional[Genre]:
+        genre_id = self.genre_by_name.get(name)
+        return self.get_genre(genre_id) if genre_id else None
+
     def get_album(self, album_id: str) -> Optional[Album]:
         return self.albums.get(album_id)
 
@@ -239,30 +876,116 @@ class Database:
         return self.libraries.get(library_id)
 
     def add_user(self, user: User) -> None:
-        self.users[user.email] = user
-        self.save_users()
+        with self._mutation():
+            self.users[user.email] = user
+            self._log('users', 'put', user.email, value=self._user_to_dict(user))
 
     def delete_user(self, email: str) -> None:
-        if email in self.users:
-            del self.users[email]
-            self.save_users()
+        with self._mutation():
+            if email in self.users:
+                del self.users[email]
+                self._log('users', 'delete', email)
+
+    def add_song(self, song: Song) -> None:
+        """добавить или обновить песню в каталоге"""
+        with self._mutation():
+            old = self.songs.get(song.id)
+            if old is not None:
+                self._unindex_song_fields(old)
+
+            self.songs[song.id] = song
+            if song.artist not in self.artists:
+                self.artists[song.artist] = Artist(name=song.artist)
+            self._index_song_fields(song)
+            self._index_song(song)
+            self._mark_dirty('songs')
+
+    def delete_song(self, song_id: str) -> None:
+        with self._mutation():
+            song = self.songs.pop(song_id, None)
+            if song is not None:
+                self._unindex_song_fields(song)
+                self.search_index.remove(song_id)
+                self._mark_dirty('songs')
+
+    def add_album(self, album: Album) -> None:
+        """добавить или обновить альбом в каталоге"""
+        with self._mutation():
+            old = self.albums.get(album.id)
+            if old is not None:
+                self.album_by_key.pop((old.artist, old.title), None)
+
+            self.albums[album.id] = album
+            self.album_by_key[(album.artist, album.title)] = album.id
+            if album.artist not in self.artists:
+                self.artists[album.artist] = Artist(name=album.artist)
+            # песни ищутся и по названию альбома; индексы по id переименование не меняет
+            if old is not None and old.title != album.title:
+                self._reindex_songs(self.songs_by_album.get(album.id, []))
+            self._mark_dirty('albums')
+
+    def add_genre(self, genre: Genre) -> None:
+        """добавить или обновить жанр"""
+        with self._mutation():
+            old = self.genres.get(genre.id)
+            if old is not None:
+                self.genre_by_name.pop(old.name, None)
+
+            self.genres[genre.id] = genre
+            self.genre_by_name[genre.name] = genre.id
+            if old is not None and old.name != genre.name:
+                self._reindex_songs(self.songs_by_genre.get(genre.id, []))
+            self._mark_dirty('genres')
 
     def add_playlist(self, playlist: Playlist) -> None:
-        self.playlists[playlist.id] = playlist
-        self.save_playlists()
+        with self._mutation():
+            self.playlists[playlist.id] = playlist
+            self._log('playlists', 'put', playlist.id, value=self._playlist_to_dict(playlist))
 
     def update_playlist(self, playlist: Playlist) -> None:
-        self.playlists[playlist.id] = playlist
-        self.save_playlists()
+        self.add_playlist(playlist)
 
     def delete_playlist(self, playlist_id: str) -> None:
-        if playlist_id in self.playlists:
-            del self.playlists[playlist_id]
-            self.save_playlists()
+        with self._mutation():
+            if playlist_id in self.playlists:
+                del self.playlists[playlist_id]
+                self._log('playlists', 'delete', playlist_id)
+
+    def add_playlist_song(self, playlist: Playlist, song_id: str) -> None:
+        """добавить песню в плейлист (записывается только изменение)"""
+        with self._mutation():
+            if song_id not in playlist.songs:
+                playlist.songs.append(song_id)
+                self._log('playlists', 'add', playlist.id, field='songs', item=song_id)
+
+    def remove_playlist_song(self, playlist: Playlist, song_id: str) -> None:
+        with self._mutation():
+            if song_id in playlist.songs:
+                playlist.songs.remove(song_id)
+                self._log('playlists', 'remove', playlist.id, field='songs', item=song_id)
+
+    def add_library(self, library: Library) -> None:
+        with self._mutation():
+            self.libraries[library.id] = library
+            self._log('libraries', 'put', library.id, value=self._library_to_dict(library))
 
     def update_library(self, library: Library) -> None:
-        self.libraries[library.id] = library
-        self.save_libraries()
+        self.add_library(library)
+
+    def add_library_item(self, library: Library, field: str, item_id: str) -> None:
+        """добавить песню/альбом/плейлист в библиотеку (записывается только изменение)"""
+        with self._mutation():
+            items = getattr(library, field)
+            if item_id not in items:
+                items.append(item_id)
+                self._log('libraries', 'add', library.id, field=field, item=item_id)
+
+    def remove_library_item(self, library: Library, field: str, item_id: str) -> None:
+        with self._mutation():
+            items = getattr(library, field)
+            if item_id in items:
+                items.remove(item_id)
+                self._log('libraries', 'remove', library.id, field=field, item=item_id)
 
     def get_all_songs(self) -> List[Song]:
         return list(self.songs.values())
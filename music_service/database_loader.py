@@ -0,0 +1,89 @@
+import threading
+from typing import Set
+
+from PySide6.QtCore import QObject, QThread, Signal
+
+from music_service.database import Database
+
+
+class _LoadThread(QThread):
+    """загрузка в рабочем потоке; сигналы уходят в GUI-поток очередью"""
+
+    accounts_loaded = Signal()
+    collection_loaded = Signal(str, int)  # collection, percent
+    failed = Signal(str)
+
+    def __init__(self, database: Database, parent: QObject = None):
+        super().__init__(parent)
+        self.database = database
+        self.accounts_event = threading.Event()
+
+    def run(self) -> None:
+        try:
+            self.database.load_accounts()
+        except Exception as e:
+            self.accounts_event.set()
+            self.failed.emit(f"ошибка загрузки пользователей: {e}")
+            return
+
+        self.accounts_event.set()
+        self.accounts_loaded.emit()
+
+        try:
+            self.database.load_catalog(progress=self.collection_loaded.emit)
+        except Exception as e:
+            self.failed.emit(f"ошибка загрузки каталога: {e}")
+
+
+class DatabaseLoader(QObject):
+    """фоновая загрузка Database: сначала аккаунты (для входа), потом каталог"""
+
+    # Signals
+    accounts_ready = Signal()
+    progress = Signal(str, int)  # collection, percent
+    collection_ready = Signal(str)  # genres, albums, songs, artists, indexes, search
+    catalog_ready = Signal()
+    failed = Signal(str)  # message
+
+    def __init__(self, database: Database, parent: QObject = None):
+        super().__init__(parent)
+        self.database = database
+
+        self.accounts_loaded = False
+        self.catalog_loaded = False
+        self.ready_collections: Set[str] = set()
+        self._started = False
+
+        self._thread = _LoadThread(database, self)
+        self._thread.accounts_loaded.connect(self._on_accounts_loaded)
+        self._thread.collection_loaded.connect(self._on_collection_loaded)
+        self._thread.failed.connect(self.failed)
+
+    def start(self) -> None:
+        self._started = True
+        self._thread.start()
+
+    def wait_for_accounts(self) -> None:
+        """дождаться пользователей и библиотек (вход раньше, чем они загрузились)"""
+        if self._started:
+            self._thread.accounts_event.wait()
+
+    def wait(self) -> None:
+        """дождаться конца загрузки (при выходе)"""
+        self._thread.wait()
+
+    def is_ready(self, collection: str) -> bool:
+        return collection in self.ready_collections
+
+    def _on_accounts_loaded(self) -> None:
+        self.accounts_loaded = True
+        self.accounts_ready.emit()
+
+    def _on_collection_loaded(self, collection: str, percent: int) -> None:
+        self.ready_collections.add(collection)
+        self.collection_ready.emit(collection)
+        self.progress.emit(collection, percent)
+
+        if percent >= 100:
+            self.catalog_loaded = True
+            self.catalog_ready.emit()
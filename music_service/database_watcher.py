@@ -0,0 +1,49 @@
+from typing import List
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from music_service.database import Database
+
+# как часто проверять изменения других процессов
+POLL_MS = 1000
+
+
+class DatabaseWatcher(QObject):
+    """изменения, сделанные другими экземплярами приложения с той же папкой data
+
+    Раз в interval_ms вызывает Database.poll_changes(): это несколько stat
+    и чтение только дописанного в журналы, так что выполняется в GUI-потоке.
+    """
+
+    # Signals
+    changed = Signal(list)  # коллекции: users, playlists, libraries, songs, ...
+    conflict = Signal(str, str)  # collection, key: своё изменение не записано или могло затереть чужое
+
+    def __init__(self, database: Database, interval_ms: int = POLL_MS, parent: QObject = None):
+        super().__init__(parent)
+        self.database = database
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.poll)
+
+    def start(self) -> None:
+        self._timer.start()
+
+    def stop(self) -> None:
+        self._timer.stop()
+
+    def poll(self) -> List[str]:
+        """проверить сейчас (например, перед входом); Return: изменившиеся коллекции"""
+        try:
+            changed = sorted(self.database.poll_changes())
+        except Exception as e:
+            # следующая проверка повторит попытку
+            self.database.last_save_error = e
+            return []
+
+        for collection, key in self.database.take_conflicts():
+            self.conflict.emit(collection, key)
+        if changed:
+            self.changed.emit(changed)
+        return changed
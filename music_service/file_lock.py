@@ -0,0 +1,83 @@
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """межпроцессная рекомендательная блокировка файла
+
+    Повторный захват тем же потоком не блокирует (как RLock), другие
+    потоки этого процесса ждут, как и другие процессы. Пока блокировка
+    взята, в файле можно хранить маленькое значение (read/write).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._depth = 0
+        self._thread_lock = threading.RLock()
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        try:
+            self._lock_file()
+        except OSError:
+            self._thread_lock.release()
+            raise
+
+    def _lock_file(self) -> None:
+        if self._depth == 0:
+            f = open(self.path, 'a+b')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                else:
+                    # блокируется байт далеко за концом файла - содержимое остаётся читаемым
+                    f.seek(1 << 30)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            except OSError:
+                f.close()
+                raise
+            self._file = f
+        self._depth += 1
+
+    def release(self) -> None:
+        try:
+            self._depth -= 1
+            if self._depth == 0:
+                f, self._file = self._file, None
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                    else:
+                        f.seek(1 << 30)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                finally:
+                    f.close()
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def read(self) -> str:
+        """значение, записанное в файл блокировки (блокировка должна быть взята)"""
+        self._file.seek(0)
+        return self._file.read(4096).decode('utf-8')
+
+    def write(self, value: str) -> None:
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(value.encode('utf-8'))
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -0,0 +1,159 @@
+import json
+import os
+import secrets
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from music_service.file_lock import FileLock
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """записать JSON во временный файл и атомарно заменить им старый
+
+    При падении посреди записи на диске остается либо старый файл, либо новый.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Journal:
+    """журнал изменений: одна JSON-запись на строку, только дописывание
+
+    Записи должны быть идемпотентными: после сжатия журнал может быть
+    повторно применен к уже обновленным снимкам.
+
+    Журнал может вести несколько процессов: запись, чтение и сжатие -
+    под lock (<журнал>.lock). В файле блокировки - поколение журнала,
+    оно меняется при каждом сжатии; так read_new() отличает дописанный
+    другим процессом журнал от сжатого. Перед append() журнал должен
+    быть дочитан read_new(), иначе size не совпадёт с файлом.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.records = 0  # записей с момента последнего сжатия
+        self.size = self.path.stat().st_size if self.path.exists() else 0
+        self.lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        self.generation = ""
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        """дописать записи одним вызовом write"""
+        if not records:
+            return
+
+        data = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+            for record in records
+        ).encode('utf-8')
+
+        try:
+            with open(self.path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except IOError as e:
+            raise IOError(f"ошибка записи журнала: {e}")
+
+        self.records += len(records)
+        self.size += len(data)
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """прочитать записи; оборванный при падении хвост отрезается (под lock)"""
+        self.generation = self._generations()[0]
+        self.records = 0
+        self.size = 0
+        if not self.path.exists():
+            return
+
+        valid_end = 0
+        for record, end in self._read_from(self.path, 0):
+            valid_end = end
+            self.records += 1
+            yield record
+
+        # иначе следующие записи допишутся после мусора
+        if valid_end != self.path.stat().st_size:
+            os.truncate(self.path, valid_end)
+        self.size = valid_end
+
+    def read_new(self) -> Optional[List[Dict[str, Any]]]:
+        """записи, дописанные другими процессами после прочитанных (под lock)
+
+        Если журнал с тех пор один раз сжали, хвост дочитывается из
+        <журнал>.prev. Return: None, если сжатий было больше - тогда нужно
+        перечитать снимки и replay().
+        """
+        current, previous = self._generations()
+        records = []
+        if current != self.generation:
+            if previous != self.generation or self._file_size(self.prev_path) < self.size:
+                return None
+            records.extend(record for record, _ in self._read_from(self.prev_path, self.size))
+            self.generation = current
+            self.records = 0
+            self.size = 0
+
+        if self._file_size(self.path) < self.size:
+            return None
+
+        for record, end in self._read_from(self.path, self.size):
+            records.append(record)
+            self.records += 1
+            self.size = end
+        return records
+
+    @property
+    def prev_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".prev")
+
+    def _generations(self):
+        """(текущее поколение, предыдущее) из файла блокировки"""
+        parts = self.lock.read().split()
+        return (parts[0] if parts else ""), (parts[1] if len(parts) > 1 else "")
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _read_from(path: Path, offset: int) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """(запись, смещение конца её строки) до первой неполной строки"""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                offset += len(line)
+                yield record, offset
+
+    def truncate(self) -> None:
+        """начать пустой журнал после записи снимков (под lock)
+
+        Старый журнал остаётся в .prev до следующего сжатия: по нему
+        другой процесс дочитывает то, что не успел прочитать.
+        """
+        current = self._generations()[0]
+        if self.path.exists():
+            os.replace(self.path, self.prev_path)
+        with open(self.path, 'wb') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.generation = secrets.token_hex(8)
+        self.lock.write(f"{self.generation} {current}")
+        self.records = 0
+        self.size = 0
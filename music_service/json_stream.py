@@ -0,0 +1,136 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Tuple
+
+# сколько символов читать за раз
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+
+
+class _Reader:
+    """буфер поверх файла: дочитывает по кусочку, прочитанное отбрасывает"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self) -> str:
+        """Return: следующий значимый символ (без сдвига) или '' в конце файла"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.skip_whitespace()
+        if not char or char not in chars:
+            self.error(f"ожидалось {' или '.join(repr(c) for c in chars)}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """разобрать одно значение, при необходимости дочитывая файл"""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.read_more():
+                    continue
+                raise
+            # число на границе куска могло быть обрезано - дочитываем и разбираем заново
+            if (end == len(self.buffer) or self.buffer[end] in _NUMBER_CHARS) and self.read_more():
+                continue
+            self.pos = end
+            return value
+
+    def error(self, message: str) -> None:
+        raise json.JSONDecodeError(message, self.buffer, self.pos)
+
+
+def iter_json_object(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """по одной паре (ключ, значение) из JSON-объекта верхнего уровня
+
+    Весь файл в память не читается: в каждый момент разобрана только
+    одна запись.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _Reader(f, chunk_size)
+        reader.expect("{")
+        if reader.skip_whitespace() == "}":
+            reader.pos += 1
+        else:
+            while True:
+                key = reader.value()
+                if not isinstance(key, str):
+                    reader.error("ключ должен быть строкой")
+                reader.expect(":")
+                yield key, reader.value()
+                if reader.expect(",}") == "}":
+                    break
+
+        if reader.skip_whitespace():
+            reader.error("лишние данные после объекта")
+
+
+def iter_ndjson(path: Path) -> Iterator[Any]:
+    """по одной записи из файла с JSON-объектом на строку"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(f"строка {line_number}: {e.msg}", e.doc, e.pos)
+
+
+def write_json_object(path: Path, items: Iterable[Tuple[str, Any]]) -> None:
+    """записать JSON-объект по одной паре, атомарно как write_json_atomic"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("{")
+        separator = "\n"
+        for key, value in items:
+            f.write(separator)
+            f.write(f"  {json.dumps(key, ensure_ascii=False)}: ")
+            f.write(json.dumps(value, ensure_ascii=False))
+            separator = ",\n"
+        f.write("\n}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_ndjson(path: Path, records: Iterable[Any]) -> None:
+    """записать по JSON-объекту на строку, атомарно"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -1,66 +1,143 @@
-from typing import List
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
 
 from models import Library, Song, Album
 from music_service.database import Database
 
 
+class _SortedCounter:
+    """счетчик ссылок + отсортированный список ключей с ненулевым счетчиком
+
+    Значение сортировки запоминается при добавлении ключа: если альбом
+    потом переименуют, список остаётся отсортированным по старому
+    значению (до invalidate()), но поиск в нём не ломается.
+    """
+
+    def __init__(self, sort_key: Callable = None):
+        self.counts: Counter = Counter()
+        self.keys: List[str] = []
+        self.sort_key = sort_key
+        self._sort_values: List[Any] = []  # параллельно keys
+        self._sort_value_of: Dict[str, Any] = {}
+
+    def add(self, key: str) -> None:
+        self.counts[key] += 1
+        if self.counts[key] == 1:
+            sort_value = self.sort_key(key) if self.sort_key else key
+            i = bisect_right(self._sort_values, sort_value)
+            self._sort_values.insert(i, sort_value)
+            self.keys.insert(i, key)
+            self._sort_value_of[key] = sort_value
+
+    def remove(self, key: str) -> None:
+        if self.counts[key] <= 0:
+            return
+        self.counts[key] -= 1
+        if self.counts[key] == 0:
+            del self.counts[key]
+            i = bisect_left(self._sort_values, self._sort_value_of.pop(key))
+            # равные значения сортировки - ищем нужный ключ рядом
+            while self.keys[i] != key:
+                i += 1
+            del self.keys[i]
+            del self._sort_values[i]
+
+
+class LibraryAggregate:
+    """исполнители, альбомы и жанры библиотеки с подсчетом песен"""
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.artists = _SortedCounter()
+        self.albums = _SortedCounter(self._album_sort_key)
+        self.genres = _SortedCounter()
+        # что посчитано для песни: её исполнителя/альбом/жанр могут поменять в каталоге
+        self._counted: Dict[str, Tuple[str, str, str]] = {}
+
+    def _album_sort_key(self, album_id: str):
+        album = self.database.get_album(album_id)
+        return (album.artist, album.title, album_id) if album else ("", "", album_id)
+
+    def add(self, song: Song) -> None:
+        if song.id in self._counted:
+            return
+        album = song.album if self.database.get_album(song.album) else ""
+        self._counted[song.id] = (song.artist, album, song.genre)
+        self.artists.add(song.artist)
+        if album:
+            self.albums.add(album)
+        self.genres.add(song.genre)
+
+    def remove(self, song: Song) -> None:
+        counted = self._counted.pop(song.id, None)
+        if counted is None:
+            return
+        artist, album, genre = counted
+        self.artists.remove(artist)
+        if album:
+            self.albums.remove(album)
+        self.genres.remove(genre)
+
+
 class LibraryService:
     """здравствуйте, дайте мне красивую книгу"""
 
     def __init__(self, database: Database):
         self.database = database
+        # строятся при первом обращении, дальше обновляются по одной песне
+        self._aggregates: Dict[str, LibraryAggregate] = {}
+
+    def _aggregate(self, library: Library) -> LibraryAggregate:
+        aggregate = self._aggregates.get(library.id)
+        if aggregate is None:
+            aggregate = LibraryAggregate(self.database)
+            for song in self.get_library_songs(library):
+                aggregate.add(song)
+            self._aggregates[library.id] = aggregate
+        return aggregate
+
+    def invalidate(self) -> None:
+        """каталог перезагружен - сводки строятся заново"""
+        self._aggregates.clear()
 
     def add_song_to_library(self, library: Library, song_id: str) -> None:
-        if song_id not in library.songs:
-            library.songs.append(song_id)
-            self.database.update_library(library)
+        if song_id in library.songs:
+            return
+        self.database.add_library_item(library, 'songs', song_id)
+
+        aggregate = self._aggregates.get(library.id)
+        song = self.database.get_song(song_id)
+        if aggregate and song:
+            aggregate.add(song)
 
     def remove_song_from_library(self, library: Library, song_id: str) -> None:
-        if song_id in library.songs:
-            library.songs.remove(song_id)
-            self.database.update_library(library)
+        if song_id not in library.songs:
+            return
+        self.database.remove_library_item(library, 'songs', song_id)
+
+        aggregate = self._aggregates.get(library.id)
+        song = self.database.get_song(song_id)
+        if aggregate and song:
+            aggregate.remove(song)
 
     def is_song_in_library(self, library: Library, song_id: str) -> bool:
         return song_id in library.songs
 
     def get_library_songs(self, library: Library) -> List[Song]:
-        songs = []
-        for song_id in library.songs:
-            song = self.database.get_song(song_id)
-            if song:
-                songs.append(song)
-        return songs
+        return self.database.get_songs(library.songs)
 
     def get_library_albums(self, library: Library) -> List[Album]:
+        # отсортированы по исполнителю и названию
         albums = []
-        album_ids = set()
-
-        for song_id in library.songs:
-            song = self.database.get_song(song_id)
-            if song and song.album not in album_ids:
-                album = self.database.get_album(song.album)
-                if album:
-                    albums.append(album)
-                    album_ids.add(song.album)
-
+        for album_id in self._aggregate(library).albums.keys:
+            album = self.database.get_album(album_id)
+            if album:
+                albums.append(album)
         return albums
 
     def get_library_artists(self, library: Library) -> List[str]:
-        artists = set()
-
-        for song_id in library.songs:
-            song = self.database.get_song(song_id)
-            if song:
-                artists.add(song.artist)
-
-        return sorted(list(artists))
+        return list(self._aggregate(library).artists.keys)
 
     def get_library_genres(self, library: Library) -> List[str]:
-        genres = set()
-
-        for song_id in library.songs:
-            song = self.database.get_song(song_id)
-            if song:
-                genres.add(song.genre)
-
-        return sorted(list(genres))
+        return list(self._aggregate(library).genres.keys)
@@ -0,0 +1,49 @@
+"""Раскладка libraries.json/playlists.json по шардам (ShardedDatabase).
+
+python -m music_service.migrate_to_shards --data-dir data
+"""
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+from music_service.database import Database
+from music_service.sharded_database import SHARDS_DIR, ShardedDatabase
+
+
+def migrate(data_dir: str = "data") -> ShardedDatabase:
+    """загрузить пользователей, библиотеки и плейлисты и записать шарды"""
+    source = Database(data_dir, load=False)
+    source.load_accounts()
+    # журнал сворачивается в users.json - дальше он общий только для пользователей
+    source.close()
+
+    target = ShardedDatabase(data_dir, load=False)
+    target.import_database(source)
+    return target
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Перенос библиотек и плейлистов music_service в шарды")
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args()
+
+    shards_dir = Path(args.data_dir) / SHARDS_DIR
+    if shards_dir.exists():
+        print(f"{shards_dir} уже существует", file=sys.stderr)
+        return 1
+
+    try:
+        target = migrate(args.data_dir)
+    except Exception as e:
+        print(f"ошибка переноса: {e}", file=sys.stderr)
+        shutil.rmtree(shards_dir, ignore_errors=True)
+        return 1
+
+    print(f"перенесено: {len(target.libraries)} библиотек, {len(target.playlists)} плейлистов -> {shards_dir}")
+    target.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
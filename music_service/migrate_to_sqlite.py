@@ -0,0 +1,46 @@
+"""Перенос данных из JSON/XML файлов в SQLite.
+
+python -m music_service.migrate_to_sqlite --data-dir data
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from music_service.database import Database
+from music_service.sqlite_database import SqliteDatabase
+
+
+def migrate(data_dir: str = "data", db_name: str = SqliteDatabase.DB_NAME) -> SqliteDatabase:
+    """загрузить JSON/XML и записать всё в SQLite одной транзакцией"""
+    source = Database(data_dir)
+    target = SqliteDatabase(data_dir, db_name)
+    target.import_database(source)
+    return target
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Перенос данных music_service в SQLite")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--db-name", default=SqliteDatabase.DB_NAME)
+    args = parser.parse_args()
+
+    db_path = Path(args.data_dir) / args.db_name
+    if db_path.exists():
+        print(f"{db_path} уже существует", file=sys.stderr)
+        return 1
+
+    try:
+        target = migrate(args.data_dir, args.db_name)
+    except Exception as e:
+        print(f"ошибка переноса: {e}", file=sys.stderr)
+        if db_path.exists():
+            db_path.unlink()
+        return 1
+
+    print(f"перенесено: {len(target.get_all_songs())} песен -> {db_path}")
+    target.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,21 @@
 import sys
-from typing import Optional
+from typing import List, Optional
 
 from PySide6.QtWidgets import QApplication
 
 from models import User, Library
 from music_service.database import Database
+from music_service.database_loader import DatabaseLoader
+from music_service.database_watcher import DatabaseWatcher
+from music_service.storage import open_database
 from music_service.auth_service import AuthService
 from music_service.player_service import PlayerService
 from music_service.queue_service import QueueService
 from music_service.library_service import LibraryService
 from music_service.playlist_service import PlaylistService
 from music_service.search_service import SearchService
+from music_service.cover_cache import CoverCache
+from music_service.session_service import SessionService
 
 from ui.ui_login_window import LoginWindow
 from ui.ui_registration_window import RegistrationWindow
@@ -21,23 +26,43 @@ from ui.ui_error_window import ErrorWindow
 class MusicService:
     """мьюзик сервис запускатор 3000"""
 
-    def __init__(self):
+    def __init__(self, stream_url: Optional[str] = None):
+        """stream_url - адрес music_service.stream_server, если песни не лежат в data/songs"""
         self.app = QApplication(sys.argv)
 
-        # database
+        # database: файлы читаются в фоне, окно входа показывается сразу
         try:
-            self.database = Database()
+            self.database = self._open_database()
         except Exception as e:
             self._show_error(f"ошибка инициализации database: {e}")
             sys.exit(1)
 
+        self.database_loader = DatabaseLoader(self.database)
+        self.database_loader.failed.connect(self._on_load_failed)
+
+        # другие экземпляры приложения с той же папкой data
+        self.database_watcher = DatabaseWatcher(self.database)
+        self.database_watcher.changed.connect(self._on_database_changed)
+        self.database_watcher.conflict.connect(self._on_database_conflict)
+        self.database_loader.catalog_ready.connect(self.database_watcher.start)
+
         # services
         self.auth_service = AuthService(self.database)
-        self.player_service = PlayerService()
         self.queue_service = QueueService()
+        self.player_service = PlayerService(queue=self.queue_service, stream_url=stream_url)
         self.library_service = LibraryService(self.database)
         self.playlist_service = PlaylistService(self.database)
         self.search_service = SearchService(self.database)
+        self.cover_cache = CoverCache(str(self.database.data_dir / "covers"))
+        self.session_service = SessionService(
+            self.database, self.queue_service, self.player_service,
+            str(self.database.data_dir / "sessions")
+        )
+
+        # сводки библиотек, построенные до загрузки каталога, неполные
+        self.database_loader.catalog_ready.connect(self.library_service.invalidate)
+        # очередь прошлой сессии ссылается на песни - восстанавливается после каталога
+        self.database_loader.catalog_ready.connect(self._start_session)
 
         # current user
         self.current_user: Optional[User] = None
@@ -48,10 +73,26 @@ class MusicService:
         self.registration_window: Optional[RegistrationWindow] = None
         self.main_window: Optional[MainWindow] = None
 
+    @staticmethod
+    def _open_database(data_dir: str = "data") -> Database:
+        """данные загружает DatabaseLoader"""
+        return open_database(data_dir, load=False)
+
     def run(self) -> int:
         """запуск приложения"""
         self._show_login_window()
-        return self.app.exec()
+        self.database_loader.start()
+        code = self.app.exec()
+        self.database_watcher.stop()
+        self.session_service.stop()
+        self.database_loader.wait()
+        self.cover_cache.wait()
+        self.database.close()
+        return code
+
+    def _on_load_failed(self, message: str) -> None:
+        self._show_error(message)
+        self.app.exit(1)
 
     def _show_login_window(self) -> None:
         """показать окно входа"""
@@ -74,6 +115,9 @@ class MusicService:
             self.main_window.show()
 
     def handle_login(self, email: str, password: str) -> None:
+        self.database_loader.wait_for_accounts()
+        # пользователь мог зарегистрироваться в другом окне
+        self.database_watcher.poll()
         success, user, error = self.auth_service.login(email, password)
 
         if success and user:
@@ -83,11 +127,14 @@ class MusicService:
             if self.login_window:
                 self.login_window.close()
 
+            self._start_session()
             self._show_main_window()
         else:
             self._show_error(error)
 
     def handle_registration(self, email: str, username: str, password: str, repeat_password: str) -> None:
+        self.database_loader.wait_for_accounts()
+        self.database_watcher.poll()
         success, user, error = self.auth_service.register(email, username, password, repeat_password)
 
         if success and user:
@@ -97,11 +144,37 @@ class MusicService:
             if self.registration_window:
                 self.registration_window.close()
 
+            self._start_session()
             self._show_main_window()
         else:
             self._show_error(error)
 
+    def _start_session(self) -> None:
+        """восстановить очередь и позицию пользователя"""
+        if self.current_library and self.database_loader.catalog_loaded and not self.session_service.active:
+            self.session_service.start(self.current_library.id)
+
+    def _on_database_changed(self, collections: List[str]) -> None:
+        """другой экземпляр изменил данные: объекты в памяти могли замениться"""
+        if 'libraries' in collections or 'songs' in collections:
+            self.library_service.invalidate()
+        if self.current_user is None:
+            return
+
+        self.current_library = self.database.get_library(self.current_user.library_id)
+        if self.main_window and self.current_library:
+            self.main_window.on_database_changed(self.current_library, collections)
+
+    def _on_database_conflict(self, collection: str, key: str) -> None:
+        if self.main_window:
+            self.main_window.show_conflict(collection, key)
+
     def handle_logout(self) -> None:
+        # сессия сохраняется, следующий пользователь начинает с пустой очереди
+        self.session_service.stop()
+        self.player_service.stop()
+        self.queue_service.clear()
+
         self.current_user = None
         self.current_library = None
 
@@ -112,6 +185,7 @@ class MusicService:
 
     def handle_delete_account(self) -> None:
         if self.current_user:
+            self.session_service.delete(self.current_user.library_id)
             self.auth_service.delete_account(self.current_user.email)
             self.handle_logout()
 
@@ -1,53 +1,161 @@
+import time
+from functools import partial
 from typing import Optional
 from pathlib import Path
+from urllib.parse import quote
 
-from PySide6.QtCore import QObject, Signal, QUrl, QTimer
+from PySide6.QtCore import QUrl, QTimer
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 
 from models import Song
+from music_service.queue_service import QueueService
+from music_service.signals import Signal
 
+# шаг изменения громкости при кроссфейде
+FADE_STEP_MS = 50
 
-class PlayerService(QObject):
-    """сервис управляющий воспроизведением музыки"""
+# не чаще скольких мс сообщать позицию
+POSITION_INTERVAL_MS = 100
+
+# в этих состояниях файл уже открыт и декодер готов
+READY_STATUSES = (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia)
+
+
+class PlayerService:
+    """сервис управляющий воспроизведением музыки
+
+    Следующая песня очереди заранее открывается во втором плеере, на
+    конце трека плееры меняются местами - без паузы на открытие файла.
+
+    Qt здесь только как движок воспроизведения (QMediaPlayer и таймер
+    кроссфейда); наружу - сигналы music_service.signals, как у QueueService.
+
+    С stream_url песни играются не из songs_dir, а по HTTP с сервера
+    music_service.stream_server: <stream_url>/songs/<id>, перемотка - Range.
+    """
 
     # Signals
     position_changed = Signal(int)  # milliseconds
     duration_changed = Signal(int)  # milliseconds
     state_changed = Signal(QMediaPlayer.PlaybackState)
-    track_finished = Signal()
+    track_finished = Signal()  # следующая песня не была готова - переход за вызывающим
+    track_changed = Signal(object)  # Song: переход на следующую сделан без паузы
 
-    def __init__(self, songs_dir: str = "data/songs"):
-        super().__init__()
+    def __init__(self, songs_dir: str = "data/songs", queue: Optional[QueueService] = None,
+                 crossfade_ms: int = 0, position_interval_ms: int = POSITION_INTERVAL_MS,
+                 stream_url: Optional[str] = None):
         self.songs_dir = Path(songs_dir)
+        self.stream_url = stream_url.rstrip("/") if stream_url else None
+        self.queue = queue
+        self.crossfade_ms = crossfade_ms
+        self._volume = 1.0
 
-        # Media player
-        self.player = QMediaPlayer()
-        self.audio_output = QAudioOutput()
-        self.player.setAudioOutput(self.audio_output)
+        # Position reporting: по событиям плеера, с ограничением частоты
+        self.position_interval_ms = position_interval_ms
+        self._position_updates = True
+        self._position_time: Optional[float] = None  # time.monotonic() последнего сигнала
 
-        # Current song
+        # Media players: играющий и запасной со следующей песней
+        self.player, self.audio_output = self._create_player()
+        self._next_player, self._next_output = self._create_player()
+
+        # Current song and the one preloaded into _next_player
         self.current_song: Optional[Song] = None
+        self._next_song: Optional[Song] = None
 
-        # Connect signals
-        self.player.positionChanged.connect(self._on_position_changed)
-        self.player.durationChanged.connect(self._on_duration_changed)
-        self.player.playbackStateChanged.connect(self._on_state_changed)
-        self.player.mediaStatusChanged.connect(self._on_media_status_changed)
+        # позиция, на которую перейти, когда файл откроется
+        self._pending_position = 0
+
+        # Crossfade: старый плеер доигрывает, затихая
+        self._fading_player: Optional[QMediaPlayer] = None
+        self._fading_output: Optional[QAudioOutput] = None
+        self._fade_elapsed = 0
+        self._fade_timer = QTimer()
+        self._fade_timer.setInterval(FADE_STEP_MS)
+        self._fade_timer.timeout.connect(self._on_fade_step)
+
+        if self.queue is not None:
+            self.queue.queue_changed.connect(self.preload_next)
+            self.queue.current_changed.connect(self.preload_next)
+
+    def _create_player(self):
+        player = QMediaPlayer()
+        audio_output = QAudioOutput()
+        audio_output.setVolume(self._volume)
+        player.setAudioOutput(audio_output)
+
+        # Connect signals; сигналы запасного плеера игнорируются
+        player.positionChanged.connect(partial(self._on_position_changed, player))
+        player.durationChanged.connect(partial(self._on_duration_changed, player))
+        player.playbackStateChanged.connect(partial(self._on_state_changed, player))
+        player.mediaStatusChanged.connect(partial(self._on_media_status_changed, player))
+        return player, audio_output
+
+    def _song_url(self, song: Song) -> QUrl:
+        if self.stream_url is not None:
+            # есть ли файл, знает сервер: ошибка придёт от плеера
+            return QUrl(f"{self.stream_url}/songs/{quote(song.id, safe='')}")
 
-    def load(self, song: Song) -> None:
-        self.current_song = song
         song_path = self.songs_dir / song.filename
 
-        if not song_path.exists():
+        if not song.filename or not song_path.exists():
             raise FileNotFoundError(f"Song file not found: {song_path}")
 
-        url = QUrl.fromLocalFile(str(song_path.absolute()))
+        return QUrl.fromLocalFile(str(song_path.absolute()))
+
+    def load(self, song: Song, position_ms: int = 0) -> None:
+        self._finish_fade()
+
+        # уже открыта в запасном плеере - просто поменять плееры
+        if self._is_preloaded(song):
+            self.player.stop()
+            self._swap_players()
+            self.current_song = song
+            self._pending_position = 0
+            if position_ms:
+                self.player.setPosition(position_ms)
+            self.duration_changed.emit(self.player.duration())
+            self._emit_position(self.player.position())
+            self.preload_next()
+            return
+
+        url = self._song_url(song)
+        self.current_song = song
+        self._pending_position = position_ms
         self.player.setSource(url)
+        self.preload_next()
+
+    def preload_next(self) -> None:
+        """открыть следующую песню очереди в запасном плеере"""
+        if self.queue is None or self._fading_player is not None:
+            return
+
+        # очередь уже перешла на открытую песню, а load() ещё не вызван - не трогать
+        if self._next_song is not None:
+            current = self.queue.current_song()
+            if (current is not None and current.id == self._next_song.id
+                    and (self.current_song is None or self.current_song.id != current.id)):
+                return
+
+        song = self.queue.peek_next()
+        if song is not None and self._next_song is not None and song.id == self._next_song.id:
+            return
+
+        url = QUrl()
+        if song is not None:
+            try:
+                url = self._song_url(song)
+            except FileNotFoundError:
+                song = None
+
+        self._next_song = song
+        self._next_player.setSource(url)
 
     def play(self) -> None:
         self.player.play()
 
     def pause(self) -> None:
+        self._finish_fade()
         self.player.pause()
 
     def toggle_play_pause(self) -> None:
@@ -57,15 +165,24 @@ class PlayerService(QObject):
             self.play()
 
     def stop(self) -> None:
+        self._finish_fade()
+        self._pending_position = 0
         self.player.stop()
 
     def seek(self, ms: int) -> None:
         """Seek to position in milliseconds"""
         self.player.setPosition(ms)
+        self._emit_position(ms)
+
+    def set_position_updates(self, enabled: bool) -> None:
+        """включить/выключить position_changed (например, пока окно скрыто)"""
+        self._position_updates = enabled
+        if enabled:
+            self._emit_position(self.player.position())
 
     def current_position_ms(self) -> int:
         """Get current position in milliseconds"""
-        return self.player.position()
+        return self._pending_position or self.player.position()
 
     def duration_ms(self) -> int:
         """Get duration in milliseconds"""
@@ -73,21 +190,123 @@ class PlayerService(QObject):
 
     def set_volume(self, volume: float) -> None:
         """Set volume (0.0 - 1.0)"""
+        self._volume = volume
+        self._finish_fade()
         self.audio_output.setVolume(volume)
+        self._next_output.setVolume(volume)
 
-    def _on_position_changed(self, position: int) -> None:
-        """Handle position changed"""
+    def _is_preloaded(self, song: Optional[Song]) -> bool:
+        return (
+            song is not None
+            and self._next_song is not None
+            and song.id == self._next_song.id
+            and self._next_player.mediaStatus() in READY_STATUSES
+        )
+
+    def _swap_players(self) -> None:
+        self.player, self._next_player = self._next_player, self.player
+        self.audio_output, self._next_output = self._next_output, self.audio_output
+        self._next_song = None
+
+    def _advance(self, fade: bool) -> bool:
+        """перейти на заранее открытую песню; False, если она не готова"""
+        song = self.queue.peek_next() if self.queue is not None else None
+        if not self._is_preloaded(song):
+            return False
+
+        if fade:
+            self._fading_player, self._fading_output = self.player, self.audio_output
+            self._fade_elapsed = 0
+            self._next_output.setVolume(0.0)
+            self._fade_timer.start()
+        else:
+            self.player.stop()
+
+        self._swap_players()
+        self.current_song = song
+        self.player.play()
+
+        # очередь сдвигается после обмена: запасной плеер уже свободен
+        self.queue.next()
+        # при повторе одной песни индекс не меняется и current_changed не придёт
+        self.preload_next()
+        self.duration_changed.emit(self.player.duration())
+        self._emit_position(self.player.position())
+        self.track_changed.emit(song)
+        return True
+
+    def _emit_position(self, position: int) -> None:
+        if not self._position_updates:
+            return
+        self._position_time = time.monotonic()
         self.position_changed.emit(position)
 
-    def _on_duration_changed(self, duration: int) -> None:
+    def _on_fade_step(self) -> None:
+        self._fade_elapsed += FADE_STEP_MS
+        share = min(1.0, self._fade_elapsed / self.crossfade_ms) if self.crossfade_ms > 0 else 1.0
+
+        self.audio_output.setVolume(self._volume * share)
+        self._fading_output.setVolume(self._volume * (1.0 - share))
+
+        if share >= 1.0:
+            self._finish_fade()
+
+    def _finish_fade(self) -> None:
+        if self._fading_player is None:
+            return
+
+        self._fade_timer.stop()
+        self._fading_player.stop()
+        self._fading_output.setVolume(self._volume)
+        self.audio_output.setVolume(self._volume)
+        self._fading_player = None
+        self._fading_output = None
+        self.preload_next()
+
+    def _on_position_changed(self, player: QMediaPlayer, position: int) -> None:
+        """Handle position changed"""
+        if player is not self.player:
+            return
+
+        if (self._position_time is None
+                or (time.monotonic() - self._position_time) * 1000 >= self.position_interval_ms):
+            self._emit_position(position)
+
+        # кроссфейд начинается за crossfade_ms до конца трека
+        duration = player.duration()
+        if (self.crossfade_ms > 0 and self._fading_player is None and duration > 0
+                and duration - position <= self.crossfade_ms
+                and player.playbackState() == QMediaPlayer.PlaybackState.PlayingState):
+            self._advance(fade=True)
+
+    def _on_duration_changed(self, player: QMediaPlayer, duration: int) -> None:
         """Handle duration changed"""
-        self.duration_changed.emit(duration)
+        if player is self.player:
+            self.duration_changed.emit(duration)
 
-    def _on_state_changed(self, state: QMediaPlayer.PlaybackState) -> None:
+    def _on_state_changed(self, player: QMediaPlayer, state: QMediaPlayer.PlaybackState) -> None:
         """Handle state changed"""
-        self.state_changed.emit(state)
+        if player is self.player:
+            # последняя позиция перед паузой/остановкой не должна потеряться
+            if state != QMediaPlayer.PlaybackState.PlayingState:
+                self._emit_position(player.position())
+            self.state_changed.emit(state)
 
-    def _on_media_status_changed(self, status: QMediaPlayer.MediaStatus) -> None:
+    def _on_media_status_changed(self, player: QMediaPlayer, status: QMediaPlayer.MediaStatus) -> None:
         """Handle media status changed"""
+        if player is self._fading_player and status == QMediaPlayer.MediaStatus.EndOfMedia:
+            self._finish_fade()
+            return
+
+        if player is not self.player:
+            return
+
+        # до открытия файла перемотка игнорируется
+        if status in READY_STATUSES and self._pending_position:
+            position, self._pending_position = self._pending_position, 0
+            player.setPosition(position)
+            self._emit_position(position)
+
         if status == QMediaPlayer.MediaStatus.EndOfMedia:
-            self.track_finished.emit()
+            if not self._advance(fade=False):
+                self.track_finished.emit()
@@ -27,31 +27,26 @@ class PlaylistService:
         return playlist
 
     def add_song_to_playlist(self, playlist: Playlist, song_id: str) -> None:
-        if song_id not in playlist.songs:
-            playlist.songs.append(song_id)
-            self.database.update_playlist(playlist)
+        self.database.add_playlist_song(playlist, song_id)
+
+    def add_songs_to_playlist(self, playlist: Playlist, song_ids: List[str]) -> None:
+        # одна запись на диск на весь импорт
+        with self.database.transaction():
+            for song_id in song_ids:
+                self.database.add_playlist_song(playlist, song_id)
 
     def remove_song_from_playlist(self, playlist: Playlist, song_id: str) -> None:
-        if song_id in playlist.songs:
-            playlist.songs.remove(song_id)
-            self.database.update_playlist(playlist)
+        self.database.remove_playlist_song(playlist, song_id)
 
     def delete_playlist(self, playlist_id: str, library: Library) -> None:
         # убрать из библиотеки
-        if playlist_id in library.playlists:
-            library.playlists.remove(playlist_id)
-            self.database.update_library(library)
+        self.database.remove_library_item(library, 'playlists', playlist_id)
 
         # удалить плейлист
         self.database.delete_playlist(playlist_id)
 
     def get_playlist_songs(self, playlist: Playlist) -> List[Song]:
-        songs = []
-        for song_id in playlist.songs:
-            song = self.database.get_song(song_id)
-            if song:
-                songs.append(song)
-        return songs
+        return self.database.get_songs(playlist.songs)
 
     def get_user_playlists(self, library: Library) -> List[Playlist]:
         playlists = []
@@ -62,6 +57,4 @@ class PlaylistService:
         return playlists
 
     def add_playlist_to_library(self, library: Library, playlist_id: str) -> None:
-        if playlist_id not in library.playlists:
-            library.playlists.append(playlist_id)
-            self.database.update_library(library)
+        self.database.add_library_item(library, 'playlists', playlist_id)
@@ -1,9 +1,9 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Set
 import random
 
-from PySide6.QtCore import QObject, Signal
-
 from models import Song
+from music_service.queue_source import LazyPermutation, PieceList
+from music_service.signals import Signal
 
 
 class RepeatMode:
@@ -13,47 +13,148 @@ class RepeatMode:
     ALL = 2
 
 
-class QueueService(QObject):
-    """сервис для управления очередью воспроизведения"""
+class QueueService:
+    """сервис для управления очередью воспроизведения
+
+    Каждая позиция очереди - запись со своим id, поэтому одна и та же
+    песня может стоять в очереди несколько раз. Исходный порядок - список
+    id записей; при перемешивании поверх него лежит перестановка индексов,
+    так что песни не копируются и не ищутся по значению.
+
+    Очередь не копирует переданные песни: записи 0..n-1 - это позиции
+    источника (список, представление, SongIdSource), песня берётся из него
+    при обращении. Порядок и перестановка - PieceList над range/LazyPermutation,
+    в памяти только то, что было изменено.
+
+    Qt не нужен: сигналы - music_service.signals, к ним подключаются и
+    слоты виджетов, и обычные функции.
+    """
 
     # Signals
-    queue_changed = Signal()
+    queue_changed = Signal()  # любое изменение очереди
     current_changed = Signal(int)  # new index
 
+    # точные изменения для представлений; queue_changed приходит после них
+    # и после current_moved/current_changed, когда current_index уже новый
+    queue_reset = Signal()  # порядок поменялся целиком
+    rows_inserted = Signal(int, int)  # first, count
+    rows_removed = Signal(int, int)  # first, count
+    row_moved = Signal(int, int)  # from, to
+    current_moved = Signal(int, int)  # old index, new index
+
     def __init__(self):
-        super().__init__()
-        self.queue: List[Song] = []
-        self.original_queue: List[Song] = []  # for shuffle
+        self._source: Sequence[Song] = []  # entry id < len(source) -> source[entry id]
+        self._source_size = 0
+        self._songs: Dict[int, Song] = {}  # добавленные позже: entry id -> song
+        self._original = PieceList(range(0))  # entry ids
+        self._removed: Set[int] = set()  # индексы _original, удалённые при перемешивании
+        self._perm: Optional[PieceList] = None  # play order -> index in _original
+        self.shuffle_seed = 0
+        self._next_entry_id = 0
+
         self.current_index: int = -1
         self.shuffle_enabled: bool = False
         self.repeat_mode: int = RepeatMode.OFF
 
+    def __len__(self) -> int:
+        return len(self._perm) if self._perm is not None else len(self._original)
+
+    def entry_id_at(self, index: int) -> int:
+        if self._perm is not None:
+            return self._original[self._perm[index]]
+        return self._original[index]
+
+    def song_at(self, index: int) -> Song:
+        return self._song(self.entry_id_at(index))
+
+    @property
+    def source(self) -> Sequence[Song]:
+        """последовательность, переданная в set_queue/restore_state"""
+        return self._source
+
+    def export_state(self) -> Dict[str, Any]:
+        """состояние очереди без песен источника: размер O(числа правок)"""
+        perm = None
+        if self._perm is not None:
+            perm = {"base": self._perm.base.to_dict(), "pieces": self._perm.to_pieces()}
+
+        return {
+            "size": self._source_size,
+            "original": self._original.to_pieces(),
+            "added": {str(entry_id): song.id for entry_id, song in self._songs.items()},
+            "next_entry": self._next_entry_id,
+            "removed": sorted(self._removed),
+            "perm": perm,
+            "current": self.current_index,
+            "shuffle": self.shuffle_enabled,
+            "repeat": self.repeat_mode,
+        }
+
+    def restore_state(self, source: Sequence[Song], state: Dict[str, Any],
+                      added: Dict[str, Song]) -> None:
+        """восстановить очередь из export_state; added - песни добавленных записей по id"""
+        if len(source) != state["size"]:
+            raise ValueError("источник очереди не совпадает с сохранённым")
+
+        self._reset(source)
+        self._original = PieceList.from_pieces(range(self._source_size), state["original"])
+        self._songs = {int(entry_id): added[song_id] for entry_id, song_id in state["added"].items()}
+        self._next_entry_id = state["next_entry"]
+        self._removed = set(state["removed"])
+
+        perm = state["perm"]
+        if perm is not None:
+            base = LazyPermutation.from_dict(perm["base"])
+            self._perm = PieceList.from_pieces(base, perm["pieces"])
+            self.shuffle_seed = base.seed
+
+        self.current_index = state["current"]
+        self.shuffle_enabled = state["shuffle"]
+        self.repeat_mode = state["repeat"]
+
+        self.queue_reset.emit()
+        self.queue_changed.emit()
+        self.current_changed.emit(self.current_index)
+
     def clear(self) -> None:
-        self.queue = []
-        self.original_queue = []
+        self._reset([])
         self.current_index = -1
+        self.queue_reset.emit()
         self.queue_changed.emit()
 
-    def set_queue(self, songs: List[Song], start_index: int = 0) -> None:
-        self.queue = songs.copy()
-        self.original_queue = songs.copy()
+    def set_queue(self, songs: Sequence[Song], start_index: int = 0) -> None:
+        """очередь поверх songs; список не копируется и не должен меняться"""
+        self._reset(songs)
         self.current_index = start_index
 
         if self.shuffle_enabled:
             self._apply_shuffle()
 
+        self.queue_reset.emit()
         self.queue_changed.emit()
         self.current_changed.emit(self.current_index)
 
     def enqueue(self, song: Song, pos: Optional[int] = None) -> None:
         # добавить песню в очередь
-        if pos is None:
-            self.queue.append(song)
-            self.original_queue.append(song)
-        else:
-            self.queue.insert(pos, song)
-            self.original_queue.insert(pos, song)
+        entry_id = self._new_entry(song)
+        if pos is None or pos >= len(self):
+            pos = len(self)
 
+        if self._perm is None:
+            self._original.insert(pos, entry_id)
+        else:
+            # в исходном порядке - в конец, индексы перестановки не сдвигаются
+            self._original.append(entry_id)
+            self._perm.insert(pos, len(self._original) - 1)
+
+        # текущая песня сдвинулась вниз - индекс верный уже к первому сигналу
+        old = self.current_index
+        if pos <= self.current_index:
+            self.current_index += 1
+
+        self.rows_inserted.emit(pos, 1)
+        if old != self.current_index:
+            self._emit_current(old)
         self.queue_changed.emit()
 
     def enqueue_after_current(self, song: Song) -> None:
@@ -65,85 +166,111 @@ class QueueService(QObject):
 
     def dequeue(self, index: int) -> None:
         # удалить песню из очереди
-        if 0 <= index < len(self.queue):
-            removed_song = self.queue.pop(index)
-
-            # удаляем из исходной очереди
-            if removed_song in self.original_queue:
-                self.original_queue.remove(removed_song)
+        if 0 <= index < len(self):
+            old = self.current_index
+            if self._perm is None:
+                entry_id = self._original.pop(index)
+            else:
+                original_index = self._perm.pop(index)
+                entry_id = self._original[original_index]
+                self._removed.add(original_index)
+            self._songs.pop(entry_id, None)
 
             # обновляем индекс
             if index < self.current_index:
                 self.current_index -= 1
             elif index == self.current_index:
                 # если удалили текущую песню
-                if self.current_index >= len(self.queue):
-                    self.current_index = len(self.queue) - 1
+                if self.current_index >= len(self):
+                    self.current_index = len(self) - 1
 
+            self.rows_removed.emit(index, 1)
+            self._emit_current(old)
             self.queue_changed.emit()
-            self.current_changed.emit(self.current_index)
 
     def move_up(self, index: int) -> None:
-        if 1 <= index < len(self.queue):
-            self.queue[index], self.queue[index - 1] = self.queue[index - 1], self.queue[index]
+        if 1 <= index < len(self):
+            old = self.current_index
+            self._swap(index, index - 1)
 
             if index == self.current_index:
                 self.current_index -= 1
             elif index - 1 == self.current_index:
                 self.current_index += 1
 
+            self.row_moved.emit(index, index - 1)
+            self._emit_current(old)
             self.queue_changed.emit()
-            self.current_changed.emit(self.current_index)
 
     def move_down(self, index: int) -> None:
-        if 0 <= index < len(self.queue) - 1:
-            self.queue[index], self.queue[index + 1] = self.queue[index + 1], self.queue[index]
+        if 0 <= index < len(self) - 1:
+            old = self.current_index
+            self._swap(index, index + 1)
 
             if index == self.current_index:
                 self.current_index += 1
             elif index + 1 == self.current_index:
                 self.current_index -= 1
 
+            self.row_moved.emit(index, index + 1)
+            self._emit_current(old)
             self.queue_changed.emit()
-            self.current_changed.emit(self.current_index)
 
     def next(self) -> Optional[Song]:
-        if not self.queue:
+        if not len(self):
             return None
 
         if self.repeat_mode == RepeatMode.ONE:
             return self.current_song()
 
+        old = self.current_index
         self.current_index += 1
 
-        if self.current_index >= len(self.queue):
+        if self.current_index >= len(self):
             if self.repeat_mode == RepeatMode.ALL:
                 # на начало
                 self.current_index = 0
             else:
                 # не повторять, начать сначала, но не воспроизводить
                 self.current_index = 0
-                self.current_changed.emit(self.current_index)
+                self._emit_current(old)
                 return None
 
-        self.current_changed.emit(self.current_index)
+        self._emit_current(old)
         return self.current_song()
 
+    def peek_next(self) -> Optional[Song]:
+        """песня, которую вернёт next(), без перехода"""
+        if not len(self):
+            return None
+
+        if self.repeat_mode == RepeatMode.ONE:
+            return self.current_song()
+
+        index = self.current_index + 1
+        if index >= len(self):
+            if self.repeat_mode != RepeatMode.ALL:
+                return None
+            index = 0
+
+        return self.song_at(index)
+
     def previous(self) -> Optional[Song]:
-        if not self.queue:
+        if not len(self):
             return None
 
+        old = self.current_index
         self.current_index -= 1
 
         if self.current_index < 0:
-            self.current_index = len(self.queue) - 1
+            self.current_index = len(self) - 1
 
-        self.current_changed.emit(self.current_index)
+        self._emit_current(old)
         return self.current_song()
 
     def current_song(self) -> Optional[Song]:
-        if 0 <= self.current_index < len(self.queue):
-            return self.queue[self.current_index]
+        if 0 <= self.current_index < len(self):
+            return self.song_at(self.current_index)
         return None
 
     def toggle_shuffle(self) -> None:
@@ -155,47 +282,73 @@ class QueueService(QObject):
         else:
             self._remove_shuffle()
 
+        self.queue_reset.emit()
         self.queue_changed.emit()
 
     def cycle_repeat_mode(self) -> None:
         # переключение повтора
         self.repeat_mode = (self.repeat_mode + 1) % 3
 
-    def _apply_shuffle(self) -> None:
-        if not self.queue:
-            return
-
-        # сохраняем текущую
-        current_song = self.current_song()
+    def _emit_current(self, old: int) -> None:
+        if old != self.current_index:
+            self.current_moved.emit(old, self.current_index)
+        self.current_changed.emit(self.current_index)
 
-        # перемешкиваем всё кроме текущей
-        songs_to_shuffle = self.queue.copy()
-        if current_song:
-            songs_to_shuffle.remove(current_song)
+    def _reset(self, songs: Sequence[Song]) -> None:
+        self._source = songs
+        self._source_size = len(songs)
+        self._songs = {}
+        self._original = PieceList(range(self._source_size))
+        self._removed = set()
+        self._perm = None
+        self._next_entry_id = self._source_size
+
+    def _song(self, entry_id: int) -> Song:
+        if entry_id < self._source_size:
+            return self._source[entry_id]
+        return self._songs[entry_id]
+
+    def _new_entry(self, song: Song) -> int:
+        entry_id = self._next_entry_id
+        self._next_entry_id += 1
+        self._songs[entry_id] = song
+        return entry_id
+
+    def _swap(self, i: int, j: int) -> None:
+        order = self._perm if self._perm is not None else self._original
+        order[i], order[j] = order[j], order[i]
 
-        random.shuffle(songs_to_shuffle)
+    def _apply_shuffle(self) -> None:
+        if not len(self):
+            return
 
-        # обновляем, текущая 1
-        if current_song:
-            self.queue = [current_song] + songs_to_shuffle
+        # перестановка вычисляется по seed, текущая песня становится первой
+        self.shuffle_seed = random.getrandbits(64)
+        count = len(self._original)
+        current = self.current_index
+        if 0 <= current < count:
+            self._perm = PieceList(LazyPermutation(count, self.shuffle_seed, first=current))
             self.current_index = 0
         else:
-            self.queue = songs_to_shuffle
+            self._perm = PieceList(LazyPermutation(count, self.shuffle_seed))
 
     def _remove_shuffle(self) -> None:
-        if not self.queue:
+        if self._perm is None:
             return
 
-        current_song = self.current_song()
+        # текущий трек в исходной очереди - прямо из перестановки
+        current = self._perm[self.current_index] if 0 <= self.current_index < len(self._perm) else None
+        if current is not None:
+            current -= sum(1 for index in self._removed if index < current)
 
-        # востанавливаем исходную очередь
-        self.queue = self.original_queue.copy()
+        if self._removed:
+            self._original.delete_indexes(list(self._removed))
+            self._removed = set()
+        self._perm = None
 
-        # находим текущий трек в исходной
-        if current_song and current_song in self.queue:
-            self.current_index = self.queue.index(current_song)
-        else:
-            self.current_index = 0
+        # ничего не играло (или очередь опустела) - так и остаётся
+        self.current_index = current if current is not None else -1
 
     def get_queue(self) -> List[Song]:
-        return self.queue.copy()
+        """вся очередь списком - материализует её целиком"""
+        return [self.song_at(index) for index in range(len(self))]
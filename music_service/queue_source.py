@@ -0,0 +1,326 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from models import Song
+
+if TYPE_CHECKING:
+    from music_service.database import Database
+
+_MASK64 = (1 << 64) - 1
+
+# раундов сети Фейстеля в перестановке
+FEISTEL_ROUNDS = 4
+
+
+class SongIdSource(Sequence[Song]):
+    """очередь по списку id: песня берётся из Database только при обращении"""
+
+    def __init__(self, database: 'Database', song_ids: Sequence[str]):
+        self.database = database
+        self.song_ids = song_ids
+
+    def __len__(self) -> int:
+        return len(self.song_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        song_id = self.song_ids[index]
+        song = self.database.get_song(song_id)
+        if song is None:
+            # песню удалили из каталога - место в очереди остаётся, играть нечего
+            return Song(song_id, "Unknown", "", "", "", 0, "")
+        return song
+
+
+class LazyPermutation(Sequence[int]):
+    """случайная перестановка 0..n-1, каждый элемент вычисляется по запросу
+
+    Биекция - сеть Фейстеля по seed с обходом цикла, так что перестановка
+    не хранится и одинакова для одного seed. first, если задан, стоит первым.
+    """
+
+    def __init__(self, size: int, seed: int, first: Optional[int] = None):
+        self.size = size
+        self.seed = seed & _MASK64
+        self.first = first
+
+        # перемешиваются все, кроме first
+        self._domain = size - 1 if first is not None else size
+        self._half = max(1, ((max(self._domain, 2) - 1).bit_length() + 1) // 2)
+        self._mask = (1 << self._half) - 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("permutation index out of range")
+
+        if self.first is None:
+            return self._permute(index)
+        if index == 0:
+            return self.first
+
+        value = self._permute(index - 1)
+        return value if value < self.first else value + 1
+
+    def __iter__(self) -> Iterator[int]:
+        for index in range(self.size):
+            yield self[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "seed": self.seed, "first": self.first}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LazyPermutation':
+        return cls(data["size"], data["seed"], data["first"])
+
+    def _round(self, value: int, round_no: int) -> int:
+        # splitmix64
+        x = (value * 0x9E3779B97F4A7C15 + self.seed + round_no * 0xBF58476D1CE4E5B9) & _MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return (x ^ (x >> 31)) & self._mask
+
+    def _permute(self, value: int) -> int:
+        # обход цикла: результат вне 0..domain-1 переставляется ещё раз
+        while True:
+            left, right = value >> self._half, value & self._mask
+            for round_no in range(FEISTEL_ROUNDS):
+                left, right = right, left ^ self._round(right, round_no)
+            value = (left << self._half) | right
+            if value < self._domain:
+                return value
+
+
+Piece = Union[range, List[int]]
+
+# сколько кусков в блоке PieceList; вдвое больше - блок делится
+BLOCK_PIECES = 64
+
+
+def _merge_pieces(pieces: Iterable[Piece]) -> List[Piece]:
+    """убрать пустые куски и склеить соседние списки и смежные отрезки"""
+    merged: List[Piece] = []
+    for piece in pieces:
+        if not len(piece):
+            continue
+        if merged and isinstance(piece, list) and isinstance(merged[-1], list):
+            merged[-1].extend(piece)
+        elif (merged and isinstance(piece, range) and isinstance(merged[-1], range)
+              and merged[-1].stop == piece.start):
+            merged[-1] = range(merged[-1].start, piece.stop)
+        else:
+            merged.append(piece)
+    return merged
+
+
+class PieceList(Sequence[int]):
+    """список int поверх ленивой базовой последовательности
+
+    Хранится как цепочка кусков: range - нетронутый отрезок базы, list -
+    значения, записанные правками. Правка материализует только место,
+    где она сделана. Куски лежат блоками не больше 2 * BLOCK_PIECES,
+    длины блоков - в дереве Фенвика: найти кусок по индексу и поправить
+    длину - O(log блоков + BLOCK_PIECES), от числа правок не зависит.
+    """
+
+    def __init__(self, base: Sequence[int]):
+        self.base = base
+        self._blocks: List[List[Piece]] = []
+        self._block_lengths: List[int] = []
+        self._tree: List[int] = [0]  # дерево Фенвика по _block_lengths, с 1
+        self._length = 0
+        self._build([range(len(base))])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> int:
+        block, number, offset = self._find(index)
+        piece = self._blocks[block][number]
+        if isinstance(piece, range):
+            return self.base[piece[offset]]
+        return piece[offset]
+
+    def __setitem__(self, index: int, value: int) -> None:
+        block, number, offset = self._find(index)
+        pieces = self._blocks[block]
+        piece = pieces[number]
+        if isinstance(piece, list):
+            piece[offset] = value
+            return
+
+        pieces[number:number + 1] = [piece[:offset], [value], piece[offset + 1:]]
+        self._tidy(block, number, number + 3)
+
+    def __iter__(self) -> Iterator[int]:
+        for pieces in self._blocks:
+            for piece in pieces:
+                if isinstance(piece, range):
+                    for index in piece:
+                        yield self.base[index]
+                else:
+                    yield from piece
+
+    def to_pieces(self) -> List[Dict[str, List[int]]]:
+        """куски для сохранения: {"r": [start, stop]} - отрезок базы, {"v": [...]} - значения"""
+        pieces = _merge_pieces(list(piece) if isinstance(piece, list) else piece
+                               for block in self._blocks for piece in block)
+        return [
+            {"r": [piece.start, piece.stop]} if isinstance(piece, range) else {"v": piece}
+            for piece in pieces
+        ]
+
+    @classmethod
+    def from_pieces(cls, base: Sequence[int], pieces: List[Dict[str, List[int]]]) -> 'PieceList':
+        result = cls(base)
+        result._build(range(*piece["r"]) if "r" in piece else list(piece["v"]) for piece in pieces)
+        return result
+
+    def append(self, value: int) -> None:
+        self.insert(self._length, value)
+
+    def insert(self, index: int, value: int) -> None:
+        if index >= self._length:
+            if not self._blocks:
+                self._build([[value]])
+                return
+            block = len(self._blocks) - 1
+            pieces = self._blocks[block]
+            if isinstance(pieces[-1], list):
+                pieces[-1].append(value)
+            else:
+                pieces.append([value])
+            self._resize_block(block, 1)
+            self._tidy(block, len(pieces) - 1, len(pieces))
+            return
+
+        block, number, offset = self._find(index)
+        pieces = self._blocks[block]
+        piece = pieces[number]
+        self._resize_block(block, 1)
+        if isinstance(piece, list):
+            piece.insert(offset, value)
+            return
+
+        pieces[number:number + 1] = [piece[:offset], [value], piece[offset:]]
+        self._tidy(block, number, number + 3)
+
+    def pop(self, index: int) -> int:
+        block, number, offset = self._find(index)
+        pieces = self._blocks[block]
+        piece = pieces[number]
+        self._resize_block(block, -1)
+        if isinstance(piece, list):
+            value = piece.pop(offset)
+            self._tidy(block, number, number + 1)
+            return value
+
+        value = self.base[piece[offset]]
+        pieces[number:number + 1] = [piece[:offset], piece[offset + 1:]]
+        self._tidy(block, number, number + 2)
+        return value
+
+    def delete_indexes(self, indexes: Sequence[int]) -> None:
+        """удалить позиции (индексы до удаления) за один проход по кускам"""
+        doomed = sorted(set(indexes))
+        pieces: List[Piece] = []
+        k = 0
+        start = 0
+        for piece in (piece for block in self._blocks for piece in block):
+            end = start + len(piece)
+            cut = []
+            while k < len(doomed) and doomed[k] < end:
+                cut.append(doomed[k] - start)
+                k += 1
+
+            if not cut:
+                pieces.append(piece)
+            elif isinstance(piece, list):
+                skip = set(cut)
+                pieces.append([value for offset, value in enumerate(piece) if offset not in skip])
+            else:
+                # отрезок базы режется на отрезки, ничего не материализуется
+                prev = 0
+                for offset in cut:
+                    pieces.append(piece[prev:offset])
+                    prev = offset + 1
+                pieces.append(piece[prev:])
+            start = end
+
+        self._build(pieces)
+
+    # --- блоки ---
+
+    def _build(self, pieces: Iterable[Piece]) -> None:
+        """разложить куски по блокам заново"""
+        pieces = _merge_pieces(pieces)
+        self._blocks = [pieces[i:i + BLOCK_PIECES] for i in range(0, len(pieces), BLOCK_PIECES)]
+        self._block_lengths = [sum(map(len, block)) for block in self._blocks]
+        self._length = sum(self._block_lengths)
+        self._rebuild_tree()
+
+    def _rebuild_tree(self) -> None:
+        tree = [0] + self._block_lengths
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _resize_block(self, block: int, delta: int) -> None:
+        self._block_lengths[block] += delta
+        self._length += delta
+        tree = self._tree
+        i = block + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _find(self, index: int) -> Tuple[int, int, int]:
+        """Return: блок, кусок в блоке, смещение в куске"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("list index out of range")
+
+        # спуск по дереву Фенвика: последний блок, до которого меньше index элементов
+        tree = self._tree
+        block = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            child = block + step
+            if child < len(tree) and tree[child] <= index:
+                block = child
+                index -= tree[child]
+            step >>= 1
+
+        for number, piece in enumerate(self._blocks[block]):
+            if index < len(piece):
+                return block, number, index
+            index -= len(piece)
+        raise AssertionError("длина блока не совпадает с кусками")
+
+    def _tidy(self, block: int, first: int, stop: int) -> None:
+        """склеить куски блока вокруг правки first:stop; переполненный блок разделить, пустой убрать"""
+        pieces = self._blocks[block]
+        first = max(first - 1, 0)
+        stop = min(stop + 1, len(pieces))
+        pieces[first:stop] = _merge_pieces(pieces[first:stop])
+
+        if not pieces:
+            del self._blocks[block]
+            del self._block_lengths[block]
+            self._rebuild_tree()
+        elif len(pieces) > 2 * BLOCK_PIECES:
+            tail = pieces[BLOCK_PIECES:]
+            del pieces[BLOCK_PIECES:]
+            tail_length = sum(map(len, tail))
+            self._blocks.insert(block + 1, tail)
+            self._block_lengths[block] -= tail_length
+            self._block_lengths.insert(block + 1, tail_length)
+            self._rebuild_tree()
@@ -0,0 +1,208 @@
+import heapq
+import re
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from models import Song
+
+# длина n-граммы для подстрочного поиска
+NGRAM = 3
+
+# веса полей: название, исполнитель, альбом, жанр
+FIELD_WEIGHTS = (8, 4, 2, 1)
+
+_token_split = re.compile(r'\W+')
+
+if TYPE_CHECKING:
+    from music_service.catalog_snapshot import SnapshotSearchBase
+
+
+class SearchIndex:
+    """инвертированный индекс по n-граммам для поиска песен
+
+    Для запросов длиной от NGRAM символов ищет подстроку в любом поле,
+    для более коротких - совпадение с началом слова.
+
+    Может работать поверх индекса из снимка каталога (set_base): тогда
+    в словарях лежат только песни, измененные после загрузки, а их
+    старые версии в снимке скрыты.
+    """
+
+    def __init__(self):
+        # индекс читается из потока поиска, а меняется из GUI
+        self._lock = threading.RLock()
+        self._fields: Dict[str, Tuple[str, str, str, str]] = {}
+        self._sort_keys: Dict[str, Tuple[str, str]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._prefixes: Dict[str, Set[str]] = {}
+        self._base: Optional['SnapshotSearchBase'] = None
+        self._hidden: Set[int] = set()  # строки снимка, замененные или удаленные
+
+    def __len__(self) -> int:
+        base_count = self._base.count - len(self._hidden) if self._base else 0
+        return len(self._fields) + base_count
+
+    def __contains__(self, song_id: str) -> bool:
+        return song_id in self._fields or self._base_row(song_id) >= 0
+
+    def set_base(self, base: 'SnapshotSearchBase') -> None:
+        """искать по индексу из снимка вместо построения заново"""
+        with self._lock:
+            self.clear()
+            self._base = base
+
+    def dump(self) -> Tuple[Dict[str, Tuple[str, str, str, str]], Dict[str, Tuple[str, str]],
+                            Dict[str, Set[str]], Dict[str, Set[str]]]:
+        """Return: поля, ключи сортировки, n-граммы, префиксы - для записи снимка"""
+        if self._base is not None:
+            raise ValueError("индекс загружен из снимка")
+        return self._fields, self._sort_keys, self._grams, self._prefixes
+
+    def _base_row(self, song_id: str) -> int:
+        if self._base is None:
+            return -1
+        row = self._base.row(song_id)
+        return -1 if row in self._hidden else row
+
+    def add(self, song: Song, album_title: str = "", genre_name: str = "") -> None:
+        """добавить (или переиндексировать) песню"""
+        fields = (
+            song.title.lower(),
+            song.artist.lower(),
+            album_title.lower(),
+            genre_name.lower()
+        )
+
+        with self._lock:
+            self._hide_base(song.id)
+            if song.id in self._fields:
+                self._unlink(song.id)
+
+            self._fields[song.id] = fields
+            self._sort_keys[song.id] = (song.artist, song.title)
+
+            for gram in self._field_grams(fields):
+                self._grams.setdefault(gram, set()).add(song.id)
+            for prefix in self._field_prefixes(fields):
+                self._prefixes.setdefault(prefix, set()).add(song.id)
+
+    def remove(self, song_id: str) -> None:
+        with self._lock:
+            self._hide_base(song_id)
+            if song_id in self._fields:
+                self._unlink(song_id)
+                del self._fields[song_id]
+                del self._sort_keys[song_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fields.clear()
+            self._sort_keys.clear()
+            self._grams.clear()
+            self._prefixes.clear()
+            self._base = None
+            self._hidden.clear()
+
+    def _hide_base(self, song_id: str) -> None:
+        row = self._base_row(song_id)
+        if row >= 0:
+            self._hidden.add(row)
+
+    def search(self, query: str, limit: int = 100) -> List[str]:
+        """Return: id песен, отсортированные по релевантности, не больше limit"""
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        with self._lock:
+            scored = []
+            for song_id in self._candidates(query):
+                score = self._score(self._fields[song_id], query)
+                if score:
+                    scored.append((-score, self._sort_keys[song_id], song_id))
+            if self._base is not None:
+                scored.extend(self._search_base(query, limit))
+
+        return [song_id for _, _, song_id in heapq.nsmallest(limit, scored)]
+
+    def _search_base(self, query: str, limit: int) -> List[Tuple[int, Tuple[str, str], str]]:
+        """лучшие limit совпадений из снимка; ключ сортировки нужен только им"""
+        base = self._base
+        scored = []
+        for row in base.candidates(query):
+            if row in self._hidden:
+                continue
+            score = self._score(base.fields(row), query)
+            if score:
+                scored.append((-score, base.rank[row], row))
+
+        return [(score, base.sort_key(row), base.ids[row])
+                for score, _, row in heapq.nsmallest(limit, scored)]
+
+    def _candidates(self, query: str) -> Set[str]:
+        if len(query) < NGRAM:
+            return self._prefixes.get(query, set())
+
+        postings = []
+        for i in range(len(query) - NGRAM + 1):
+            posting = self._grams.get(query[i:i + NGRAM])
+            if not posting:
+                return set()
+            postings.append(posting)
+
+        # пересекаем начиная с самого короткого списка
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    @staticmethod
+    def _score(fields: Tuple[str, str, str, str], query: str) -> int:
+        best = 0
+        for field, weight in zip(fields, FIELD_WEIGHTS):
+            if field == query:
+                score = weight * 4
+            elif field.startswith(query):
+                score = weight * 3
+            elif query in field:
+                score = weight
+            else:
+                continue
+            best = max(best, score)
+        return best
+
+    @classmethod
+    def match_score(cls, fields: Tuple[str, str, str, str], query: str) -> int:
+        """оценка, как в search(), вместе с отбором кандидатов - для поиска без этого индекса
+
+        fields и query - уже в нижнем регистре.
+        """
+        if len(query) < NGRAM and query not in cls._field_prefixes(fields):
+            return 0
+        return cls._score(fields, query)
+
+    @staticmethod
+    def _field_grams(fields: Tuple[str, ...]) -> Set[str]:
+        grams = set()
+        for field in fields:
+            for i in range(len(field) - NGRAM + 1):
+                grams.add(field[i:i + NGRAM])
+        return grams
+
+    @staticmethod
+    def _field_prefixes(fields: Tuple[str, ...]) -> Set[str]:
+        prefixes = set()
+        for field in fields:
+            for token in _token_split.split(field):
+                for size in range(1, min(len(token), NGRAM - 1) + 1):
+                    prefixes.add(token[:size])
+        return prefixes
+
+    def _unlink(self, song_id: str) -> None:
+        fields = self._fields[song_id]
+        for index, keys in ((self._grams, self._field_grams(fields)),
+                            (self._prefixes, self._field_prefixes(fields))):
+            for key in keys:
+                posting = index.get(key)
+                if posting is not None:
+                    posting.discard(song_id)
+                    if not posting:
+                        del index[key]
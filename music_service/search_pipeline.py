@@ -0,0 +1,103 @@
+from typing import List
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from models import Song
+from music_service.search_service import SearchService
+
+# пауза после последнего нажатия перед запуском поиска
+DEBOUNCE_MS = 150
+
+# сколько результатов отдавать за раз
+PAGE_SIZE = 50
+
+
+class _SearchSignals(QObject):
+    page = Signal(int, str, list, bool, bool)  # generation, query, songs, first, last
+
+
+class _SearchTask(QRunnable):
+    """поиск в рабочем потоке, результаты отдаются страницами"""
+
+    def __init__(self, pipeline: 'SearchPipeline', generation: int, query: str):
+        super().__init__()
+        self.pipeline = pipeline
+        self.generation = generation
+        self.query = query
+
+    def run(self) -> None:
+        if self.pipeline.is_stale(self.generation):
+            return
+
+        songs = self.pipeline.search_service.search_songs(self.query)
+        page_size = self.pipeline.page_size
+
+        if not songs:
+            self.pipeline.signals.page.emit(self.generation, self.query, [], True, True)
+            return
+
+        for start in range(0, len(songs), page_size):
+            # пользователь уже печатает дальше - результат не нужен
+            if self.pipeline.is_stale(self.generation):
+                return
+            page = songs[start:start + page_size]
+            last = start + page_size >= len(songs)
+            self.pipeline.signals.page.emit(self.generation, self.query, page, start == 0, last)
+
+
+class SearchPipeline(QObject):
+    """поиск с задержкой ввода, в отдельном потоке, с отбрасыванием устаревших запросов"""
+
+    # Signals
+    page_ready = Signal(str, list, bool)  # query, songs, first page
+    finished = Signal(str)  # query
+
+    def __init__(self, search_service: SearchService, delay_ms: int = DEBOUNCE_MS,
+                 page_size: int = PAGE_SIZE, parent: QObject = None):
+        super().__init__(parent)
+        self.search_service = search_service
+        self.page_size = page_size
+
+        self._generation = 0
+        self._query = ""
+
+        # один поток: устаревшие задачи в очереди просто завершатся
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._start)
+
+        self.signals = _SearchSignals()
+        self.signals.page.connect(self._on_page)
+
+    def submit(self, query: str) -> None:
+        """запросить поиск, предыдущий запрос отменяется"""
+        self._generation += 1
+        self._query = query
+        self._timer.start()
+
+    def cancel(self) -> None:
+        self._generation += 1
+        self._timer.stop()
+
+    def is_stale(self, generation: int) -> bool:
+        return generation != self._generation
+
+    def wait(self) -> None:
+        """дождаться завершения задач (при закрытии окна)"""
+        self.cancel()
+        self._pool.waitForDone()
+
+    def _start(self) -> None:
+        self._pool.start(_SearchTask(self, self._generation, self._query))
+
+    def _on_page(self, generation: int, query: str, songs: List[Song], first: bool, last: bool) -> None:
+        if self.is_stale(generation):
+            return
+
+        self.page_ready.emit(query, songs, first)
+        if last:
+            self.finished.emit(query)
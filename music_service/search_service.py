@@ -3,6 +3,9 @@ from typing import List
 from models import Song
 from music_service.database import Database
 
+# сколько результатов отдавать по умолчанию
+SEARCH_LIMIT = 200
+
 
 class SearchService:
     """поисковый сервис"""
@@ -10,17 +13,16 @@ class SearchService:
     def __init__(self, database: Database):
         self.database = database
 
-    def search_songs(self, query: str) -> List[Song]:
-        # поиск по названию и исполнителю
+    def search_songs(self, query: str, limit: int = SEARCH_LIMIT) -> List[Song]:
+        # поиск по названию, исполнителю, альбому и жанру
+        # результаты уже отсортированы по релевантности
         if not query.strip():
             return []
 
-        query_lower = query.lower()
         results = []
-
-        for song in self.database.get_all_songs():
-            if (query_lower in song.title.lower() or
-                query_lower in song.artist.lower()):
+        for song_id in self.database.search_index.search(query, limit):
+            song = self.database.get_song(song_id)
+            if song:
                 results.append(song)
 
         return results
@@ -0,0 +1,188 @@
+import json
+import os
+import secrets
+import shutil
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from models import Song
+from music_service.database import Database
+from music_service.journal import write_json_atomic
+from music_service.player_service import PlayerService
+from music_service.queue_service import QueueService
+from music_service.queue_source import SongIdSource
+
+# как часто, самое большее, сохранять сессию
+CHECKPOINT_MS = 5000
+
+SESSION_NAME = "session.json"
+QUEUE_IDS_NAME = "queue_ids.txt"
+
+
+class SessionService(QObject):
+    """очередь и позиция воспроизведения пользователя между запусками
+
+    В session.json - маленькое состояние очереди (куски порядка, seed
+    перемешивания, правки), текущий индекс и позиция; он перезаписывается
+    не чаще раза в CHECKPOINT_MS. Id песен источника очереди лежат в
+    queue_ids.txt и пишутся только когда очередь заменяется целиком.
+    """
+
+    # Signals
+    restored = Signal(object)  # Song: текущая песня восстановленной сессии
+
+    def __init__(self, database: Database, queue_service: QueueService, player_service: PlayerService,
+                 sessions_dir: str = "data/sessions", delay_ms: int = CHECKPOINT_MS, parent: QObject = None):
+        super().__init__(parent)
+        self.database = database
+        self.queue_service = queue_service
+        self.player_service = player_service
+        self.sessions_dir = Path(sessions_dir)
+
+        self.session_dir: Optional[Path] = None
+        self._saved_source: Optional[Sequence[Song]] = None
+        self._source_token = ""
+        self.last_save_error: Optional[Exception] = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.save)
+
+    def start(self, library_id: str) -> None:
+        """начать сессию пользователя: восстановить сохранённую и следить за изменениями"""
+        self.session_dir = self.sessions_dir / library_id
+        self._saved_source = None
+        self._source_token = ""
+
+        self.restore()
+        self._track(True)
+
+    def stop(self) -> None:
+        """сохранить и перестать следить (выход из аккаунта, закрытие)"""
+        if self.session_dir is None:
+            return
+
+        self._track(False)
+        self.save()
+        self.session_dir = None
+        self._saved_source = None
+
+    def delete(self, library_id: str) -> None:
+        """удалить сохранённую сессию (удаление аккаунта)"""
+        if self.session_dir == self.sessions_dir / library_id:
+            self._track(False)
+            self._timer.stop()
+            self.session_dir = None
+        shutil.rmtree(self.sessions_dir / library_id, ignore_errors=True)
+
+    @property
+    def active(self) -> bool:
+        return self.session_dir is not None
+
+    def _track(self, enabled: bool) -> None:
+        signals = (
+            self.queue_service.queue_changed,
+            self.queue_service.current_changed,
+            self.player_service.state_changed,
+            self.player_service.position_changed,
+        )
+        for signal in signals:
+            if enabled:
+                signal.connect(self._schedule)
+            else:
+                signal.disconnect(self._schedule)
+
+    def restore(self) -> bool:
+        """восстановить очередь и позицию; песни читаются из каталога только по обращению"""
+        try:
+            with open(self.session_dir / SESSION_NAME, encoding='utf-8') as f:
+                session = json.load(f)
+            token, song_ids = self._read_queue_ids()
+        except (OSError, ValueError):
+            return False
+
+        if token != session.get("token"):
+            # запись оборвалась между файлами - сессия не согласована
+            return False
+
+        state = session["queue"]
+        source = SongIdSource(self.database, song_ids)
+        added_ids = sorted(set(state["added"].values()))
+        added = dict(zip(added_ids, SongIdSource(self.database, added_ids)))
+
+        try:
+            self.queue_service.restore_state(source, state, added)
+        except (KeyError, ValueError):
+            return False
+
+        self._saved_source = source
+        self._source_token = token
+
+        song = self.queue_service.current_song()
+        if song is None:
+            return True
+
+        try:
+            self.player_service.load(song, session.get("position", 0))
+        except FileNotFoundError:
+            pass
+        self.restored.emit(song)
+        return True
+
+    def save(self) -> None:
+        """записать сессию сейчас"""
+        self._timer.stop()
+        if self.session_dir is None:
+            return
+
+        try:
+            self.session_dir.mkdir(parents=True, exist_ok=True)
+
+            source = self.queue_service.source
+            if source is not self._saved_source:
+                self._write_queue_ids(source)
+
+            current = self.player_service.current_song
+            write_json_atomic(self.session_dir / SESSION_NAME, {
+                "token": self._source_token,
+                "queue": self.queue_service.export_state(),
+                "song": current.id if current else None,
+                "position": self.player_service.current_position_ms() if current else 0,
+            })
+            self.last_save_error = None
+        except OSError as e:
+            # сессия - не критичные данные: не получилось - попробуем при следующем изменении
+            self.last_save_error = e
+
+    def _schedule(self, *args: Any) -> None:
+        # не перезапускать: во время воспроизведения сохраняется раз в интервал
+        if self.session_dir is not None and not self._timer.isActive():
+            self._timer.start()
+
+    def _write_queue_ids(self, source: Sequence[Song]) -> None:
+        if isinstance(source, SongIdSource):
+            song_ids = source.song_ids
+        else:
+            song_ids = [song.id for song in source]
+
+        token = secrets.token_hex(8)
+        path = self.session_dir / QUEUE_IDS_NAME
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(token + "\n")
+            for song_id in song_ids:
+                f.write(song_id + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        self._saved_source = source
+        self._source_token = token
+
+    def _read_queue_ids(self) -> Tuple[str, List[str]]:
+        with open(self.session_dir / QUEUE_IDS_NAME, encoding='utf-8') as f:
+            token = f.readline().rstrip("\n")
+            return token, f.read().splitlines()
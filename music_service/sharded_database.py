@@ -0,0 +1,285 @@
+import hashlib
+import json
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import Library, Playlist
+from music_service.database import SAVE_DELAY, Database
+from music_service.journal import Journal, write_json_atomic
+
+SHARDS_DIR = "shards"
+
+# шард - (коллекция, имя файла без расширения)
+Shard = Tuple[str, str]
+
+
+def shard_name(key: str) -> str:
+    """имя файла шарда: id библиотеки или почта автора могут быть любыми строками"""
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+class ShardedDatabase(Database):
+    """библиотеки и плейлисты по файлам: шард на библиотеку и шард на автора плейлистов
+
+    shards/libraries/<имя>.json - библиотека и авторы её плейлистов,
+    shards/playlists/<имя>.json - все плейлисты одного автора; у каждого
+    шарда свой журнал <имя>.log. Шард читается при первом обращении к
+    библиотеке/плейлисту, изменение дописывается и сжимается только в
+    его файлы, так что вход и правки пользователя не зависят от числа
+    аккаунтов. users.json и журнал пользователей остаются общими.
+    """
+
+    # общий журнал сжимается только в users.json
+    JOURNAL_SNAPSHOTS = ('users',)
+
+    def __init__(self, data_dir: str = "data", save_delay: float = SAVE_DELAY, load: bool = True):
+        self.shards_dir = Path(data_dir) / SHARDS_DIR
+        self._shards: Dict[Shard, Journal] = {}  # загруженные шарды
+        self._playlist_shards: Dict[str, str] = {}  # playlist id -> имя шарда автора
+        # playlist id -> автор: по нему находится шард плейлиста из библиотеки
+        self.playlist_authors: Dict[str, str] = {}
+        super().__init__(data_dir, save_delay, load)
+
+    def load_accounts(self) -> None:
+        """только пользователи; шарды читаются по требованию"""
+        for collection in ('libraries', 'playlists'):
+            (self.shards_dir / collection).mkdir(parents=True, exist_ok=True)
+        with self._save_lock, self.journal.lock:
+            self.load_users()
+            self.replay_journal()
+
+    def _shard_path(self, shard: Shard, suffix: str) -> Path:
+        collection, name = shard
+        return self.shards_dir / collection / f"{name}{suffix}"
+
+    def _journal_for(self, collection: str, key: str) -> Journal:
+        if collection == 'libraries':
+            return self._shards[(collection, shard_name(key))]
+        if collection == 'playlists':
+            return self._shards[(collection, self._playlist_shards[key])]
+        return self.journal
+
+    def _pending_journals(self) -> List[Journal]:
+        # общий журнал первым, шарды по имени файла - один порядок во всех процессах
+        shard_journals = {self._journal_for(r['c'], r['key']) for r in self._pending}
+        shard_journals.discard(self.journal)
+        return [self.journal] + sorted(shard_journals, key=lambda journal: str(journal.path))
+
+    def _watched_journals(self) -> List[Journal]:
+        """общий журнал и журналы только загруженных шардов"""
+        return [self.journal] + list(self._shards.values())
+
+    def _shard_of_journal(self, journal: Journal) -> Shard:
+        return next(shard for shard, shard_journal in self._shards.items() if shard_journal is journal)
+
+    def _shard_keys(self, shard: Shard) -> List[str]:
+        collection, name = shard
+        if collection == 'libraries':
+            return [library_id for library_id in self.libraries if shard_name(library_id) == name]
+        return [playlist_id for playlist_id in self.playlists if self._playlist_shards.get(playlist_id) == name]
+
+    def _load_shard(self, shard: Shard) -> None:
+        """прочитать шард, если он ещё не в памяти"""
+        with self._save_lock:
+            if shard in self._shards:
+                return
+
+            journal = Journal(self._shard_path(shard, ".log"))
+            self._shards[shard] = journal
+            with journal.lock:
+                self._read_shard(shard, journal, self._journaled(shard[0])[0])
+                if self._journal_is_full(journal):
+                    self._compact_shard(shard)
+
+    def _read_shard(self, shard: Shard, journal: Journal, items: Dict[str, Any]) -> None:
+        """снимок и журнал шарда (под journal.lock) в словарь items"""
+        collection, name = shard
+        json_path = self._shard_path(shard, ".json")
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except json.JSONDecodeError as e:
+            raise ValueError(f"ошибка чтения {json_path.name}: {e}")
+
+        _, from_dict = self._journaled(collection)
+        for key, value in data.get('items', {}).items():
+            items[key] = from_dict(key, value)
+            if collection == 'playlists':
+                self._playlist_shards[key] = name
+        self.playlist_authors.update(data.get('playlist_authors', {}))
+
+        for record in journal.replay():
+            self._apply_record(record, {collection: items})
+
+    def _load_author_shard(self, author: str) -> None:
+        self._load_shard(('playlists', shard_name(author)))
+
+    def _apply_record(self, record: Dict[str, Any], collections: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        super()._apply_record(record, collections)
+        if record['c'] == 'playlists' and record['op'] == 'put':
+            self._playlist_shards[record['key']] = shard_name(record['value']['author'])
+        if 'author' in record:
+            self.playlist_authors[record['item']] = record['author']
+
+    def _reload_journal(self, journal: Journal) -> None:
+        """после сжатия другим процессом перечитывается только этот шард"""
+        if journal is self.journal:
+            super()._reload_journal(journal)
+            return
+
+        shard = self._shard_of_journal(journal)
+        collection = shard[0]
+        before = self._shard_keys(shard)
+        # шард собирается отдельно и подменяется в коллекции под блокировкой
+        fresh: Dict[str, Any] = {}
+        self._read_shard(shard, journal, fresh)
+        self._reapply_pending(journal, {collection: fresh})
+
+        with self._save_lock:
+            items, _ = self._journaled(collection)
+            if fresh != {key: items[key] for key in before}:
+                self._changed.add(collection)
+            for key in before:
+                if key in fresh:
+                    self._replace_item(items, key, fresh[key])
+                else:
+                    del items[key]
+            for key, item in fresh.items():
+                items.setdefault(key, item)
+
+    def _compact_journal(self, journal: Journal) -> None:
+        if journal is self.journal:
+            super()._compact_journal(journal)
+        else:
+            self._compact_shard(self._shard_of_journal(journal))
+
+    def _compact_shard(self, shard: Shard) -> None:
+        """записать снимок одного шарда и очистить его журнал
+
+        Как в Database: под _save_lock снимок только собирается.
+        """
+        journal = self._shards[shard]
+        collection, name = shard
+        with ExitStack() as stack:
+            with self._save_lock:
+                stack.enter_context(journal.lock)
+                self._sync_journal(journal)
+
+                if collection == 'libraries':
+                    libraries = [self.libraries[library_id] for library_id in self._shard_keys(shard)]
+                    data = {
+                        'items': {library.id: self._library_to_dict(library) for library in libraries},
+                        'playlist_authors': {
+                            playlist_id: self.playlist_authors[playlist_id]
+                            for library in libraries for playlist_id in library.playlists
+                            if playlist_id in self.playlist_authors
+                        },
+                    }
+                else:
+                    data = {'items': {
+                        playlist_id: self._playlist_to_dict(self.playlists[playlist_id])
+                        for playlist_id in self._shard_keys(shard)
+                    }}
+
+            try:
+                write_json_atomic(self._shard_path(shard, ".json"), data)
+            except IOError as e:
+                raise IOError(f"ошибка сохранения шарда {collection}/{name}: {e}")
+            journal.truncate()
+
+    def compact(self) -> None:
+        """сжать общий журнал и журналы загруженных шардов, в которых есть записи"""
+        super().compact()
+        for shard, journal in list(self._shards.items()):
+            if journal.records or journal.size:
+                self._compact_shard(shard)
+
+    def save_playlists(self) -> None:
+        """переписать загруженные шарды плейлистов"""
+        with self._save_lock:
+            for shard in [shard for shard in self._shards if shard[0] == 'playlists']:
+                self._compact_shard(shard)
+
+    def save_libraries(self) -> None:
+        """переписать загруженные шарды библиотек"""
+        with self._save_lock:
+            for shard in [shard for shard in self._shards if shard[0] == 'libraries']:
+                self._compact_shard(shard)
+
+    def get_playlist(self, playlist_id: str) -> Optional[Playlist]:
+        playlist = self.playlists.get(playlist_id)
+        if playlist is None:
+            author = self.playlist_authors.get(playlist_id)
+            if author is not None:
+                self._load_author_shard(author)
+                playlist = self.playlists.get(playlist_id)
+        return playlist
+
+    def get_library(self, library_id: str) -> Optional[Library]:
+        if library_id not in self.libraries:
+            self._load_shard(('libraries', shard_name(library_id)))
+        return self.libraries.get(library_id)
+
+    def add_playlist(self, playlist: Playlist) -> None:
+        with self._mutation():
+            # остальные плейлисты автора должны попасть в снимок шарда
+            self._load_author_shard(playlist.author)
+            self._playlist_shards[playlist.id] = shard_name(playlist.author)
+            super().add_playlist(playlist)
+
+    def delete_playlist(self, playlist_id: str) -> None:
+        with self._mutation():
+            self.get_playlist(playlist_id)
+            super().delete_playlist(playlist_id)
+
+    def add_library(self, library: Library) -> None:
+        with self._mutation():
+            self._load_shard(('libraries', shard_name(library.id)))
+            super().add_library(library)
+
+    def add_library_item(self, library: Library, field: str, item_id: str) -> None:
+        """как в Database; для плейлиста в записи ещё и автор - по нему найдётся его шард"""
+        with self._mutation():
+            items = getattr(library, field)
+            if item_id in items:
+                return
+
+            items.append(item_id)
+            fields: Dict[str, Any] = {'field': field, 'item': item_id}
+            if field == 'playlists':
+                playlist = self.get_playlist(item_id)
+                if playlist is not None:
+                    self.playlist_authors[item_id] = playlist.author
+                    fields['author'] = playlist.author
+            self._log('libraries', 'add', library.id, **fields)
+
+    def get_all_playlists(self) -> List[Playlist]:
+        """все плейлисты - читает все шарды авторов"""
+        for path in sorted((self.shards_dir / 'playlists').glob("*.json")):
+            self._load_shard(('playlists', path.stem))
+        return super().get_all_playlists()
+
+    def import_database(self, source: Database) -> None:
+        """разложить библиотеки и плейлисты другой базы по шардам"""
+        with self._save_lock:
+            shards = set()
+            for playlist in source.get_all_playlists():
+                self.playlists[playlist.id] = playlist
+                self._playlist_shards[playlist.id] = shard_name(playlist.author)
+                shards.add(('playlists', shard_name(playlist.author)))
+
+            for library_id, library in source.libraries.items():
+                self.libraries[library_id] = library
+                for playlist_id in library.playlists:
+                    playlist = source.get_playlist(playlist_id)
+                    if playlist is not None:
+                        self.playlist_authors[playlist_id] = playlist.author
+                shards.add(('libraries', shard_name(library_id)))
+
+            for shard in sorted(shards):
+                self._shard_path(shard, ".json").parent.mkdir(parents=True, exist_ok=True)
+                self._shards[shard] = Journal(self._shard_path(shard, ".log"))
+                self._compact_shard(shard)
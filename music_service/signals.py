@@ -0,0 +1,87 @@
+import inspect
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _arg_count(slot: Callable) -> Optional[int]:
+    """сколько позиционных аргументов принимает slot; None - сколько угодно"""
+    try:
+        parameters = inspect.signature(slot).parameters.values()
+    except (TypeError, ValueError):  # встроенные функции без сигнатуры
+        return None
+    count = 0
+    for parameter in parameters:
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            return None
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+            count += 1
+    return count
+
+
+class BoundSignal:
+    """сигнал конкретного объекта: connect/disconnect/emit как у Qt
+
+    Обработчики вызываются сразу в потоке emit, в порядке подключения.
+    Лишние аргументы отбрасываются, если обработчик принимает меньше (как
+    в Qt). Методы объектов хранятся по слабой ссылке - подписка не держит
+    получателя живым и пропадает вместе с ним.
+    """
+
+    __slots__ = ('_slots',)
+
+    def __init__(self):
+        # (функция или слабая ссылка на метод, слабая ли ссылка, число аргументов)
+        self._slots: List[Tuple[Any, bool, Optional[int]]] = []
+
+    def connect(self, slot: Callable) -> None:
+        if getattr(slot, '__self__', None) is not None and hasattr(slot, '__func__'):
+            self._slots.append((weakref.WeakMethod(slot), True, _arg_count(slot)))
+        else:
+            self._slots.append((slot, False, _arg_count(slot)))
+
+    def disconnect(self, slot: Optional[Callable] = None) -> None:
+        """отключить slot (последнее подключение) или все обработчики"""
+        if slot is None:
+            self._slots.clear()
+            return
+
+        for i in range(len(self._slots) - 1, -1, -1):
+            ref, weak, _ = self._slots[i]
+            if (ref() if weak else ref) == slot:
+                del self._slots[i]
+                return
+        raise RuntimeError(f"{slot!r} не подключён")
+
+    def emit(self, *args: Any) -> None:
+        # копия: обработчик может подключать и отключать другие
+        for entry in list(self._slots):
+            ref, weak, count = entry
+            slot = ref() if weak else ref
+            if slot is None:
+                self._slots.remove(entry)
+                continue
+            slot(*(args if count is None else args[:count]))
+
+
+class Signal:
+    """объявление сигнала в классе без Qt: changed = Signal(int)
+
+    Типы аргументов только документируют сигнал. У каждого экземпляра
+    класса - свой BoundSignal.
+    """
+
+    def __init__(self, *types: Any):
+        self.types = types
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type = None):
+        if instance is None:
+            return self
+        signals: Dict[str, BoundSignal] = instance.__dict__.setdefault('_signals', {})
+        bound = signals.get(self.name)
+        if bound is None:
+            bound = signals[self.name] = BoundSignal()
+        return bound
@@ -0,0 +1,282 @@
+import sys
+import zlib
+from array import array
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models import Song
+
+# пустая ячейка и удаленная запись в хэш-таблице
+EMPTY = 0xFFFFFFFF
+DELETED = 0xFFFFFFFE
+
+# колонки-массивы, которые сохраняются в снимок как есть
+_ARRAY_COLUMNS = (
+    'artists', 'albums', 'genres', 'durations',
+    'text_start', 'title_length', 'text_length', 'table'
+)
+
+
+def id_hash(song_id: str) -> int:
+    """хэш id для таблицы; не hash(): он меняется между запусками, а таблица сохраняется в снимок"""
+    return zlib.crc32(song_id.encode('utf-8'))
+
+
+class StringTable:
+    """интернированные строки: одинаковые исполнители/альбомы/жанры хранятся один раз"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = len(self.strings)
+            value = sys.intern(value)
+            self.strings.append(value)
+            self._index[value] = index
+        return index
+
+
+class SongCatalog(MutableMapping):
+    """каталог песен в колонках
+
+    Вместо объекта Song на каждую песню хранятся массивы чисел и общий
+    буфер с текстом; Song создается при обращении. Поиск по id - своя
+    хэш-таблица с открытой адресацией поверх array.
+    """
+
+    # колонки для снимка каталога (dump_columns/load_columns)
+    COLUMNS = _ARRAY_COLUMNS + ('text',)
+
+    def __init__(self):
+        self._ids: List[Optional[str]] = []
+        self._artists = array('I')
+        self._albums = array('I')
+        self._genres = array('I')
+        self._durations = array('I')
+        # название и имя файла: utf-8 подряд в общем буфере; буфер и начала строк
+        # подменяются одной парой - поток поиска не должен видеть новые начала в старом буфере
+        self._text_columns: Tuple[bytearray, array] = (bytearray(), array('Q'))
+        self._title_length = array('I')
+        self._text_length = array('I')
+        self._garbage = 0  # байт в буфере от удаленных/измененных песен
+
+        self._strings = StringTable()
+        self._free_rows: List[int] = []
+        self._table = array('I', [EMPTY]) * 8
+        self._used_slots = 0  # занятые и удаленные ячейки таблицы
+        self._count = 0
+
+    @property
+    def _text(self) -> bytearray:
+        return self._text_columns[0]
+
+    @property
+    def _text_start(self) -> array:
+        return self._text_columns[1]
+
+    # --- хэш-таблица id -> строка ---
+
+    def _slot(self, song_id: str) -> int:
+        """Return: ячейка с песней или первая подходящая для вставки"""
+        mask = len(self._table) - 1
+        i = id_hash(song_id) & mask
+        free = -1
+        while True:
+            row = self._table[i]
+            if row == EMPTY:
+                return i if free < 0 else free
+            if row == DELETED:
+                if free < 0:
+                    free = i
+            elif self._ids[row] == song_id:
+                return i
+            i = (i + 1) & mask
+
+    def _find(self, song_id: str) -> int:
+        row = self._table[self._slot(song_id)]
+        return -1 if row >= DELETED else row
+
+    def _resize(self, size: int) -> None:
+        self._table = array('I', [EMPTY]) * size
+        mask = size - 1
+        for row, song_id in enumerate(self._ids):
+            if song_id is None:
+                continue
+            i = id_hash(song_id) & mask
+            while self._table[i] != EMPTY:
+                i = (i + 1) & mask
+            self._table[i] = row
+        self._used_slots = self._count
+
+    # --- Mapping ---
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, song_id: object) -> bool:
+        return isinstance(song_id, str) and self._find(song_id) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (song_id for song_id in list(self._ids) if song_id is not None)
+
+    def __getitem__(self, song_id: str) -> Song:
+        row = self._find(song_id)
+        if row < 0:
+            raise KeyError(song_id)
+        return self._song(row)
+
+    def get(self, song_id: str, default=None):
+        row = self._find(song_id)
+        return default if row < 0 else self._song(row)
+
+    def values(self) -> Iterator[Song]:
+        return (self._song(row) for row, song_id in enumerate(list(self._ids)) if song_id is not None)
+
+    def items(self) -> Iterator:
+        return ((song.id, song) for song in self.values())
+
+    def _song(self, row: int) -> Song:
+        text, text_start = self._text_columns
+        start = text_start[row]
+        middle = start + self._title_length[row]
+        title = text[start:middle].decode('utf-8')
+        filename = text[middle:start + self._text_length[row]].decode('utf-8')
+        strings = self._strings.strings
+        return Song(
+            id=self._ids[row],
+            title=title,
+            artist=strings[self._artists[row]],
+            album=strings[self._albums[row]],
+            genre=strings[self._genres[row]],
+            duration=self._durations[row],
+            filename=filename
+        )
+
+    # --- MutableMapping ---
+
+    def __setitem__(self, song_id: str, song: Song) -> None:
+        if song.id != song_id:
+            raise ValueError(f"id песни {song.id} не совпадает с ключом {song_id}")
+
+        title = song.title.encode('utf-8')
+        text = title + song.filename.encode('utf-8')
+        slot = self._slot(song_id)
+        row = self._table[slot]
+
+        if row < DELETED:
+            # обновление: старый текст становится мусором
+            self._garbage += self._text_length[row]
+        else:
+            if self._free_rows:
+                row = self._free_rows.pop()
+                self._ids[row] = song_id
+            else:
+                row = len(self._ids)
+                self._ids.append(song_id)
+                for column in (self._artists, self._albums, self._genres, self._durations,
+                               self._title_length, self._text_length):
+                    column.append(0)
+                self._text_start.append(0)
+            if self._table[slot] == EMPTY:
+                self._used_slots += 1
+            self._table[slot] = row
+            self._count += 1
+
+        self._artists[row] = self._strings.add(song.artist)
+        self._albums[row] = self._strings.add(song.album)
+        self._genres[row] = self._strings.add(song.genre)
+        self._durations[row] = song.duration
+        buffer, text_start = self._text_columns
+        start = len(buffer)
+        buffer += text
+        self._title_length[row] = len(title)
+        self._text_length[row] = len(text)
+        text_start[row] = start
+
+        # держим заполнение таблицы не больше половины;
+        # если в основном это удаленные ячейки - просто перестраиваем
+        if self._used_slots * 2 > len(self._table):
+            size = len(self._table)
+            self._resize(size * 2 if self._count * 4 > size else size)
+        self._compact_text_if_needed()
+
+    def __delitem__(self, song_id: str) -> None:
+        slot = self._slot(song_id)
+        row = self._table[slot]
+        if row >= DELETED:
+            raise KeyError(song_id)
+
+        self._table[slot] = DELETED
+        self._ids[row] = None
+        self._free_rows.append(row)
+        self._garbage += self._text_length[row]
+        self._text_length[row] = 0
+        self._count -= 1
+        self._compact_text_if_needed()
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _compact_text_if_needed(self) -> None:
+        """переписать буфер текста, если мусора больше половины"""
+        if self._garbage * 2 <= len(self._text) or self._garbage < 4096:
+            return
+
+        old_text, old_start = self._text_columns
+        text = bytearray()
+        text_start = array('Q', old_start)
+        for row, song_id in enumerate(self._ids):
+            if song_id is None:
+                continue
+            start = old_start[row]
+            text_start[row] = len(text)
+            text += old_text[start:start + self._text_length[row]]
+        self._text_columns = (text, text_start)
+        self._garbage = 0
+
+    # --- снимок (catalog_snapshot) ---
+
+    def _has_holes(self) -> bool:
+        return bool(self._free_rows or self._garbage or self._used_slots != self._count)
+
+    def compact(self) -> None:
+        """убрать дыры от удаленных песен, чтобы строки шли подряд"""
+        if self._has_holes():
+            songs = list(self.values())
+            self.clear()
+            for song in songs:
+                self[song.id] = song
+
+    def dump_columns(self) -> Tuple[List[str], List[str], Dict[str, bytes]]:
+        """Return: id по строкам, таблица строк, колонки в байтах
+
+        Сам каталог не меняется - его в это время читают другие потоки;
+        если в нём есть дыры, записывается сжатая копия.
+        """
+        if self._has_holes():
+            copy = SongCatalog()
+            for song in list(self.values()):
+                copy[song.id] = song
+            return copy.dump_columns()
+
+        columns = {
+            name: getattr(self, f"_{name}").tobytes() for name in _ARRAY_COLUMNS
+        }
+        columns['text'] = bytes(self._text)
+        return list(self._ids), list(self._strings.strings), columns
+
+    def load_columns(self, ids: List[str], strings: List[str], columns: Dict[str, bytes]) -> None:
+        """заполнить каталог колонками из dump_columns"""
+        self.clear()
+        self._table = array('I')
+        for name in _ARRAY_COLUMNS:
+            getattr(self, f"_{name}").frombytes(columns[name])
+        self._text_columns = (bytearray(columns['text']), self._text_start)
+        self._ids = ids
+        for value in strings:
+            self._strings.add(value)
+        self._count = self._used_slots = len(ids)
+
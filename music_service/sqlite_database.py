@@ -0,0 +1,639 @@
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from models import User, Song, Album, Artist, Genre, Playlist, Library
+from music_service.database import CATALOG_COLLECTIONS, Database
+from music_service.search_index import NGRAM, SearchIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    filename TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS songs_artist ON songs(artist);
+CREATE INDEX IF NOT EXISTS songs_album ON songs(album);
+CREATE INDEX IF NOT EXISTS songs_genre ON songs(genre);
+CREATE INDEX IF NOT EXISTS songs_title_nocase ON songs(title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS songs_artist_nocase ON songs(artist COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS albums (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    cover TEXT NOT NULL,
+    release_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS albums_artist_title ON albums(artist, title);
+
+CREATE TABLE IF NOT EXISTS album_songs (
+    album_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    song_id TEXT NOT NULL,
+    PRIMARY KEY (album_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS genres (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS genres_name ON genres(name);
+
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    library_id TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS libraries (
+    id TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS library_items (
+    library_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    PRIMARY KEY (library_id, kind, item_id)
+);
+CREATE INDEX IF NOT EXISTS library_items_order ON library_items(library_id, kind, position);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    author TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS playlists_author ON playlists(author);
+
+CREATE TABLE IF NOT EXISTS playlist_songs (
+    playlist_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    song_id TEXT NOT NULL,
+    PRIMARY KEY (playlist_id, position)
+);
+"""
+
+# полнотекстовый индекс по триграммам (SQLite 3.34+)
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+    song_id UNINDEXED, title, artist, album, genre, tokenize='trigram'
+);
+"""
+
+# виды элементов библиотеки
+LIBRARY_KINDS = ('songs', 'albums', 'playlists')
+
+
+def _search_score(title: str, artist: str, album: Optional[str], genre: Optional[str], query: str) -> int:
+    """SQL-функция search_score: lower() в SQLite не знает кириллицы, регистр снимает Python"""
+    fields = (title.lower(), artist.lower(), (album or "").lower(), (genre or "").lower())
+    return SearchIndex.match_score(fields, query)
+
+
+class SqliteDatabase(Database):
+    """хранилище в SQLite: строки читаются по требованию и кэшируются"""
+
+    DB_NAME = "music.db"
+
+    def __init__(self, data_dir: str = "data", db_name: str = DB_NAME, load: bool = True):
+        self.db_name = db_name
+        self.connection: Optional[sqlite3.Connection] = None
+        self.has_fts = False
+        self._data_version: Optional[int] = None
+        # соединение используется и из потока поиска
+        self._lock = threading.RLock()
+        super().__init__(data_dir, load=load)
+
+    def load_accounts(self) -> None:
+        """открыть базу; данные не читаются, пока не понадобятся"""
+        try:
+            self.connection = sqlite3.connect(
+                str(self.data_dir / self.db_name),
+                check_same_thread=False
+            )
+            self.connection.executescript(SCHEMA)
+            self.connection.create_function("search_score", 5, _search_score, deterministic=True)
+            try:
+                self.connection.executescript(FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                self.has_fts = False
+            self.connection.commit()
+            self._data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Ошибка открытия SQLite: {e}")
+
+        self.search_index = SqliteSearchIndex(self)
+
+    def load_catalog(self, progress: Optional[Callable[[str, int], None]] = None) -> None:
+        """каталог читается из базы по требованию - загружать нечего"""
+        if progress is not None:
+            for collection, percent in CATALOG_COLLECTIONS:
+                progress(collection, percent)
+
+    def close(self) -> None:
+        with self._lock:
+            if self.connection is not None:
+                self.connection.commit()
+                self.connection.close()
+                self.connection = None
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        with self._lock:
+            return self.connection.execute(sql, tuple(params)).fetchall()
+
+    def _write(self, statements: List[tuple]) -> None:
+        """выполнить запросы одной транзакцией
+
+        Внутри Database.transaction() фиксация откладывается до flush().
+        """
+        with self._lock:
+            try:
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        if params:
+                            self.connection.executemany(sql, params)
+                    else:
+                        self.connection.execute(sql, params)
+            except sqlite3.Error:
+                self.connection.rollback()
+                raise
+            if not self._transaction_depth:
+                self.connection.commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self.connection is not None:
+                self.connection.commit()
+
+    def poll_changes(self) -> Set[str]:
+        """SQLite сам блокирует запись; чужие коммиты видны по PRAGMA data_version
+
+        Какие таблицы поменялись, неизвестно - сообщаются все. Закэшированные
+        строки перечитываются и обновляются на месте: на объекты ссылаются
+        сервисы и окна, а база меняет именно их.
+        """
+        with self._lock:
+            if self.connection is None:
+                return set()
+            version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+            if self._data_version is None or version == self._data_version:
+                self._data_version = version
+                return set()
+            self._data_version = version
+
+            readers = {
+                'users': self._read_user, 'albums': self._read_album, 'genres': self._read_genre,
+                'playlists': self._read_playlist, 'libraries': self._read_library,
+            }
+            for collection, read in readers.items():
+                items = getattr(self, collection)
+                for key in list(items):
+                    self._refresh_cached(items, key, read(key))
+
+            song_ids = list(self.songs)
+            fresh = {}
+            for start in range(0, len(song_ids), 500):
+                fresh.update(self._read_songs(song_ids[start:start + 500]))
+            for song_id in song_ids:
+                self._refresh_cached(self.songs, song_id, fresh.get(song_id))
+        return {'users', 'songs', 'albums', 'genres', 'playlists', 'libraries'}
+
+    def _refresh_cached(self, items: Dict[str, Any], key: str, fresh: Optional[Any]) -> None:
+        """обновить закэшированный объект на месте; строки больше нет - убрать из кэша"""
+        if fresh is None:
+            items.pop(key, None)
+        elif items[key] != fresh:
+            self._replace_item(items, key, fresh)
+
+    # --- строки -> модели ---
+
+    @staticmethod
+    def _song_from_row(row: tuple) -> Song:
+        return Song(
+            id=row[0],
+            title=row[1],
+            artist=row[2],
+            album=row[3],
+            genre=row[4],
+            duration=row[5],
+            filename=row[6]
+        )
+
+    def _album_from_row(self, row: tuple) -> Album:
+        song_ids = [r[0] for r in self._query(
+            "SELECT song_id FROM album_songs WHERE album_id = ? ORDER BY position", (row[0],)
+        )]
+        return Album(
+            id=row[0],
+            title=row[1],
+            artist=row[2],
+            cover=row[3],
+            songs=song_ids,
+            release_date=row[4]
+        )
+
+    def _playlist_from_row(self, row: tuple) -> Playlist:
+        song_ids = [r[0] for r in self._query(
+            "SELECT song_id FROM playlist_songs WHERE playlist_id = ? ORDER BY position", (row[0],)
+        )]
+        return Playlist(
+            id=row[0],
+            title=row[1],
+            description=row[2],
+            author=row[3],
+            songs=song_ids
+        )
+
+    def _library_items(self, library_id: str, kind: str) -> List[str]:
+        return [r[0] for r in self._query(
+            "SELECT item_id FROM library_items WHERE library_id = ? AND kind = ? ORDER BY position",
+            (library_id, kind)
+        )]
+
+    # --- чтение ---
+
+    def _read_user(self, email: str) -> Optional[User]:
+        rows = self._query(
+            "SELECT email, username, password_hash, library_id FROM users WHERE email = ?", (email,)
+        )
+        return User(*rows[0]) if rows else None
+
+    def _read_songs(self, song_ids: List[str]) -> Dict[str, Song]:
+        """не больше 500 id - ограничение SQLite на число параметров"""
+        placeholders = ",".join("?" * len(song_ids))
+        rows = self._query(f"SELECT * FROM songs WHERE id IN ({placeholders})", song_ids)
+        return {row[0]: self._song_from_row(row) for row in rows}
+
+    def _read_album(self, album_id: str) -> Optional[Album]:
+        rows = self._query(
+            "SELECT id, title, artist, cover, release_date FROM albums WHERE id = ?", (album_id,)
+        )
+        return self._album_from_row(rows[0]) if rows else None
+
+    def _read_genre(self, genre_id: str) -> Optional[Genre]:
+        rows = self._query("SELECT id, name, description FROM genres WHERE id = ?", (genre_id,))
+        return Genre(*rows[0]) if rows else None
+
+    def _read_playlist(self, playlist_id: str) -> Optional[Playlist]:
+        rows = self._query(
+            "SELECT id, title, description, author FROM playlists WHERE id = ?", (playlist_id,)
+        )
+        return self._playlist_from_row(rows[0]) if rows else None
+
+    def _read_library(self, library_id: str) -> Optional[Library]:
+        if not self._query("SELECT id FROM libraries WHERE id = ?", (library_id,)):
+            return None
+        return Library(
+            id=library_id,
+            songs=self._library_items(library_id, 'songs'),
+            albums=self._library_items(library_id, 'albums'),
+            playlists=self._library_items(library_id, 'playlists')
+        )
+
+    def get_user(self, email: str) -> Optional[User]:
+        if email not in self.users:
+            user = self._read_user(email)
+            if user is None:
+                return None
+            self.users[email] = user
+        return self.users[email]
+
+    def get_song(self, song_id: str) -> Optional[Song]:
+        if song_id not in self.songs:
+            song = self._read_songs([song_id]).get(song_id)
+            if song is None:
+                return None
+            self.songs[song_id] = song
+        return self.songs[song_id]
+
+    def get_songs(self, song_ids: List[str]) -> List[Song]:
+        """получить несколько песен одним запросом, порядок сохраняется"""
+        missing = [song_id for song_id in song_ids if song_id not in self.songs]
+        for start in range(0, len(missing), 500):
+            self.songs.update(self._read_songs(missing[start:start + 500]))
+        return [self.songs[song_id] for song_id in song_ids if song_id in self.songs]
+
+    def _songs_where(self, column: str, value: str) -> List[Song]:
+        # column - только из кода, не от пользователя
+        songs = []
+        for row in self._query(f"SELECT * FROM songs WHERE {column} = ? ORDER BY artist, title", (value,)):
+            song = self.songs.get(row[0])
+            if song is None:
+                song = self.songs[row[0]] = self._song_from_row(row)
+            songs.append(song)
+        return songs
+
+    def get_songs_by_artist(self, artist: str) -> List[Song]:
+        return self._songs_where('artist', artist)
+
+    def get_songs_by_album(self, album_id: str) -> List[Song]:
+        return self._songs_where('album', album_id)
+
+    def get_songs_by_genre(self, genre_id: str) -> List[Song]:
+        return self._songs_where('genre', genre_id)
+
+    def find_album(self, artist: str, title: str) -> Optional[Album]:
+        rows = self._query("SELECT id FROM albums WHERE artist = ? AND title = ?", (artist, title))
+        return self.get_album(rows[0][0]) if rows else None
+
+    def find_genre_by_name(self, name: str) -> Optional[Genre]:
+        rows = self._query("SELECT id FROM genres WHERE name = ?", (name,))
+        return self.get_genre(rows[0][0]) if rows else None
+
+    def get_album(self, album_id: str) -> Optional[Album]:
+        if album_id not in self.albums:
+            album = self._read_album(album_id)
+            if album is None:
+                return None
+            self.albums[album_id] = album
+        return self.albums[album_id]
+
+    def get_genre(self, genre_id: str) -> Optional[Genre]:
+        if genre_id not in self.genres:
+            genre = self._read_genre(genre_id)
+            if genre is None:
+                return None
+            self.genres[genre_id] = genre
+        return self.genres[genre_id]
+
+    def get_playlist(self, playlist_id: str) -> Optional[Playlist]:
+        if playlist_id not in self.playlists:
+            playlist = self._read_playlist(playlist_id)
+            if playlist is None:
+                return None
+            self.playlists[playlist_id] = playlist
+        return self.playlists[playlist_id]
+
+    def get_library(self, library_id: str) -> Optional[Library]:
+        if library_id not in self.libraries:
+            library = self._read_library(library_id)
+            if library is None:
+                return None
+            self.libraries[library_id] = library
+        return self.libraries[library_id]
+
+    def get_all_songs(self) -> List[Song]:
+        songs = []
+        for row in self._query("SELECT * FROM songs"):
+            song = self.songs.get(row[0])
+            if song is None:
+                song = self.songs[row[0]] = self._song_from_row(row)
+            songs.append(song)
+        return songs
+
+    def get_all_albums(self) -> List[Album]:
+        ids = [r[0] for r in self._query("SELECT id FROM albums")]
+        return [album for album in map(self.get_album, ids) if album]
+
+    def get_all_artists(self) -> List[Artist]:
+        rows = self._query("SELECT artist FROM songs UNION SELECT artist FROM albums")
+        return [Artist(name=row[0]) for row in rows]
+
+    def get_all_genres(self) -> List[Genre]:
+        ids = [r[0] for r in self._query("SELECT id FROM genres")]
+        return [genre for genre in map(self.get_genre, ids) if genre]
+
+    def get_all_playlists(self) -> List[Playlist]:
+        ids = [r[0] for r in self._query("SELECT id FROM playlists")]
+        return [playlist for playlist in map(self.get_playlist, ids) if playlist]
+
+    # --- запись ---
+
+    def build_search_index(self) -> None:
+        """индекс поддерживается в таблице songs_fts"""
+
+    def _index_song(self, song: Song) -> None:
+        if not self.has_fts:
+            return
+        album = self.get_album(song.album)
+        genre = self.get_genre(song.genre)
+        self._write([
+            ("DELETE FROM songs_fts WHERE song_id = ?", (song.id,)),
+            ("INSERT INTO songs_fts (song_id, title, artist, album, genre) VALUES (?, ?, ?, ?, ?)",
+             (song.id, song.title, song.artist, album.title if album else "", genre.name if genre else "")),
+        ])
+
+    def save_songs(self) -> None:
+        """каждое изменение записывается сразу"""
+
+    def save_users(self) -> None:
+        """каждое изменение записывается сразу"""
+
+    def save_playlists(self) -> None:
+        """каждое изменение записывается сразу"""
+
+    def save_libraries(self) -> None:
+        """каждое изменение записывается сразу"""
+
+    def add_song(self, song: Song) -> None:
+        self.songs[song.id] = song
+        self._write([(
+            "INSERT OR REPLACE INTO songs VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (song.id, song.title, song.artist, song.album, song.genre, song.duration, song.filename)
+        )])
+        self._index_song(song)
+
+    def delete_song(self, song_id: str) -> None:
+        self.songs.pop(song_id, None)
+        statements = [("DELETE FROM songs WHERE id = ?", (song_id,))]
+        if self.has_fts:
+            statements.append(("DELETE FROM songs_fts WHERE song_id = ?", (song_id,)))
+        self._write(statements)
+
+    def add_album(self, album: Album) -> None:
+        self.albums[album.id] = album
+        self._write([
+            ("INSERT OR REPLACE INTO albums VALUES (?, ?, ?, ?, ?)",
+             (album.id, album.title, album.artist, album.cover, album.release_date)),
+            ("DELETE FROM album_songs WHERE album_id = ?", (album.id,)),
+            ("INSERT INTO album_songs VALUES (?, ?, ?)",
+             [(album.id, i, song_id) for i, song_id in enumerate(album.songs)]),
+        ])
+
+    def add_genre(self, genre: Genre) -> None:
+        self.genres[genre.id] = genre
+        self._write([(
+            "INSERT OR REPLACE INTO genres VALUES (?, ?, ?)",
+            (genre.id, genre.name, genre.description)
+        )])
+
+    def add_user(self, user: User) -> None:
+        self.users[user.email] = user
+        self._write([(
+            "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+            (user.email, user.username, user.password_hash, user.library_id)
+        )])
+
+    def delete_user(self, email: str) -> None:
+        self.users.pop(email, None)
+        self._write([("DELETE FROM users WHERE email = ?", (email,))])
+
+    def _playlist_statements(self, playlist: Playlist) -> List[tuple]:
+        return [
+            ("INSERT OR REPLACE INTO playlists VALUES (?, ?, ?, ?)",
+             (playlist.id, playlist.title, playlist.description, playlist.author)),
+            ("DELETE FROM playlist_songs WHERE playlist_id = ?", (playlist.id,)),
+            ("INSERT INTO playlist_songs VALUES (?, ?, ?)",
+             [(playlist.id, i, song_id) for i, song_id in enumerate(playlist.songs)]),
+        ]
+
+    def add_playlist(self, playlist: Playlist) -> None:
+        self.playlists[playlist.id] = playlist
+        self._write(self._playlist_statements(playlist))
+
+    def update_playlist(self, playlist: Playlist) -> None:
+        self.add_playlist(playlist)
+
+    def delete_playlist(self, playlist_id: str) -> None:
+        self.playlists.pop(playlist_id, None)
+        self._write([
+            ("DELETE FROM playlists WHERE id = ?", (playlist_id,)),
+            ("DELETE FROM playlist_songs WHERE playlist_id = ?", (playlist_id,)),
+        ])
+
+    def add_playlist_song(self, playlist: Playlist, song_id: str) -> None:
+        if song_id not in playlist.songs:
+            playlist.songs.append(song_id)
+            self._write([(
+                "INSERT INTO playlist_songs VALUES (?, "
+                "(SELECT COALESCE(MAX(position), -1) + 1 FROM playlist_songs WHERE playlist_id = ?), ?)",
+                (playlist.id, playlist.id, song_id)
+            )])
+
+    def remove_playlist_song(self, playlist: Playlist, song_id: str) -> None:
+        if song_id in playlist.songs:
+            playlist.songs.remove(song_id)
+            self._write([(
+                "DELETE FROM playlist_songs WHERE playlist_id = ? AND song_id = ?",
+                (playlist.id, song_id)
+            )])
+
+    def add_library(self, library: Library) -> None:
+        self.update_library(library)
+
+    def add_library_item(self, library: Library, field: str, item_id: str) -> None:
+        items = getattr(library, field)
+        if item_id not in items:
+            items.append(item_id)
+            self._write([(
+                "INSERT OR IGNORE INTO library_items VALUES (?, ?, "
+                "(SELECT COALESCE(MAX(position), -1) + 1 FROM library_items "
+                "WHERE library_id = ? AND kind = ?), ?)",
+                (library.id, field, library.id, field, item_id)
+            )])
+
+    def remove_library_item(self, library: Library, field: str, item_id: str) -> None:
+        items = getattr(library, field)
+        if item_id in items:
+            items.remove(item_id)
+            self._write([(
+                "DELETE FROM library_items WHERE library_id = ? AND kind = ? AND item_id = ?",
+                (library.id, field, item_id)
+            )])
+
+    def update_library(self, library: Library) -> None:
+        self.libraries[library.id] = library
+        statements = [
+            ("INSERT OR IGNORE INTO libraries VALUES (?)", (library.id,)),
+            ("DELETE FROM library_items WHERE library_id = ?", (library.id,)),
+        ]
+        for kind in LIBRARY_KINDS:
+            items = [(library.id, kind, i, item_id) for i, item_id in enumerate(getattr(library, kind))]
+            if items:
+                statements.append(("INSERT INTO library_items VALUES (?, ?, ?, ?)", items))
+        self._write(statements)
+
+    def import_database(self, source: Database) -> None:
+        """перенести все данные из другой базы (одна транзакция)"""
+        statements = [
+            ("INSERT OR REPLACE INTO genres VALUES (?, ?, ?)",
+             [(g.id, g.name, g.description) for g in source.genres.values()]),
+            ("INSERT OR REPLACE INTO albums VALUES (?, ?, ?, ?, ?)",
+             [(a.id, a.title, a.artist, a.cover, a.release_date) for a in source.albums.values()]),
+            ("INSERT OR REPLACE INTO album_songs VALUES (?, ?, ?)",
+             [(a.id, i, song_id) for a in source.albums.values() for i, song_id in enumerate(a.songs)]),
+            ("INSERT OR REPLACE INTO songs VALUES (?, ?, ?, ?, ?, ?, ?)",
+             [(s.id, s.title, s.artist, s.album, s.genre, s.duration, s.filename)
+              for s in source.songs.values()]),
+            ("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+             [(u.email, u.username, u.password_hash, u.library_id) for u in source.users.values()]),
+        ]
+        for playlist in source.playlists.values():
+            statements.extend(self._playlist_statements(playlist))
+        statements.append(("INSERT OR IGNORE INTO libraries VALUES (?)",
+                           [(library_id,) for library_id in source.libraries]))
+        for kind in LIBRARY_KINDS:
+            statements.append(("INSERT OR REPLACE INTO library_items VALUES (?, ?, ?, ?)",
+                               [(library.id, kind, i, item_id)
+                                for library in source.libraries.values()
+                                for i, item_id in enumerate(getattr(library, kind))]))
+        if self.has_fts:
+            statements.append(("DELETE FROM songs_fts", ()))
+            rows = []
+            for song in source.songs.values():
+                album = source.albums.get(song.album)
+                genre = source.genres.get(song.genre)
+                rows.append((song.id, song.title, song.artist,
+                             album.title if album else "", genre.name if genre else ""))
+            statements.append(("INSERT INTO songs_fts (song_id, title, artist, album, genre) "
+                               "VALUES (?, ?, ?, ?, ?)", rows))
+
+        self._write(statements)
+
+
+class SqliteSearchIndex:
+    """поиск песен с тем же отбором и ранжированием, что и SearchIndex
+
+    Оценка считается в SQL для каждого кандидата (функция search_score),
+    так что в limit попадают лучшие совпадения, а не первые найденные.
+    """
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+
+    def search(self, query: str, limit: int = 100) -> List[str]:
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        if len(query) >= NGRAM and self.database.has_fts:
+            # фраза в кавычках - кандидаты с подстрокой по триграммам
+            phrase = '"' + query.replace('"', '""') + '"'
+            rows = self.database._query(
+                "SELECT song_id FROM ("
+                "  SELECT song_id, title, artist, search_score(title, artist, album, genre, ?) AS score"
+                "  FROM songs_fts WHERE songs_fts MATCH ?"
+                ") WHERE score > 0 ORDER BY score DESC, artist, title, song_id LIMIT ?",
+                (query, phrase, limit)
+            )
+        else:
+            # короткий запрос (начало слова в любом поле) или нет FTS - полный просмотр
+            rows = self.database._query(
+                "SELECT id FROM ("
+                "  SELECT songs.id, songs.title, songs.artist,"
+                "    search_score(songs.title, songs.artist, albums.title, genres.name, ?) AS score"
+                "  FROM songs LEFT JOIN albums ON albums.id = songs.album"
+                "  LEFT JOIN genres ON genres.id = songs.genre"
+                ") WHERE score > 0 ORDER BY score DESC, artist, title, id LIMIT ?",
+                (query, limit)
+            )
+        return [row[0] for row in rows]
+
+    # индекс обновляет сама база
+    def add(self, song: Song, album_title: str = "", genre_name: str = "") -> None:
+        self.database._index_song(song)
+
+    def remove(self, song_id: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
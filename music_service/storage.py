@@ -0,0 +1,14 @@
+from pathlib import Path
+
+from music_service.database import Database
+from music_service.sharded_database import SHARDS_DIR, ShardedDatabase
+from music_service.sqlite_database import SqliteDatabase
+
+
+def open_database(data_dir: str = "data", load: bool = True) -> Database:
+    """SQLite, если база уже перенесена, шарды, если разложены, иначе JSON/XML"""
+    if (Path(data_dir) / SqliteDatabase.DB_NAME).exists():
+        return SqliteDatabase(data_dir, load=load)
+    if (Path(data_dir) / SHARDS_DIR).is_dir():
+        return ShardedDatabase(data_dir, load=load)
+    return Database(data_dir, load=load)
@@ -0,0 +1,266 @@
+"""раздача файлов песен по HTTP с Range-запросами
+
+python -m music_service.stream_server --data-dir data --port 8081
+
+GET /songs/<id> - файл песни; Range: bytes=a-b отдаёт кусок (206), так что
+плеер может перематывать, не скачивая файл целиком. Тело уходит через
+loop.sendfile - на Linux это os.sendfile без копирования в процесс. Буфер
+записи соединения ограничен, соединений не больше max_clients - лишние
+получают 503 с Retry-After.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import mimetypes
+import os
+import re
+import sys
+from http import HTTPStatus
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+
+from music_service.api_server import ApiError, Request, read_request
+from music_service.database import Database
+from music_service.storage import open_database
+
+logger = logging.getLogger(__name__)
+
+KEEP_ALIVE_SECONDS = 15
+
+# сколько слушателей обслуживать одновременно (по дескриптору на каждого)
+MAX_CLIENTS = 1000
+
+# предел буфера записи соединения: медленный слушатель не копит файл в памяти
+WRITE_BUFFER_BYTES = 256 * 1024
+
+SONG_PATH = re.compile(r"/songs/([^/]+)")
+RANGE_HEADER = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(начало, конец включительно) из заголовка Range; None - отдавать файл целиком
+
+    Несколько диапазонов сразу не поддерживаются - тогда тоже весь файл,
+    это разрешено RFC 9110. Непересекающийся с файлом диапазон - 416.
+    """
+    if not header:
+        return None
+    match = RANGE_HEADER.fullmatch(header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # bytes=-n: последние n байт
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ApiError(416, "пустой диапазон", [f"Content-Range: bytes */{size}"])
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ApiError(416, "диапазон за пределами файла", [f"Content-Range: bytes */{size}"])
+    return start, min(end, size - 1)
+
+
+class StreamServer:
+    """сервер файлов песен на asyncio, без Qt"""
+
+    def __init__(self, database: Database, songs_dir: str = "data/songs", host: str = "127.0.0.1",
+                 port: int = 8081, max_clients: int = MAX_CLIENTS, keep_alive: float = KEEP_ALIVE_SECONDS,
+                 write_buffer: int = WRITE_BUFFER_BYTES):
+        self.database = database
+        self.songs_dir = Path(songs_dir)
+        self.host = host
+        self.port = port
+        self.max_clients = max_clients
+        self.keep_alive = keep_alive
+        self.write_buffer = write_buffer
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: set = set()
+        self.bytes_sent = 0
+        self.rejected = 0
+
+    @property
+    def url(self) -> str:
+        """адрес для PlayerService(stream_url=...)"""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def active_clients(self) -> int:
+        return len(self._connections)
+
+    async def start(self) -> None:
+        """начать принимать соединения; port=0 - любой свободный (см. self.port)"""
+        self._server = await asyncio.start_server(
+            self._serve_connection, self.host, self.port, backlog=min(self.max_clients, 4096)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if len(self._connections) >= self.max_clients:
+            self.rejected += 1
+            await self._close(writer, self._error(503, "слишком много слушателей", ["Retry-After: 1"]))
+            return
+
+        self._connections.add(writer)
+        writer.transport.set_write_buffer_limits(high=self.write_buffer)
+        response = b""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), self.keep_alive)
+                except ApiError as e:
+                    response = self._error(e.status, e.message)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                if request is None:
+                    break
+
+                try:
+                    await self._send_song(request, writer)
+                except ApiError as e:
+                    writer.write(self._error(e.status, e.message, e.headers, request.keep_alive))
+                    await writer.drain()
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            # слушатель ушёл посреди файла
+            response = b""
+        finally:
+            self._connections.discard(writer)
+            await self._close(writer, response)
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter, response: bytes) -> None:
+        try:
+            if response:
+                writer.write(response)
+                await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    def _head(self, status: int, headers: List[str], keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"] + list(headers)
+        if keep_alive:
+            lines += ["Connection: keep-alive", f"Keep-Alive: timeout={int(self.keep_alive)}"]
+        else:
+            lines.append("Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+    def _error(self, status: int, message: str, headers: Sequence[str] = (), keep_alive: bool = False) -> bytes:
+        body = json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+        headers = ["Content-Type: application/json; charset=utf-8", f"Content-Length: {len(body)}", *headers]
+        return self._head(status, headers, keep_alive) + body
+
+    def _song_path(self, request: Request) -> Path:
+        match = SONG_PATH.fullmatch(request.path)
+        if match is None:
+            raise ApiError(404, "не найдено")
+        if request.method not in ('GET', 'HEAD'):
+            raise ApiError(405, "метод не поддерживается")
+
+        song = self.database.get_song(match.group(1))
+        if song is None or not song.filename:
+            raise ApiError(404, "песня не найдена")
+        # имя файла из каталога не должно выводить за папку песен
+        path = (self.songs_dir / song.filename).resolve()
+        if not path.is_relative_to(self.songs_dir.resolve()) or not path.is_file():
+            raise ApiError(404, "файл песни не найден")
+        return path
+
+    def _open_song(self, request: Request) -> Tuple[Path, BinaryIO, os.stat_result]:
+        """найти и открыть файл песни - в пуле потоков, диск не должен держать цикл событий"""
+        path = self._song_path(request)
+        f = open(path, 'rb')
+        try:
+            return path, f, os.fstat(f.fileno())
+        except OSError:
+            f.close()
+            raise
+
+    async def _send_song(self, request: Request, writer: asyncio.StreamWriter) -> None:
+        path, f, stat = await asyncio.get_running_loop().run_in_executor(None, self._open_song, request)
+        with f:
+            size = stat.st_size
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+            content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            headers = [f"Content-Type: {content_type}", "Accept-Ranges: bytes", f"ETag: {etag}"]
+
+            if etag in request.headers.get('if-none-match', ""):
+                writer.write(self._head(304, headers, request.keep_alive))
+                await writer.drain()
+                return
+
+            byte_range = None
+            # If-Range: кусок, только если файл не поменялся с прошлого ответа
+            if request.headers.get('if-range', etag) == etag:
+                byte_range = parse_range(request.headers.get('range'), size)
+
+            if byte_range is None:
+                status, start, count = 200, 0, size
+            else:
+                status, start = 206, byte_range[0]
+                count = byte_range[1] - start + 1
+                headers.append(f"Content-Range: bytes {start}-{byte_range[1]}/{size}")
+            headers.append(f"Content-Length: {count}")
+
+            writer.write(self._head(status, headers, request.keep_alive))
+            await writer.drain()
+            if request.method == 'HEAD' or count == 0:
+                return
+
+            # os.sendfile, если транспорт его поддерживает, иначе чтение кусками с ожиданием буфера
+            sent = await asyncio.get_running_loop().sendfile(writer.transport, f, start, count)
+            self.bytes_sent += sent
+
+
+async def serve(data_dir: str, host: str, port: int, max_clients: int) -> None:
+    database = open_database(data_dir)
+    server = StreamServer(database, str(Path(data_dir) / "songs"), host, port, max_clients)
+    await server.start()
+    logger.info("стриминг: %s/songs/<id>", server.url)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        database.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="раздача песен music_service по HTTP")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--max-clients", type=int, default=MAX_CLIENTS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args.data_dir, args.host, args.port, args.max_clients))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
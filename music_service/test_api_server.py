@@ -0,0 +1,204 @@
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from music_service.api_benchmark import HttpConnection, run_load
+from music_service.api_server import ApiServer
+from music_service.database import Database
+
+SONGS = {
+    str(i): {"title": f"Song {i:02}", "artist": "Queen" if i % 2 else "Кино", "album": "a1" if i % 2 else "a2",
+             "genre": "g1", "duration": 100 + i, "filename": f"{i}.mp3"}
+    for i in range(1, 8)
+}
+ALBUMS = {
+    "a1": {"title": "A Night at the Opera", "artist": "Queen", "cover": "", "songs": ["1", "3", "5", "7"], "release_date": "1975"},
+    "a2": {"title": "Группа крови", "artist": "Кино", "cover": "", "songs": ["2", "4", "6"], "release_date": "1988"},
+}
+GENRES = """<?xml version="1.0" encoding="utf-8"?>
+<genres>
+  <genre id="g1"><name>Rock</name><description>rock</description></genre>
+</genres>
+"""
+
+
+class TestApiServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmp.name)
+        (data_dir / "songs.json").write_text(json.dumps(SONGS), encoding='utf-8')
+        (data_dir / "albums.json").write_text(json.dumps(ALBUMS), encoding='utf-8')
+        (data_dir / "genres.xml").write_text(GENRES, encoding='utf-8')
+
+        self.database = Database(self.tmp.name, save_delay=0)
+        self.server = ApiServer(self.database, port=0, poll_seconds=0)
+        await self.server.start()
+        self.client = HttpConnection(self.server.host, self.server.port)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+        self.database.close()
+        self.tmp.cleanup()
+
+    async def login(self) -> dict:
+        status, data = await self.client.json('POST', "/auth/register", {
+            'email': "user@example.com", 'username': "user", 'password': "password123",
+        })
+        self.assertEqual(status, 201, data)
+        return {'Authorization': f"Bearer {data['token']}"}
+
+    async def test_pagination(self):
+        ids = []
+        path = "/songs?limit=3"
+        while True:
+            status, page = await self.client.json('GET', path)
+            self.assertEqual(status, 200)
+            self.assertEqual(page['total'], 7)
+            ids += [song['id'] for song in page['items']]
+            if page['next'] is None:
+                break
+            path = f"/songs?limit=3&offset={page['next']}"
+
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(set(ids), set(SONGS))
+        self.assertNotIn('filename', page['items'][0])
+
+        status, data = await self.client.json('GET', "/songs?limit=-1")
+        self.assertEqual(status, 400)
+
+    async def test_etag_not_modified(self):
+        status, headers, body = await self.client.request('GET', "/albums/a1")
+        self.assertEqual(status, 200)
+        self.assertEqual([song['id'] for song in json.loads(body)['songs']], ["1", "3", "5", "7"])
+
+        status, _, body = await self.client.request('GET', "/albums/a1", headers={'If-None-Match': headers['etag']})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+
+        status, _, _ = await self.client.request('GET', "/albums/a2", headers={'If-None-Match': headers['etag']})
+        self.assertEqual(status, 200)
+
+    async def test_keep_alive(self):
+        for path in ("/genres", "/artists", "/search?q=queen", "/genres/g1/songs"):
+            status, _, _ = await self.client.request('GET', path)
+            self.assertEqual(status, 200)
+        self.assertEqual(self.client.connects, 1)
+
+        status, headers, _ = await self.client.request('GET', "/genres", headers={'Connection': "close"})
+        self.assertEqual(headers['connection'], "close")
+        await self.client.request('GET', "/genres")
+        self.assertEqual(self.client.connects, 2)
+
+    async def test_errors(self):
+        self.assertEqual((await self.client.json('GET', "/nothing"))[0], 404)
+        self.assertEqual((await self.client.json('GET', "/songs/404"))[0], 404)
+        self.assertEqual((await self.client.json('DELETE', "/songs"))[0], 405)
+        self.assertEqual((await self.client.json('GET', "/me/library/songs"))[0], 401)
+        status, data = await self.client.json('POST', "/auth/login", {'email': "x@example.com", 'password': "bad"})
+        self.assertEqual(status, 401)
+        self.assertIn('error', data)
+
+    async def test_library_and_playlists(self):
+        auth = await self.login()
+
+        self.assertEqual((await self.client.json('PUT', "/me/library/songs/3", headers=auth))[0], 204)
+        self.assertEqual((await self.client.json('PUT', "/me/library/songs/missing", headers=auth))[0], 404)
+        status, page = await self.client.json('GET', "/me/library/songs", headers=auth)
+        self.assertEqual([song['id'] for song in page['items']], ["3"])
+        status, page = await self.client.json('GET', "/me/library/artists", headers=auth)
+        self.assertEqual(page['items'], ["Queen"])
+
+        status, playlist = await self.client.json('POST', "/me/playlists", {'title': "Mix", 'songs': ["1"]}, headers=auth)
+        self.assertEqual(status, 201)
+        path = f"/me/playlists/{playlist['id']}/songs/2"
+        self.assertEqual((await self.client.json('PUT', path, headers=auth))[0], 204)
+
+        status, data = await self.client.json('GET', f"/playlists/{playlist['id']}")
+        self.assertEqual([song['id'] for song in data['songs']], ["1", "2"])
+        status, playlists = await self.client.json('GET', "/me/playlists", headers=auth)
+        self.assertEqual([item['id'] for item in playlists], [playlist['id']])
+
+        # изменения записаны в журнал - видны новому процессу
+        self.database.flush()
+        reloaded = Database(self.tmp.name, save_delay=0)
+        self.assertEqual(list(reloaded.get_playlist(playlist['id']).songs), ["1", "2"])
+
+        self.assertEqual((await self.client.json('DELETE', f"/me/playlists/{playlist['id']}", headers=auth))[0], 204)
+        self.assertEqual((await self.client.json('GET', f"/playlists/{playlist['id']}"))[0], 404)
+
+        self.assertEqual((await self.client.json('POST', "/auth/logout", headers=auth))[0], 204)
+        self.assertEqual((await self.client.json('GET', "/me", headers=auth))[0], 401)
+
+    async def test_disk_work_off_event_loop(self):
+        # flush() с fsync и poll_changes() не должны выполняться в потоке цикла событий
+        threads = {}
+
+        def record(method):
+            def wrapper(*args, **kwargs):
+                threads.setdefault(method.__name__, set()).add(threading.current_thread())
+                return method(*args, **kwargs)
+            return wrapper
+
+        with mock.patch.object(self.database, 'flush', record(self.database.flush)), \
+                mock.patch.object(self.database, 'poll_changes', record(self.database.poll_changes)):
+            auth = await self.login()
+            self.assertEqual((await self.client.json('PUT', "/me/library/songs/3", headers=auth))[0], 204)
+
+            self.server.poll_seconds = 0.01
+            poll_task = asyncio.create_task(self.server._poll_changes())
+            for _ in range(100):
+                if 'poll_changes' in threads:
+                    break
+                await asyncio.sleep(0.01)
+            poll_task.cancel()
+
+        self.assertEqual(set(threads), {'flush', 'poll_changes'})
+        for method_threads in threads.values():
+            self.assertNotIn(threading.current_thread(), method_threads)
+
+    async def test_reads_and_writes_share_one_thread(self):
+        # чтение библиотеки не должно идти одновременно с её изменением
+        threads = set()
+        dispatch = self.server.dispatch
+
+        def record(request):
+            threads.add(threading.current_thread())
+            return dispatch(request)
+
+        with mock.patch.object(self.server, 'dispatch', record):
+            auth = await self.login()
+            self.assertEqual((await self.client.json('PUT', "/me/library/songs/3", headers=auth))[0], 204)
+            self.assertEqual((await self.client.json('GET', "/me/library/albums", headers=auth))[0], 200)
+            self.assertEqual((await self.client.json('GET', "/songs/1"))[0], 200)
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    async def test_load(self):
+        report = await run_load(self.server.host, self.server.port, connections=5, requests=200)
+        self.assertEqual(report['requests'], 200)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['connects'], 5)
+
+
+class TestApiWithoutQt(unittest.TestCase):
+
+    def test_no_qt_import(self):
+        code = ("import sys; before = set(sys.modules); import music_service.api_server; "
+                "print(any(name.startswith('PySide6') for name in set(sys.modules) - before))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent.parent)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
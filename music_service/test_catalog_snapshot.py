@@ -0,0 +1,128 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import Album, Genre, Song
+from music_service.catalog_snapshot import SNAPSHOT_NAME
+from music_service.database import Database
+from music_service.song_catalog import SongCatalog
+
+SONGS = {
+    "1": {"title": "Bohemian Rhapsody", "artist": "Queen", "album": "a1", "genre": "g1", "duration": 354, "filename": "1.mp3"},
+    "2": {"title": "Ночь", "artist": "Кино", "album": "a2", "genre": "g2", "duration": 200, "filename": "2.mp3"},
+    "3": {"title": "Killer Queen", "artist": "Queen", "album": "a1", "genre": "g1", "duration": 180, "filename": "3.mp3"},
+}
+ALBUMS = {
+    "a1": {"title": "A Night at the Opera", "artist": "Queen", "cover": "", "songs": ["1", "3", "missing"], "release_date": "1975"},
+    "a2": {"title": "Группа крови", "artist": "Кино", "cover": "", "songs": ["2"], "release_date": "1988"},
+}
+GENRES = """<?xml version="1.0" encoding="utf-8"?>
+<genres>
+  <genre id="g1"><name>Rock</name><description>rock</description></genre>
+  <genre id="g2"><name>Рок</name><description>рок</description></genre>
+</genres>
+"""
+
+
+class TestCatalogSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        (self.dir / "songs.json").write_text(json.dumps(SONGS), encoding='utf-8')
+        (self.dir / "albums.json").write_text(json.dumps(ALBUMS), encoding='utf-8')
+        (self.dir / "genres.xml").write_text(GENRES, encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_matches_source_load(self):
+        source = Database(self.tmp.name, save_delay=0)
+        self.assertTrue((self.dir / SNAPSHOT_NAME).exists())
+
+        snapshot = Database(self.tmp.name, save_delay=0)
+        self.assertIsNotNone(snapshot.search_index._base)
+
+        self.assertEqual(dict(snapshot.songs.items()), dict(source.songs.items()))
+        self.assertEqual(snapshot.albums, source.albums)
+        self.assertEqual(snapshot.genres, source.genres)
+        self.assertEqual(snapshot.artists, source.artists)
+        self.assertEqual(snapshot.get_songs_by_artist("Queen"), source.get_songs_by_artist("Queen"))
+        self.assertEqual(snapshot.find_album("Кино", "Группа крови").id, "a2")
+        for query in ("queen", "qu", "ноч", "rock", "x"):
+            self.assertEqual(snapshot.search_index.search(query), source.search_index.search(query))
+
+    def test_changes_on_top_of_snapshot(self):
+        Database(self.tmp.name, save_delay=0)
+        database = Database(self.tmp.name, save_delay=0)
+
+        database.add_song(Song("4", "Queen of Hearts", "Dave", "a1", "g1", 100, "4.mp3"))
+        database.delete_song("3")
+
+        self.assertEqual(database.search_index.search("queen"), ["4", "1"])
+        self.assertNotIn("3", database.search_index)
+        self.assertEqual(len(database.search_index), 3)
+
+    def test_snapshot_leaves_catalog_untouched(self):
+        database = Database(self.tmp.name, save_delay=0)
+        database.delete_song("1")
+        ids = list(database.songs._ids)
+        self.assertIn(None, ids)
+
+        database.save_snapshot()
+        self.assertEqual(database.songs._ids, ids)
+
+        snapshot = Database(self.tmp.name, save_delay=0)
+        self.assertEqual(dict(snapshot.songs.items()), dict(database.songs.items()))
+
+    def test_rename_album_and_genre(self):
+        Database(self.tmp.name, save_delay=0)
+        database = Database(self.tmp.name, save_delay=0)
+
+        database.add_album(Album("a2", "Звезда по имени Солнце", "Кино", "", ["2"], "1989"))
+        database.add_genre(Genre("g2", "Пост-панк", ""))
+
+        self.assertEqual(database.search_index.search("звезда"), ["2"])
+        self.assertEqual(database.search_index.search("пост-панк"), ["2"])
+        self.assertEqual(database.search_index.search("крови"), [])
+        self.assertEqual(database.find_album("Кино", "Звезда по имени Солнце").id, "a2")
+        self.assertIsNone(database.find_album("Кино", "Группа крови"))
+        self.assertEqual([song.id for song in database.get_songs_by_album("a2")], ["2"])
+        self.assertEqual([song.id for song in database.get_songs_by_genre("g2")], ["2"])
+
+    def test_changed_source_rebuilds(self):
+        Database(self.tmp.name, save_delay=0)
+        songs = dict(SONGS, **{"5": dict(SONGS["1"], title="Radio Ga Ga")})
+        (self.dir / "songs.json").write_text(json.dumps(songs), encoding='utf-8')
+
+        database = Database(self.tmp.name, save_delay=0)
+        self.assertIsNone(database.search_index._base)
+        self.assertEqual(database.search_index.search("radio"), ["5"])
+
+
+
+class TestSongCatalog(unittest.TestCase):
+
+    def test_text_compaction_keeps_old_view(self):
+        catalog = SongCatalog()
+        for number in range(50):
+            catalog[str(number)] = Song(str(number), f"Песня {number}", "Кино", "a1", "g1", 100, f"{number}.mp3")
+
+        # так видит буфер поток поиска, начавший читать до сжатия
+        text, text_start = catalog._text_columns
+        starts = list(text_start[1:])
+        for _ in range(100):
+            catalog["0"] = Song("0", "x" * 100, "Кино", "a1", "g1", 100, "0.mp3")
+
+        self.assertIsNot(catalog._text_columns[0], text)
+        # строку 0 меняли до сжатия, остальные начала при сжатии не тронуты
+        self.assertEqual(list(text_start[1:]), starts)
+        start = text_start[7]
+        self.assertEqual(text[start:start + catalog._title_length[7]].decode('utf-8'), "Песня 7")
+        self.assertEqual(catalog["7"].title, "Песня 7")
+        self.assertEqual(catalog["0"].title, "x" * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
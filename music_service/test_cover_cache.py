@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from PySide6.QtGui import QColor, QImage
+
+from music_service.cover_cache import cover_path, load_thumbnail, thumbnail_path
+
+
+class TestLoadThumbnail(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+        image = QImage(400, 300, QImage.Format_RGB32)
+        image.fill(QColor("red"))
+        image.save(str(cover_path(self.dir, "1")), "JPG")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scaled_and_saved_to_disk(self):
+        image = load_thumbnail(self.dir, "1", 190)
+
+        self.assertEqual((image.width(), image.height()), (190, 190))
+        self.assertTrue(thumbnail_path(self.dir, "1", 190).exists())
+
+    def test_disk_thumbnail_reused_until_source_changes(self):
+        load_thumbnail(self.dir, "1", 50)
+        thumb = thumbnail_path(self.dir, "1", 50)
+
+        marker = QImage(50, 50, QImage.Format_RGB32)
+        marker.fill(QColor("blue"))
+        marker.save(str(thumb), "JPG")
+        self.assertGreater(load_thumbnail(self.dir, "1", 50).pixelColor(25, 25).blue(), 200)
+
+        source = cover_path(self.dir, "1")
+        stat = thumb.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertGreater(load_thumbnail(self.dir, "1", 50).pixelColor(25, 25).red(), 200)
+
+    def test_missing_cover(self):
+        self.assertTrue(load_thumbnail(self.dir, "404", 190).isNull())
+        self.assertFalse((self.dir / "thumbs").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+import multiprocessing
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from models import Library, Playlist
+from music_service.database import Database
+from music_service.journal import Journal
+from music_service.sharded_database import ShardedDatabase
+
+
+def open_database(data_dir: str, cls=Database, save_delay: float = 0) -> Database:
+    database = cls(data_dir, save_delay=save_delay, load=False)
+    database.load_accounts()
+    return database
+
+
+def add_songs(data_dir: str, prefix: str, count: int) -> None:
+    database = open_database(data_dir)
+    playlist = database.get_playlist("p1")
+    for number in range(count):
+        database.add_playlist_song(playlist, f"{prefix}{number}")
+        if number % 10 == 9:
+            database.compact()
+    database.close()
+
+
+class TestDatabaseSync(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.first = open_database(self.tmp.name)
+        self.first.add_playlist(Playlist("p1", "title", "", "a@mail.ru", []))
+        self.second = open_database(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_poll_picks_up_appended_records(self):
+        self.first.add_playlist_song(self.first.get_playlist("p1"), "1")
+        self.first.add_library(Library("l1", ["1"], [], []))
+
+        self.assertEqual(self.second.poll_changes(), {'playlists', 'libraries'})
+        self.assertEqual(self.second.get_playlist("p1").songs, ["1"])
+        self.assertEqual(self.second.get_library("l1").songs, ["1"])
+        self.assertEqual(self.second.poll_changes(), set())
+
+    def test_item_changes_merge(self):
+        self.first.add_playlist_song(self.first.get_playlist("p1"), "1")
+        self.second.add_playlist_song(self.second.get_playlist("p1"), "2")
+        self.first.poll_changes()
+
+        for database in (self.first, self.second, open_database(self.tmp.name)):
+            self.assertEqual(database.get_playlist("p1").songs, ["1", "2"])
+
+    def test_stale_replace_loses_and_is_reported(self):
+        slow = open_database(self.tmp.name, save_delay=60)
+        playlist = slow.get_playlist("p1")
+        playlist.title = "stale"
+        slow.update_playlist(playlist)
+
+        self.first.add_playlist_song(self.first.get_playlist("p1"), "1")
+        slow.flush()
+
+        self.assertEqual(slow.take_conflicts(), [('playlists', 'p1')])
+        self.assertEqual(slow.get_playlist("p1").title, "title")
+        self.assertEqual(open_database(self.tmp.name).get_playlist("p1").songs, ["1"])
+
+    def test_poll_after_compaction(self):
+        self.first.add_playlist_song(self.first.get_playlist("p1"), "1")
+        self.first.compact()
+        self.first.add_playlist_song(self.first.get_playlist("p1"), "2")
+
+        # сжатие одно - хвост дочитывается из .prev, снимки не перечитываются
+        with mock.patch.object(Database, '_read_snapshot') as read_snapshot:
+            self.assertEqual(self.second.poll_changes(), {'playlists'})
+        read_snapshot.assert_not_called()
+        self.assertEqual(self.second.get_playlist("p1").songs, ["1", "2"])
+
+        self.first.compact()
+        self.first.add_playlist_song(self.first.get_playlist("p1"), "3")
+        self.first.compact()
+        self.assertEqual(self.second.poll_changes(), {'playlists'})
+        self.assertEqual(self.second.get_playlist("p1").songs, ["1", "2", "3"])
+
+    def test_mutation_during_background_reload(self):
+        background = open_database(self.tmp.name, save_delay=0.01)
+        playlist = background.get_playlist("p1")
+        # два сжатия - фоновый flush перечитает снимки целиком
+        for song_id in "12":
+            self.first.add_playlist_song(self.first.get_playlist("p1"), song_id)
+            self.first.compact()
+
+        reading, resume = threading.Event(), threading.Event()
+        read_snapshot = Database._read_snapshot
+
+        def slow_read_snapshot(database, collection):
+            reading.set()
+            resume.wait(5)
+            return read_snapshot(database, collection)
+
+        with mock.patch.object(Database, '_read_snapshot', slow_read_snapshot):
+            background.add_playlist_song(playlist, "3")
+            self.assertTrue(reading.wait(5))
+            # пока снимки читаются, в памяти остаются прежние данные
+            self.assertIs(background.playlists["p1"], playlist)
+            self.assertEqual(playlist.songs, ["3"])
+
+            writer = threading.Thread(target=background.add_playlist_song, args=(playlist, "4"))
+            writer.start()
+            writer.join(0.1)
+            self.assertTrue(writer.is_alive())  # ждёт, пока перечитывание закончится
+            resume.set()
+            writer.join(5)
+
+        background.flush()
+        self.assertIs(background.get_playlist("p1"), playlist)
+        self.assertEqual(playlist.songs, ["1", "2", "3", "4"])
+        self.assertEqual(open_database(self.tmp.name).get_playlist("p1").songs, ["1", "2", "3", "4"])
+
+    def test_mutation_during_background_write(self):
+        background = open_database(self.tmp.name, save_delay=0.01)
+        playlist = background.get_playlist("p1")
+
+        writing, resume = threading.Event(), threading.Event()
+        append = Journal.append
+
+        def slow_append(journal, records):
+            writing.set()
+            resume.wait(5)
+            append(journal, records)
+
+        with mock.patch.object(Journal, 'append', slow_append):
+            background.add_playlist_song(playlist, "1")
+            self.assertTrue(writing.wait(5))
+
+            # пока фоновый flush пишет журнал, изменения в памяти не ждут диска
+            writer = threading.Thread(target=background.add_playlist_song, args=(playlist, "2"))
+            writer.start()
+            writer.join(5)
+            self.assertFalse(writer.is_alive())
+            self.assertEqual(playlist.songs, ["1", "2"])
+            resume.set()
+            background.flush()
+
+        self.assertEqual(open_database(self.tmp.name).get_playlist("p1").songs, ["1", "2"])
+
+    def test_catalog_file_rewritten_elsewhere(self):
+        self.second._catalog_stamps = {'genres': None, 'albums': None, 'songs': None}
+        with mock.patch.object(Database, 'load_genres') as load_genres:
+            self.first.save_genres()
+            self.assertEqual(self.second.poll_changes(), {'genres'})
+        load_genres.assert_called_once()
+
+    def test_processes_do_not_lose_records(self):
+        self.first.close()
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=add_songs, args=(self.tmp.name, prefix, 40))
+                     for prefix in "abc"]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            self.assertEqual(process.exitcode, 0)
+
+        songs = open_database(self.tmp.name).get_playlist("p1").songs
+        self.assertEqual(sorted(songs), sorted(f"{p}{n}" for p in "abc" for n in range(40)))
+
+
+class TestShardedDatabaseSync(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_only_loaded_shards_are_polled(self):
+        first = open_database(self.tmp.name, ShardedDatabase)
+        first.add_library(Library("l1", [], [], []))
+        first.add_library(Library("l2", [], [], []))
+
+        second = open_database(self.tmp.name, ShardedDatabase)
+        library = second.get_library("l1")
+
+        first.add_library_item(first.get_library("l1"), 'songs', "1")
+        first.add_library_item(first.get_library("l2"), 'songs', "2")
+        first.compact()
+
+        self.assertEqual(second.poll_changes(), {'libraries'})
+        self.assertEqual(library.songs, ["1"])
+        self.assertNotIn("l2", second.libraries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from music_service.json_stream import iter_json_object, iter_ndjson, write_json_object, write_ndjson
+
+
+class TestJsonStream(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.data = {
+            f"s{i}": {"title": f"Песня {i} \"{{}}\"", "duration": 100 + i, "tags": [i, 1.5, None, True]}
+            for i in range(50)
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_same_as_json_load_on_any_chunk_size(self):
+        path = self.dir / "songs.json"
+        path.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), encoding='utf-8')
+
+        for chunk_size in (1, 7, 64, 100000):
+            self.assertEqual(dict(iter_json_object(path, chunk_size)), self.data)
+
+    def test_number_split_between_chunks(self):
+        path = self.dir / "numbers.json"
+        path.write_text('{"a": 1234567, "b": -0.125e3}', encoding='utf-8')
+        self.assertEqual(dict(iter_json_object(path, 3)), {"a": 1234567, "b": -125.0})
+
+    def test_empty_object(self):
+        path = self.dir / "empty.json"
+        path.write_text(" { } \n", encoding='utf-8')
+        self.assertEqual(list(iter_json_object(path)), [])
+
+    def test_broken_file(self):
+        path = self.dir / "broken.json"
+        for text in ('{"a": 1', '{"a": 1,}', '[1, 2]', '{"a": 1} x'):
+            path.write_text(text, encoding='utf-8')
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_object(path, 4))
+
+    def test_write_roundtrip(self):
+        path = self.dir / "songs.json"
+        write_json_object(path, self.data.items())
+        self.assertEqual(json.loads(path.read_text(encoding='utf-8')), self.data)
+
+        path = self.dir / "songs.ndjson"
+        records = [{"id": key, **value} for key, value in self.data.items()]
+        write_ndjson(path, records)
+        self.assertEqual(list(iter_ndjson(path)), records)
+
+
+if __name__ == '__main__':
+    unittest.main()
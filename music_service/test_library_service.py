@@ -0,0 +1,81 @@
+import dataclasses
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import Album, Library
+from music_service.database import Database
+from music_service.library_service import LibraryService
+
+SONGS = {
+    "1": {"title": "Bohemian Rhapsody", "artist": "Queen", "album": "a1", "genre": "g1", "duration": 354, "filename": "1.mp3"},
+    "2": {"title": "Звезда", "artist": "Кино", "album": "a2", "genre": "g1", "duration": 200, "filename": "2.mp3"},
+    "3": {"title": "Кукушка", "artist": "Кино", "album": "a3", "genre": "g1", "duration": 240, "filename": "3.mp3"},
+}
+ALBUMS = {
+    "a1": {"title": "A Night at the Opera", "artist": "Queen", "cover": "", "songs": ["1"], "release_date": "1975"},
+    "a2": {"title": "Группа крови", "artist": "Кино", "cover": "", "songs": ["2"], "release_date": "1988"},
+    "a3": {"title": "Чёрный альбом", "artist": "Кино", "cover": "", "songs": ["3"], "release_date": "1990"},
+}
+GENRES = """<?xml version="1.0" encoding="utf-8"?>
+<genres>
+  <genre id="g1"><name>Rock</name><description>rock</description></genre>
+</genres>
+"""
+
+
+class TestLibraryService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmp.name)
+        (data_dir / "songs.json").write_text(json.dumps(SONGS), encoding='utf-8')
+        (data_dir / "albums.json").write_text(json.dumps(ALBUMS), encoding='utf-8')
+        (data_dir / "genres.xml").write_text(GENRES, encoding='utf-8')
+
+        self.database = Database(self.tmp.name, save_delay=0)
+        self.service = LibraryService(self.database)
+        self.library = Library("l1", [], [], [])
+        self.database.add_library(self.library)
+        for song_id in SONGS:
+            self.service.add_song_to_library(self.library, song_id)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def album_ids(self):
+        return [album.id for album in self.service.get_library_albums(self.library)]
+
+    def test_aggregates(self):
+        self.assertEqual(self.album_ids(), ["a1", "a2", "a3"])
+        self.assertEqual(self.service.get_library_artists(self.library), ["Queen", "Кино"])
+
+        self.service.remove_song_from_library(self.library, "2")
+        self.assertEqual(self.album_ids(), ["a1", "a3"])
+        self.assertEqual(self.service.get_library_artists(self.library), ["Queen", "Кино"])
+
+    def test_remove_after_album_renamed(self):
+        self.assertEqual(self.album_ids(), ["a1", "a2", "a3"])
+        # альбом теперь сортируется последним, а в сводке стоит первым
+        self.database.add_album(Album("a1", "A Night at the Opera", "Я", "", ["1"], "1975"))
+
+        self.service.remove_song_from_library(self.library, "1")
+        self.assertEqual(self.album_ids(), ["a2", "a3"])
+
+        self.service.invalidate()
+        self.service.add_song_to_library(self.library, "1")
+        self.assertEqual(self.album_ids(), ["a2", "a3", "a1"])
+
+    def test_remove_after_song_changed(self):
+        self.assertEqual(self.service.get_library_artists(self.library), ["Queen", "Кино"])
+        song = self.database.get_song("1")
+        self.database.add_song(dataclasses.replace(song, artist="Freddie"))
+
+        self.service.remove_song_from_library(self.library, "1")
+        self.assertEqual(self.service.get_library_artists(self.library), ["Кино"])
+        self.assertEqual(self.album_ids(), ["a2", "a3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PySide6.QtCore import QCoreApplication
+
+from models import Song
+from music_service.player_service import PlayerService
+from music_service.queue_service import QueueService, RepeatMode
+
+
+def preloaded(service: PlayerService, song) -> bool:
+    # без декодера файл не открывается: готовой считается любая открытая в запасном плеере песня
+    return song is not None and service._next_song is not None and song.id == service._next_song.id
+
+
+@mock.patch.object(PlayerService, '_is_preloaded', preloaded)
+class TestGaplessAdvance(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.songs = [Song(str(i), f"Song {i}", "Artist", "a1", "g1", 10, f"{i}.mp3") for i in range(3)]
+        for song in self.songs:
+            (Path(self.tmp.name) / song.filename).write_bytes(b"")
+
+        self.queue = QueueService()
+        self.player = PlayerService(self.tmp.name, queue=self.queue)
+        self.queue.set_queue(self.songs, 0)
+        self.player.load(self.queue.current_song())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_next_song_preloaded_after_advance(self):
+        self.assertEqual(self.player._next_song.id, "1")
+        self.assertTrue(self.player._advance(fade=False))
+        self.assertEqual(self.player.current_song.id, "1")
+        self.assertEqual(self.player._next_song.id, "2")
+
+    def test_repeat_one_keeps_preloading(self):
+        self.queue.cycle_repeat_mode()
+        self.assertEqual(self.queue.repeat_mode, RepeatMode.ONE)
+        self.player.preload_next()
+
+        for _ in range(3):
+            self.assertTrue(self.player._advance(fade=False))
+            self.assertEqual(self.player.current_song.id, "0")
+            self.assertEqual(self.player._next_song.id, "0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import json
+import unittest
+
+from models import Song
+from music_service.queue_service import QueueService, RepeatMode
+
+
+def make_song(song_id):
+    return Song(
+        id=song_id,
+        title=f"Song {song_id}",
+        artist="Artist",
+        album="a1",
+        genre="g1",
+        duration=180,
+        filename=f"{song_id}.mp3"
+    )
+
+
+def ids(queue):
+    return [song.id for song in queue.get_queue()]
+
+
+class TestQueueService(unittest.TestCase):
+    def setUp(self):
+        self.songs = [make_song(str(i)) for i in range(6)]
+        self.queue = QueueService()
+        self.queue.set_queue(self.songs, 2)
+
+    def test_duplicate_songs_are_separate_entries(self):
+        self.queue.enqueue(self.songs[0])
+        self.queue.dequeue(6)
+
+        self.assertEqual(ids(self.queue), ["0", "1", "2", "3", "4", "5"])
+
+        self.queue.toggle_shuffle()
+        self.queue.enqueue(self.songs[3], 1)
+        self.queue.dequeue(1)
+        self.queue.toggle_shuffle()
+
+        self.assertEqual(ids(self.queue), ["0", "1", "2", "3", "4", "5"])
+
+    def test_shuffle_keeps_current_song(self):
+        self.queue.toggle_shuffle()
+
+        self.assertEqual(self.queue.current_index, 0)
+        self.assertEqual(self.queue.current_song().id, "2")
+        self.assertEqual(sorted(ids(self.queue)), ["0", "1", "2", "3", "4", "5"])
+
+        self.queue.next()
+        current = self.queue.current_song().id
+        self.queue.toggle_shuffle()
+
+        self.assertEqual(ids(self.queue), ["0", "1", "2", "3", "4", "5"])
+        self.assertEqual(self.queue.current_song().id, current)
+
+    def test_dequeue_while_shuffled(self):
+        self.queue.toggle_shuffle()
+        for _ in range(4):
+            self.queue.dequeue(len(self.queue) - 1)
+        self.queue.toggle_shuffle()
+
+        self.assertEqual(len(ids(self.queue)), 2)
+        self.assertIn("2", ids(self.queue))
+        self.assertEqual(self.queue.current_song().id, "2")
+
+    def test_enqueue_before_current_keeps_current(self):
+        self.queue.enqueue(make_song("new"), 0)
+
+        self.assertEqual(self.queue.current_index, 3)
+        self.assertEqual(self.queue.current_song().id, "2")
+
+    def test_move_and_peek(self):
+        self.queue.move_down(2)
+
+        self.assertEqual(ids(self.queue), ["0", "1", "3", "2", "4", "5"])
+        self.assertEqual(self.queue.current_index, 3)
+        self.assertEqual(self.queue.peek_next().id, "4")
+
+        self.queue.current_index = 5
+        self.assertIsNone(self.queue.peek_next())
+        self.queue.repeat_mode = RepeatMode.ALL
+        self.assertEqual(self.queue.peek_next().id, "0")
+
+    def test_fine_grained_signals(self):
+        events = []
+        self.queue.queue_reset.connect(lambda: events.append("reset"))
+        self.queue.rows_inserted.connect(lambda first, count: events.append(("inserted", first, count)))
+        self.queue.rows_removed.connect(lambda first, count: events.append(("removed", first, count)))
+        self.queue.row_moved.connect(lambda source, target: events.append(("moved", source, target)))
+        self.queue.current_moved.connect(lambda old, new: events.append(("current", old, new)))
+
+        self.queue.next()
+        self.queue.enqueue(make_song("new"), 0)
+        self.queue.move_up(2)
+        self.queue.dequeue(0)
+
+        self.assertEqual(events, [
+            ("current", 2, 3),
+            ("inserted", 0, 1), ("current", 3, 4),
+            ("moved", 2, 1),
+            ("removed", 0, 1), ("current", 4, 3),
+        ])
+
+    def test_queue_changed_after_current_updated(self):
+        # к queue_changed (на нём предзагрузка) текущая песня и следующая уже верные
+        events = []
+        self.queue.current_moved.connect(lambda old, new: events.append(("current", old, new)))
+        self.queue.queue_changed.connect(
+            lambda: events.append(("changed", self.queue.current_song().id, self.queue.peek_next().id))
+        )
+
+        self.queue.enqueue(make_song("new"), 0)
+        self.queue.dequeue(1)
+        self.queue.move_down(2)
+
+        self.assertEqual(events, [
+            ("current", 2, 3), ("changed", "2", "3"),
+            ("current", 3, 2), ("changed", "2", "3"),
+            ("current", 2, 3), ("changed", "2", "4"),
+        ])
+
+    def test_unshuffle_without_current_song(self):
+        self.queue.set_queue(self.songs, -1)
+        self.queue.toggle_shuffle()
+        self.queue.toggle_shuffle()
+        self.assertEqual(self.queue.current_index, -1)
+        self.assertIsNone(self.queue.current_song())
+
+        self.queue.enqueue(make_song("new"), 0)
+        self.assertEqual(self.queue.current_index, -1)
+
+    def test_unshuffle_emptied_queue(self):
+        self.queue.toggle_shuffle()
+        while len(self.queue):
+            self.queue.dequeue(0)
+        self.queue.toggle_shuffle()
+
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(self.queue.current_index, -1)
+
+    def test_export_and_restore_state(self):
+        self.queue.toggle_shuffle()
+        self.queue.enqueue(make_song("new"), 2)
+        self.queue.dequeue(4)
+        self.queue.move_down(1)
+        self.queue.next()
+        self.queue.repeat_mode = RepeatMode.ALL
+
+        state = json.loads(json.dumps(self.queue.export_state()))
+        restored = QueueService()
+        restored.restore_state(self.songs, state, {"new": make_song("new")})
+
+        self.assertEqual(ids(restored), ids(self.queue))
+        self.assertEqual(restored.current_index, self.queue.current_index)
+        self.assertEqual(restored.repeat_mode, RepeatMode.ALL)
+
+        self.queue.toggle_shuffle()
+        restored.toggle_shuffle()
+        self.assertEqual(ids(restored), ids(self.queue))
+        self.assertEqual(restored.current_song().id, self.queue.current_song().id)
+
+
+if __name__ == "__main__":
+    unittest.main()
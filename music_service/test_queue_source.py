@@ -0,0 +1,86 @@
+import random
+import unittest
+from unittest import mock
+
+from music_service import queue_source
+from music_service.queue_source import LazyPermutation, PieceList
+
+
+class TestLazyPermutation(unittest.TestCase):
+    def test_is_permutation(self):
+        for size in (1, 2, 3, 10, 257, 1000):
+            self.assertEqual(sorted(LazyPermutation(size, seed=size)), list(range(size)))
+
+    def test_first_and_seed(self):
+        perm = LazyPermutation(500, seed=42, first=123)
+
+        self.assertEqual(perm[0], 123)
+        self.assertEqual(sorted(perm), list(range(500)))
+        self.assertEqual(list(perm), list(LazyPermutation(500, seed=42, first=123)))
+        self.assertNotEqual(list(perm), list(LazyPermutation(500, seed=43, first=123)))
+
+
+class TestPieceList(unittest.TestCase):
+    def test_edits_match_list(self):
+        rng = random.Random(1)
+        base = LazyPermutation(300, seed=7)
+        pieces = PieceList(base)
+        expected = list(base)
+
+        for step in range(500):
+            op = rng.randrange(4)
+            if op == 0 or not expected:
+                index = rng.randrange(len(expected) + 1)
+                pieces.insert(index, 1000 + step)
+                expected.insert(index, 1000 + step)
+            elif op == 1:
+                index = rng.randrange(len(expected))
+                self.assertEqual(pieces.pop(index), expected.pop(index))
+            else:
+                i, j = rng.randrange(len(expected)), rng.randrange(len(expected))
+                pieces[i], pieces[j] = pieces[j], pieces[i]
+                expected[i], expected[j] = expected[j], expected[i]
+
+            self.assertEqual(len(pieces), len(expected))
+
+        self.assertEqual(list(pieces), expected)
+        self.assertEqual([pieces[i] for i in range(len(expected))], expected)
+
+    def test_edits_across_blocks(self):
+        # маленькие блоки: правки делят блоки и удаляют опустевшие
+        with mock.patch.object(queue_source, 'BLOCK_PIECES', 2):
+            rng = random.Random(2)
+            pieces = PieceList(range(200))
+            expected = list(range(200))
+            for step in range(400):
+                index = rng.randrange(len(expected))
+                if step % 3 == 0:
+                    pieces.insert(index, 1000 + step)
+                    expected.insert(index, 1000 + step)
+                else:
+                    self.assertEqual(pieces.pop(index), expected.pop(index))
+            self.assertGreater(len(pieces._blocks), 1)
+            self.assertEqual(list(pieces), expected)
+            self.assertEqual([pieces[i] for i in range(len(expected))], expected)
+
+            restored = PieceList.from_pieces(range(200), pieces.to_pieces())
+            self.assertEqual(list(restored), expected)
+            self.assertEqual(restored.to_pieces(), pieces.to_pieces())
+
+            while len(pieces):
+                pieces.pop(0)
+            self.assertEqual(pieces._blocks, [])
+            pieces.append(5)
+            self.assertEqual(list(pieces), [5])
+
+    def test_delete_indexes(self):
+        for count in (3, 100):
+            pieces = PieceList(range(1000))
+            removed = random.Random(count).sample(range(1000), count)
+            pieces.delete_indexes(removed)
+
+            self.assertEqual(list(pieces), [i for i in range(1000) if i not in removed])
+
+
+if __name__ == "__main__":
+    unittest.main()
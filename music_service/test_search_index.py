@@ -0,0 +1,60 @@
+import unittest
+
+from models import Song
+from music_service.search_index import SearchIndex
+
+
+def make_song(song_id, title, artist):
+    return Song(
+        id=song_id,
+        title=title,
+        artist=artist,
+        album="a1",
+        genre="g1",
+        duration=180,
+        filename=f"{song_id}.mp3"
+    )
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add(make_song("1", "Yesterday", "The Beatles"), "Help!", "Rock")
+        self.index.add(make_song("2", "Let It Be", "The Beatles"), "Let It Be", "Rock")
+        self.index.add(make_song("3", "Bohemian Rhapsody", "Queen"), "A Night at the Opera", "Rock")
+        self.index.add(make_song("4", "Beat It", "Michael Jackson"), "Thriller", "Pop")
+
+    def test_substring(self):
+        self.assertEqual(self.index.search("hemian"), ["3"])
+        self.assertEqual(self.index.search("THRILL"), ["4"])
+
+    def test_short_query_matches_word_prefix(self):
+        self.assertEqual(set(self.index.search("be")), {"1", "2", "4"})
+        self.assertEqual(self.index.search("q"), ["3"])
+
+    def test_ranking(self):
+        # совпадение в названии выше совпадения в исполнителе
+        self.assertEqual(self.index.search("beat")[0], "4")
+        # полное совпадение поля выше частичного
+        self.assertEqual(self.index.search("let it be")[0], "2")
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search("rock", limit=2)), 2)
+        self.assertEqual(self.index.search("rock", limit=0), [])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search("zzz"), [])
+        self.assertEqual(self.index.search("   "), [])
+
+    def test_update_and_remove(self):
+        self.index.add(make_song("3", "Radio Ga Ga", "Queen"), "The Works", "Rock")
+        self.assertEqual(self.index.search("bohemian"), [])
+        self.assertEqual(self.index.search("radio"), ["3"])
+
+        self.index.remove("3")
+        self.assertEqual(self.index.search("queen"), [])
+        self.assertNotIn("3", self.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
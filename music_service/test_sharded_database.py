@@ -0,0 +1,119 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import Library, Playlist, User
+from music_service.migrate_to_shards import migrate
+from music_service.sharded_database import SHARDS_DIR, ShardedDatabase, shard_name
+
+
+def open_database(data_dir: str) -> ShardedDatabase:
+    database = ShardedDatabase(data_dir, save_delay=0, load=False)
+    database.load_accounts()
+    return database
+
+
+class TestShardedDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.shards = self.dir / SHARDS_DIR
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _register(self, database: ShardedDatabase, number: int) -> User:
+        library = Library(f"lib{number}", [], [], [])
+        user = User(f"user{number}@mail.ru", f"user{number}", "hash", library.id)
+        database.add_library(library)
+        database.add_user(user)
+        return user
+
+    def _add_playlist(self, database: ShardedDatabase, user: User, playlist_id: str) -> Playlist:
+        playlist = Playlist(playlist_id, "title", "", user.email, ["1"])
+        database.add_playlist(playlist)
+        database.add_library_item(database.get_library(user.library_id), 'playlists', playlist_id)
+        return playlist
+
+    def test_only_requested_shards_are_loaded(self):
+        database = open_database(self.tmp.name)
+        users = [self._register(database, number) for number in range(5)]
+        for user in users:
+            self._add_playlist(database, user, f"p-{user.username}")
+        database.close()
+
+        database = open_database(self.tmp.name)
+        self.assertEqual(len(database.users), 5)
+        self.assertEqual(database.libraries, {})
+        self.assertEqual(database.playlists, {})
+
+        library = database.get_library("lib3")
+        self.assertEqual(library.playlists, ["p-user3"])
+        self.assertEqual(database.get_playlist("p-user3").songs, ["1"])
+        self.assertEqual(list(database.libraries), ["lib3"])
+        self.assertEqual(list(database.playlists), ["p-user3"])
+
+    def test_edit_touches_only_own_shard(self):
+        database = open_database(self.tmp.name)
+        first, second = self._register(database, 1), self._register(database, 2)
+        self._add_playlist(database, first, "p1")
+        self._add_playlist(database, second, "p2")
+        database.close()
+
+        other_library = self.shards / "libraries" / f"{shard_name('lib2')}.json"
+        other_playlists = self.shards / "playlists" / f"{shard_name(second.email)}.json"
+        before = (other_library.read_bytes(), other_playlists.read_bytes())
+
+        database = open_database(self.tmp.name)
+        library = database.get_library("lib1")
+        playlist = database.get_playlist("p1")
+        database.add_library_item(library, 'songs', "7")
+        database.add_playlist_song(playlist, "7")
+        database.remove_playlist_song(playlist, "1")
+        database.close()
+
+        self.assertEqual((other_library.read_bytes(), other_playlists.read_bytes()), before)
+        self.assertEqual(list(database._shards), [("libraries", shard_name("lib1")),
+                                                  ("playlists", shard_name(first.email))])
+
+        database = open_database(self.tmp.name)
+        self.assertEqual(database.get_library("lib1").songs, ["7"])
+        self.assertEqual(database.get_playlist("p1").songs, ["7"])
+
+    def test_journal_replay_without_compaction(self):
+        database = open_database(self.tmp.name)
+        user = self._register(database, 1)
+        self._add_playlist(database, user, "p1")
+        database.delete_playlist("p1")
+        self._add_playlist(database, user, "p2")
+        database.flush()
+
+        # без close(): данные только в журналах шардов
+        database = open_database(self.tmp.name)
+        self.assertEqual(database.get_library("lib1").playlists, ["p1", "p2"])
+        self.assertIsNone(database.get_playlist("p1"))
+        self.assertEqual(database.get_playlist("p2").author, user.email)
+
+    def test_migrate_from_single_files(self):
+        (self.dir / "users.json").write_text(json.dumps({
+            "a@mail.ru": {"username": "a", "password_hash": "h", "library_id": "la"},
+        }), encoding='utf-8')
+        (self.dir / "libraries.json").write_text(json.dumps({
+            "la": {"songs": ["1"], "albums": [], "playlists": ["pa"]},
+        }), encoding='utf-8')
+        (self.dir / "playlists.json").write_text(json.dumps({
+            "pa": {"title": "t", "description": "", "author": "a@mail.ru", "songs": ["1", "2"]},
+        }), encoding='utf-8')
+
+        migrate(self.tmp.name).close()
+
+        database = open_database(self.tmp.name)
+        self.assertEqual(database.get_user("a@mail.ru").library_id, "la")
+        self.assertEqual(database.get_library("la").songs, ["1"])
+        self.assertEqual(database.get_playlist("pa").songs, ["1", "2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
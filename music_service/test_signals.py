@@ -0,0 +1,95 @@
+import gc
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from music_service.signals import Signal
+
+# модули, которые работают без интерфейса и не должны тянуть Qt
+CORE_MODULES = (
+    "music_service",
+    "music_service.database",
+    "music_service.storage",
+    "music_service.signals",
+    "music_service.queue_service",
+    "music_service.auth_service",
+    "music_service.library_service",
+    "music_service.playlist_service",
+    "music_service.search_service",
+)
+
+
+class Counter:
+
+    changed = Signal(int)
+
+    def __init__(self):
+        self.values = []
+
+    def on_changed(self, value: int) -> None:
+        self.values.append(value)
+
+
+class TestSignals(unittest.TestCase):
+
+    def test_emit_order_and_disconnect(self):
+        source = Counter()
+        events = []
+        first = lambda value: events.append(("first", value))
+        source.changed.connect(first)
+        source.changed.connect(lambda value: events.append(("second", value)))
+
+        source.changed.emit(1)
+        source.changed.disconnect(first)
+        source.changed.emit(2)
+        self.assertEqual(events, [("first", 1), ("second", 1), ("second", 2)])
+
+        with self.assertRaises(RuntimeError):
+            source.changed.disconnect(first)
+        source.changed.disconnect()
+        source.changed.emit(3)
+        self.assertEqual(len(events), 3)
+
+    def test_extra_arguments_dropped(self):
+        source = Counter()
+        events = []
+        source.changed.connect(lambda: events.append("no args"))
+        source.changed.connect(lambda *args: events.append(args))
+        source.changed.emit(1)
+        self.assertEqual(events, ["no args", (1,)])
+
+    def test_signals_per_instance(self):
+        a, b = Counter(), Counter()
+        a.changed.connect(a.on_changed)
+        b.changed.emit(1)
+        a.changed.emit(2)
+        self.assertEqual(a.values, [2])
+        self.assertIsInstance(Counter.changed, Signal)
+
+    def test_method_receiver_not_kept_alive(self):
+        source, receiver = Counter(), Counter()
+        source.changed.connect(receiver.on_changed)
+        source.changed.emit(1)
+        self.assertEqual(receiver.values, [1])
+
+        del receiver
+        gc.collect()
+        source.changed.emit(2)
+        self.assertEqual(source.changed._slots, [])
+
+
+class TestCoreWithoutQt(unittest.TestCase):
+
+    def test_no_qt_import(self):
+        code = ("import importlib, sys; before = set(sys.modules)\n"
+                f"for name in {CORE_MODULES!r}: importlib.import_module(name)\n"
+                "print(sorted(n for n in set(sys.modules) - before if n.startswith('PySide6')))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent.parent)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import Library
+from music_service.database import Database
+from music_service.sqlite_database import SqliteDatabase
+
+SONGS = {
+    "1": {"title": "Bohemian Rhapsody", "artist": "Queen", "album": "a1", "genre": "g1", "duration": 354, "filename": "1.mp3"},
+    "2": {"title": "Звезда по имени Солнце", "artist": "Кино", "album": "a2", "genre": "g1", "duration": 225, "filename": "2.mp3"},
+    "3": {"title": "Кукушка", "artist": "Кино", "album": "a3", "genre": "g1", "duration": 400, "filename": "3.mp3"},
+    "4": {"title": "Love of My Life", "artist": "Queen", "album": "a1", "genre": "g2", "duration": 219, "filename": "4.mp3"},
+    "5": {"title": "Группа крови", "artist": "Кино", "album": "a2", "genre": "g1", "duration": 285, "filename": "5.mp3"},
+    "6": {"title": "Opera", "artist": "Night Shift", "album": "a4", "genre": "g2", "duration": 180, "filename": "6.mp3"},
+    "7": {"title": "Рок-н-ролл мёртв", "artist": "Аквариум", "album": "a5", "genre": "g1", "duration": 300, "filename": "7.mp3"},
+}
+ALBUMS = {
+    "a1": {"title": "A Night at the Opera", "artist": "Queen", "cover": "", "songs": ["1", "4"], "release_date": "1975"},
+    "a2": {"title": "Группа крови", "artist": "Кино", "cover": "", "songs": ["2", "5"], "release_date": "1988"},
+    "a3": {"title": "Чёрный альбом", "artist": "Кино", "cover": "", "songs": ["3"], "release_date": "1990"},
+    "a4": {"title": "Shifts", "artist": "Night Shift", "cover": "", "songs": ["6"], "release_date": "2001"},
+    "a5": {"title": "Радио Африка", "artist": "Аквариум", "cover": "", "songs": ["7"], "release_date": "1983"},
+}
+GENRES = """<?xml version="1.0" encoding="utf-8"?>
+<genres>
+  <genre id="g1"><name>Русский рок</name><description>rock</description></genre>
+  <genre id="g2"><name>Ballad</name><description>ballad</description></genre>
+</genres>
+"""
+
+# короткие, кириллица в разном регистре, совпадения только по альбому или жанру
+QUERIES = ("q", "к", "Ки", "КИНО", "ру", "р", "ni", "n", "op", "opera", "ГРУ", "крови",
+           "рок", "русский", "ballad", "чёрный", "Night", "shift", "ифт", "a", "love of")
+
+
+class TestSqliteSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmp.name)
+        (data_dir / "songs.json").write_text(json.dumps(SONGS), encoding='utf-8')
+        (data_dir / "albums.json").write_text(json.dumps(ALBUMS), encoding='utf-8')
+        (data_dir / "genres.xml").write_text(GENRES, encoding='utf-8')
+
+        self.source = Database(self.tmp.name, save_delay=0)
+        self.database = SqliteDatabase(self.tmp.name)
+        self.database.import_database(self.source)
+
+    def tearDown(self):
+        self.database.close()
+        self.tmp.cleanup()
+
+    def assert_same_results(self):
+        for query in QUERIES:
+            for limit in (1, 3, 100):
+                with self.subTest(query=query, limit=limit, fts=self.database.has_fts):
+                    self.assertEqual(self.database.search_index.search(query, limit),
+                                     self.source.search_index.search(query, limit))
+
+    def test_same_as_search_index(self):
+        self.assert_same_results()
+
+    def test_same_as_search_index_without_fts(self):
+        self.database.has_fts = False
+        self.assert_same_results()
+
+
+class TestSqlitePollChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.first = SqliteDatabase(self.tmp.name)
+        self.first.add_library(Library("l1", ["1"], [], []))
+        self.second = SqliteDatabase(self.tmp.name)
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+        self.tmp.cleanup()
+
+    def test_cached_objects_updated_in_place(self):
+        library = self.second.get_library("l1")
+        self.first.add_library_item(self.first.get_library("l1"), 'songs', "2")
+        self.first.add_library(Library("l2", [], [], []))
+
+        self.assertIn('libraries', self.second.poll_changes())
+        self.assertIs(self.second.get_library("l1"), library)
+        self.assertEqual(list(library.songs), ["1", "2"])
+        self.assertIsNotNone(self.second.get_library("l2"))
+
+        # изменения через старый объект доходят до базы
+        self.second.add_library_item(library, 'songs', "3")
+        self.first.poll_changes()
+        self.assertEqual(list(self.first.get_library("l1").songs), ["1", "2", "3"])
+
+        self.first.add_library_item(self.first.get_library("l1"), 'songs', "4")
+        self.second.poll_changes()
+        self.assertEqual(list(library.songs), ["1", "2", "3", "4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
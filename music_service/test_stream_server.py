@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from music_service.api_benchmark import HttpConnection
+from music_service.api_server import ApiError
+from music_service.database import Database
+from music_service.stream_server import StreamServer, parse_range
+
+SONGS = {
+    "1": {"title": "Bohemian Rhapsody", "artist": "Queen", "album": "a1", "genre": "g1", "duration": 354, "filename": "1.mp3"},
+    "2": {"title": "Ночь", "artist": "Кино", "album": "a2", "genre": "g1", "duration": 200, "filename": "../songs.json"},
+    "3": {"title": "Killer Queen", "artist": "Queen", "album": "a1", "genre": "g1", "duration": 180, "filename": "3.mp3"},
+}
+GENRES = """<?xml version="1.0" encoding="utf-8"?>
+<genres>
+  <genre id="g1"><name>Rock</name><description>rock</description></genre>
+</genres>
+"""
+
+
+class TestParseRange(unittest.TestCase):
+
+    def test_ranges(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertEqual(parse_range("bytes=10-19", 100), (10, 19))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=90-500", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-500", 100), (0, 99))
+
+        for header in ("bytes=100-", "bytes=5-4", "bytes=-0"):
+            with self.assertRaises(ApiError) as error:
+                parse_range(header, 100)
+            self.assertEqual(error.exception.status, 416)
+            self.assertEqual(error.exception.headers, ["Content-Range: bytes */100"])
+
+
+class TestStreamServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmp.name)
+        (data_dir / "songs.json").write_text(json.dumps(SONGS), encoding='utf-8')
+        (data_dir / "albums.json").write_text("{}", encoding='utf-8')
+        (data_dir / "genres.xml").write_text(GENRES, encoding='utf-8')
+        (data_dir / "songs").mkdir()
+        # больше буфера записи: файл уходит несколькими порциями
+        self.audio = os.urandom(700 * 1024)
+        (data_dir / "songs" / "1.mp3").write_bytes(self.audio)
+
+        self.database = Database(self.tmp.name, save_delay=0)
+        self.server = StreamServer(self.database, str(data_dir / "songs"), port=0, max_clients=300)
+        await self.server.start()
+        self.client = HttpConnection(self.server.host, self.server.port)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+        self.database.close()
+        self.tmp.cleanup()
+
+    async def test_full_file(self):
+        status, headers, body = await self.client.request('GET', "/songs/1")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.audio)
+        self.assertEqual(headers['content-type'], "audio/mpeg")
+        self.assertEqual(headers['accept-ranges'], "bytes")
+
+        status, headers, body = await self.client.request('HEAD', "/songs/1")
+        self.assertEqual(status, 200)
+        self.assertEqual(int(headers['content-length']), len(self.audio))
+        self.assertEqual(body, b"")
+
+        status, _, _ = await self.client.request('GET', "/songs/1", headers={'If-None-Match': headers['etag']})
+        self.assertEqual(status, 304)
+        self.assertEqual(self.client.connects, 1)
+
+    async def test_ranges(self):
+        size = len(self.audio)
+        status, headers, body = await self.client.request('GET', "/songs/1", headers={'Range': "bytes=1000-1999"})
+        self.assertEqual(status, 206)
+        self.assertEqual(headers['content-range'], f"bytes 1000-1999/{size}")
+        self.assertEqual(body, self.audio[1000:2000])
+
+        status, _, body = await self.client.request('GET', "/songs/1", headers={'Range': "bytes=-100"})
+        self.assertEqual(body, self.audio[-100:])
+
+        status, headers, _ = await self.client.request('GET', "/songs/1", headers={'Range': f"bytes={size}-"})
+        self.assertEqual(status, 416)
+        self.assertEqual(headers['content-range'], f"bytes */{size}")
+
+        # файл поменялся с прошлого ответа - вместо куска весь файл
+        status, _, body = await self.client.request(
+            'GET', "/songs/1", headers={'Range': "bytes=0-9", 'If-Range': '"stale"'}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body), size)
+        self.assertEqual(self.client.connects, 1)
+
+    async def test_errors(self):
+        self.assertEqual((await self.client.request('GET', "/songs/404"))[0], 404)
+        self.assertEqual((await self.client.request('GET', "/songs/2"))[0], 404)  # вне папки песен
+        self.assertEqual((await self.client.request('GET', "/songs/3"))[0], 404)  # нет файла
+        self.assertEqual((await self.client.request('GET', "/albums"))[0], 404)
+        self.assertEqual((await self.client.request('POST', "/songs/1"))[0], 405)
+
+    async def test_file_opened_off_event_loop(self):
+        threads = []
+        open_song = self.server._open_song
+
+        def record(request):
+            threads.append(threading.current_thread())
+            return open_song(request)
+
+        with mock.patch.object(self.server, '_open_song', record):
+            self.assertEqual((await self.client.request('HEAD', "/songs/1"))[0], 200)
+            self.assertEqual((await self.client.request('GET', "/songs/3"))[0], 404)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    async def test_client_limit(self):
+        self.server.max_clients = 2
+        listeners = [HttpConnection(self.server.host, self.server.port) for _ in range(2)]
+        for listener in listeners:
+            await listener.request('HEAD', "/songs/1")
+
+        status, headers, _ = await self.client.request('GET', "/songs/1")
+        self.assertEqual(status, 503)
+        self.assertEqual(headers['retry-after'], "1")
+        self.assertEqual(self.server.rejected, 1)
+
+        await listeners[0].close()
+        await asyncio.sleep(0.05)
+        self.assertEqual((await self.client.request('GET', "/songs/1", headers={'Range': "bytes=0-0"}))[0], 206)
+        await listeners[1].close()
+
+    async def test_concurrent_listeners(self):
+        async def listen(number: int) -> bool:
+            connection = HttpConnection(self.server.host, self.server.port)
+            try:
+                start = number * 1000
+                _, _, chunk = await connection.request('GET', "/songs/1", headers={'Range': f"bytes={start}-"})
+                return chunk == self.audio[start:]
+            finally:
+                await connection.close()
+
+        results = await asyncio.gather(*(listen(number) for number in range(200)))
+        self.assertTrue(all(results))
+        # сервер замечает закрытие соединений чуть позже клиентов
+        for _ in range(100):
+            if not self.server.active_clients:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.server.active_clients, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
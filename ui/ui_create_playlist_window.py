@@ -92,15 +92,15 @@ class CreatePlaylistWindow(QDialog):
             if item.isSelected():
                 selected_song_ids.append(item.data(Qt.UserRole))
 
-        # Create playlist
-        playlist = self.music_service.playlist_service.create_playlist(
-            title=title,
-            description=description,
-            author=self.user_email,
-            song_ids=selected_song_ids
-        )
-
-        # Add to library
-        self.music_service.playlist_service.add_playlist_to_library(self.library, playlist.id)
+        # Create playlist and add it to library with a single save
+        with self.music_service.database.transaction():
+            playlist = self.music_service.playlist_service.create_playlist(
+                title=title,
+                description=description,
+                author=self.user_email,
+                song_ids=selected_song_ids
+            )
+
+            self.music_service.playlist_service.add_playlist_to_library(self.library, playlist.id)
 
         self.accept()
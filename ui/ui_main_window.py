@@ -1,80 +1,31 @@
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, List, Optional, Sequence
 from pathlib import Path
 
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QLineEdit, QPushButton, QTreeWidget, QTreeWidgetItem,
-    QListWidget, QListWidgetItem,
+    QListWidget, QListWidgetItem, QListView,
     QSlider, QMenu
 )
-from PySide6.QtCore import Qt, QSize, QTimer
+from PySide6.QtCore import Qt, QEvent, QSize, QModelIndex, QPoint
 from PySide6.QtGui import QPixmap, QAction
 from PySide6.QtMultimedia import QMediaPlayer
 
 from models import User, Library, Song, Album, Playlist
+from music_service.cover_cache import DEFAULT_COVER
+from music_service.search_pipeline import SearchPipeline
 from ui.ui_track_info_window import TrackInfoWindow
 from ui.ui_queue_window import QueueWindow
 from ui.ui_create_playlist_window import CreatePlaylistWindow
 from ui.ui_text_window import TextWindow
+from ui.ui_song_list import SongListModel, SongItemDelegate
 
 if TYPE_CHECKING:
     from music_service.music_service import MusicService
 
 
-class SongListItem(QWidget):
-    """Custom widget for song list item."""
-
-    def __init__(self, song: Song, in_library: bool, album_title: str = "", genre_name: str = "", parent=None):
-        super().__init__(parent)
-        self.song = song
-
-        layout = QHBoxLayout()
-        layout.setContentsMargins(5, 4, 5, 4)
-        layout.setSpacing(8)
-
-        # Song info label with all details
-        duration_str = song.get_duration_formatted()
-
-        # Build display text: Artist - Title | Album | Genre | Duration
-        info_parts = []
-        info_parts.append(f"<b>{song.artist}</b> — {song.title}")
-
-        details = []
-        if album_title:
-            details.append(album_title)
-        if genre_name:
-            details.append(genre_name)
-        details.append(duration_str)
-
-        if details:
-            info_parts.append(f"<span style='color: gray;'>{' • '.join(details)}</span>")
-
-        text = " &nbsp; ".join(info_parts)
-
-        self.label = QLabel(text)
-        self.label.setTextFormat(Qt.RichText)
-        layout.addWidget(self.label, 1)
-
-        # Library button
-        self.lib_button = QPushButton("✓" if in_library else "+")
-        self.lib_button.setFixedSize(30, 25)
-        self.lib_button.setEnabled(not in_library)
-        self.lib_button.setToolTip("Already in library" if in_library else "Add to library")
-        layout.addWidget(self.lib_button)
-
-        # Menu button
-        self.menu_button = QPushButton("...")
-        self.menu_button.setFixedSize(30, 25)
-        self.menu_button.setToolTip("More actions")
-        layout.addWidget(self.menu_button)
-
-        self.setLayout(layout)
-
-    def update_library_status(self, in_library: bool):
-        """Update the library button status."""
-        self.lib_button.setText("✓" if in_library else "+")
-        self.lib_button.setEnabled(not in_library)
-        self.lib_button.setToolTip("Already in library" if in_library else "Add to library")
+# Cover label size; thumbnails are decoded at exactly this size
+COVER_SIZE = 190
 
 
 class MainWindow(QMainWindow):
@@ -85,10 +36,18 @@ class MainWindow(QMainWindow):
         self.library = library
 
         # Current display state
-        self.current_songs: List[Song] = []
-        self._base_songs: List[Song] = []  # Full song list for filtering in Artists/Genres views
+        self.song_model = SongListModel(self.music_service, self.library)
         self.current_category = "library/songs"
 
+        # Search runs in a worker thread, debounced
+        self.search_pipeline = SearchPipeline(self.music_service.search_service, parent=self)
+
+        # Cover requested last; covers decoded for skipped tracks are ignored
+        self._cover_key: Optional[tuple] = None
+        # Service signals outlive the window; closeEvent disconnects them
+        self._cover_connected = False
+        self._restore_connected = False
+
         self.setupUi()
         self.connect_signals()
         self.load_initial_data()
@@ -189,10 +148,16 @@ class MainWindow(QMainWindow):
         self.extra_content.hide()
         content_layout.addWidget(self.extra_content)
 
-        # Main content list (using QListWidget with custom SongListItem widgets)
-        self.content_list = QListWidget()
+        # Main content list (model/view, only visible rows are painted)
+        self.content_list = QListView()
+        self.content_list.setModel(self.song_model)
+        self.song_delegate = SongItemDelegate(self.content_list)
+        self.content_list.setItemDelegate(self.song_delegate)
+        self.content_list.setUniformItemSizes(True)
+        self.content_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.content_list.setAlternatingRowColors(True)
         self.content_list.setSpacing(1)
+        self.content_list.setMouseTracking(True)
         content_layout.addWidget(self.content_list)
 
         layout.addLayout(content_layout)
@@ -208,7 +173,7 @@ class MainWindow(QMainWindow):
 
         # Cover
         self.cover_label = QLabel()
-        self.cover_label.setFixedSize(190, 190)
+        self.cover_label.setFixedSize(COVER_SIZE, COVER_SIZE)
         self.cover_label.setScaledContents(True)
         self._set_default_cover()
         layout.addWidget(self.cover_label)
@@ -275,12 +240,19 @@ class MainWindow(QMainWindow):
         """Connect signals and slots"""
         # Search
         self.search_input.textChanged.connect(self._on_search)
+        self.search_pipeline.page_ready.connect(self._on_search_page)
+
+        # Covers are decoded in the background
+        self.music_service.cover_cache.cover_ready.connect(self._on_cover_ready)
+        self._cover_connected = True
 
         # Menu
         self.menu_tree.itemClicked.connect(self._on_menu_clicked)
 
         # Content list double click
-        self.content_list.itemDoubleClicked.connect(self._on_song_double_clicked)
+        self.content_list.doubleClicked.connect(self._on_song_double_clicked)
+        self.song_delegate.library_clicked.connect(self._on_library_button_clicked)
+        self.song_delegate.menu_clicked.connect(self._on_menu_button_clicked)
 
         # Extra content
         self.extra_content.itemClicked.connect(self._on_extra_content_clicked)
@@ -309,15 +281,19 @@ class MainWindow(QMainWindow):
         self.music_service.player_service.duration_changed.connect(self._on_duration_changed)
         self.music_service.player_service.state_changed.connect(self._on_playback_state_changed)
         self.music_service.player_service.track_finished.connect(self._on_track_finished)
+        self.music_service.player_service.track_changed.connect(self._update_player_display)
+        self.music_service.session_service.restored.connect(self._update_player_display)
+        self._restore_connected = True
 
         # Queue service signals
         self.music_service.queue_service.current_changed.connect(self._on_queue_current_changed)
 
-        # Position update timer
-        self.position_timer = QTimer()
-        self.position_timer.setInterval(500)
-        self.position_timer.timeout.connect(self._update_position)
-        self.position_timer.start()
+        # Catalog may still be loading in the background
+        loader = self.music_service.database_loader
+        if not loader.catalog_loaded:
+            self.statusBar().showMessage("Loading catalog...")
+            loader.progress.connect(self._on_catalog_progress)
+            loader.catalog_ready.connect(self._on_catalog_ready)
 
         self.slider_pressed = False
 
@@ -326,6 +302,35 @@ class MainWindow(QMainWindow):
         self._load_library_songs()
         self._load_user_playlists()
 
+        # Track restored from the previous session
+        song = self.music_service.player_service.current_song
+        if song:
+            self._update_player_display(song)
+
+    def _on_catalog_progress(self, collection: str, percent: int):
+        """Show catalog loading progress in the status bar"""
+        self.statusBar().showMessage(f"Loading catalog: {collection} ({percent}%)")
+
+    def _on_catalog_ready(self):
+        """Catalog loaded - refresh the view shown while it was loading"""
+        self.statusBar().clearMessage()
+        if self.current_category == "library/songs":
+            self._load_library_songs()
+
+    def on_database_changed(self, library: Library, collections: List[str]):
+        """Another app instance changed the shared data - refresh what is shown"""
+        self.library = library
+        self.song_model.library = library
+
+        if 'playlists' in collections or 'libraries' in collections:
+            self._load_user_playlists()
+        if self.current_category == "library/songs" and {'libraries', 'songs'} & set(collections):
+            self._load_library_songs()
+
+    def show_conflict(self, collection: str, key: str):
+        """Own change clashed with a change made by another app instance"""
+        self.statusBar().showMessage(f"Also changed in another window: {collection} {key}", 10000)
+
     def _load_library_songs(self):
         """Load library songs into list"""
         self.current_category = "library/songs"
@@ -337,58 +342,42 @@ class MainWindow(QMainWindow):
 
         self._display_songs(songs)
 
+    @property
+    def current_songs(self) -> List[Song]:
+        """Songs shown in the content list"""
+        return self.song_model.songs()
+
     def _display_songs(self, songs: List[Song]):
-        """Display songs in list using SongListItem widgets"""
-        self.current_songs = songs
-        self.content_list.clear()
-
-        for song in songs:
-            # Get album and genre info
-            album = self.music_service.database.get_album(song.album)
-            album_title = album.title if album else ""
-
-            genre = self.music_service.database.get_genre(song.genre)
-            genre_name = genre.name if genre else ""
-
-            # Check if song is in library
-            in_library = self.music_service.library_service.is_song_in_library(self.library, song.id)
-
-            # Create custom widget
-            item_widget = SongListItem(song, in_library, album_title, genre_name)
-
-            # Connect signals
-            item_widget.lib_button.clicked.connect(
-                lambda checked, s=song, w=item_widget: self._on_add_to_library(s, w)
-            )
-            item_widget.menu_button.clicked.connect(
-                lambda checked, s=song, w=item_widget: self._on_more_actions(s, w)
-            )
-
-            # Create list item and set widget
-            list_item = QListWidgetItem()
-            list_item.setSizeHint(item_widget.sizeHint())
-            self.content_list.addItem(list_item)
-            self.content_list.setItemWidget(list_item, item_widget)
-
-    def _get_song_from_list_item(self, item: QListWidgetItem) -> Optional[Song]:
-        """Get Song object from QListWidgetItem"""
-        widget = self.content_list.itemWidget(item)
-        if widget and isinstance(widget, SongListItem):
-            return widget.song
-        return None
+        """Display songs in list"""
+        self.song_model.set_songs(songs)
+
+    def _append_songs(self, songs: List[Song]):
+        """Append songs to the end of the displayed list"""
+        self.song_model.append_songs(songs)
+
+    def _get_song_from_index(self, index: QModelIndex) -> Optional[Song]:
+        """Get Song object from model index"""
+        return self.song_model.song_at(index.row()) if index.isValid() else None
 
     def _on_search(self, text: str):
-        """Handle search"""
+        """Handle search text change"""
         if text.strip():
-            songs = self.music_service.search_service.search_songs(text)
-            songs.sort(key=lambda s: (s.artist, s.title))
-            self.info_label.setText(f"Search results for: {text}")
-            self.extra_content.hide()
-            self._display_songs(songs)
+            self.search_pipeline.submit(text)
         else:
             # Return to previous view
+            self.search_pipeline.cancel()
             self._load_library_songs()
 
+    def _on_search_page(self, query: str, songs: List[Song], first: bool):
+        """Handle a page of search results"""
+        if first:
+            self.current_category = "search"
+            self.info_label.setText(f"Search results for: {query}")
+            self.extra_content.hide()
+            self._display_songs(songs)
+        else:
+            self._append_songs(songs)
+
     def _on_menu_clicked(self, item: QTreeWidgetItem, column: int):
         """Handle menu item click"""
         parent = item.parent()
@@ -396,6 +385,9 @@ class MainWindow(QMainWindow):
         if parent is None:
             return
 
+        # Drop pending search results so they don't replace the new view
+        self.search_pipeline.cancel()
+
         parent_text = parent.text(0)
         item_text = item.text(0)
 
@@ -427,6 +419,7 @@ class MainWindow(QMainWindow):
 
     def _show_general_artists(self):
         """Show all artists"""
+        self.current_category = "general/artists"
         self.info_label.setText("General / Artists")
         self.extra_content.show()
         self.extra_content.clear()
@@ -437,15 +430,12 @@ class MainWindow(QMainWindow):
         for artist in artists:
             self.extra_content.addItem(artist.name)
 
-        # Store full song list for filtering, but don't display yet
-        songs = self.music_service.database.get_all_songs()
-        songs.sort(key=lambda s: (s.artist, s.title))
-        self._base_songs = songs
-        self.current_songs = []
-        self.content_list.clear()
+        # Don't display songs until an item is selected
+        self.song_model.clear()
 
     def _show_general_albums(self):
         """Show all albums"""
+        self.current_category = "general/albums"
         self.info_label.setText("General / Albums")
         self.extra_content.show()
         self.extra_content.clear()
@@ -457,11 +447,11 @@ class MainWindow(QMainWindow):
             self.extra_content.addItem(f"{album.artist} - {album.title}")
 
         # Don't display songs until an album is selected
-        self.current_songs = []
-        self.content_list.clear()
+        self.song_model.clear()
 
     def _show_general_songs(self):
         """Show all songs"""
+        self.current_category = "general/songs"
         self.info_label.setText("General / Songs")
         self.extra_content.hide()
 
@@ -471,6 +461,7 @@ class MainWindow(QMainWindow):
 
     def _show_general_genres(self):
         """Show all genres"""
+        self.current_category = "general/genres"
         self.info_label.setText("General / Genres")
         self.extra_content.show()
         self.extra_content.clear()
@@ -481,15 +472,12 @@ class MainWindow(QMainWindow):
         for genre in genres:
             self.extra_content.addItem(genre.name)
 
-        # Store full song list for filtering, but don't display yet
-        songs = self.music_service.database.get_all_songs()
-        songs.sort(key=lambda s: (s.artist, s.title))
-        self._base_songs = songs
-        self.current_songs = []
-        self.content_list.clear()
+        # Don't display songs until an item is selected
+        self.song_model.clear()
 
     def _show_library_artists(self):
         """Show library artists"""
+        self.current_category = "library/artists"
         self.info_label.setText("Library / Artists")
         self.extra_content.show()
         self.extra_content.clear()
@@ -499,31 +487,27 @@ class MainWindow(QMainWindow):
         for name in artist_names:
             self.extra_content.addItem(name)
 
-        # Store library songs for filtering, but don't display yet
-        songs = self.music_service.library_service.get_library_songs(self.library)
-        songs.sort(key=lambda s: (s.artist, s.title))
-        self._base_songs = songs
-        self.current_songs = []
-        self.content_list.clear()
+        # Don't display songs until an item is selected
+        self.song_model.clear()
 
     def _show_library_albums(self):
         """Show library albums"""
+        self.current_category = "library/albums"
         self.info_label.setText("Library / Albums")
         self.extra_content.show()
         self.extra_content.clear()
 
         albums = self.music_service.library_service.get_library_albums(self.library)
-        albums.sort(key=lambda a: (a.artist, a.title))
 
         for album in albums:
             self.extra_content.addItem(f"{album.artist} - {album.title}")
 
         # Don't display songs until an album is selected
-        self.current_songs = []
-        self.content_list.clear()
+        self.song_model.clear()
 
     def _show_library_genres(self):
         """Show library genres"""
+        self.current_category = "library/genres"
         self.info_label.setText("Library / Genres")
         self.extra_content.show()
         self.extra_content.clear()
@@ -535,12 +519,8 @@ class MainWindow(QMainWindow):
             if genre:
                 self.extra_content.addItem(genre.name)
 
-        # Store library songs for filtering, but don't display yet
-        songs = self.music_service.library_service.get_library_songs(self.library)
-        songs.sort(key=lambda s: (s.artist, s.title))
-        self._base_songs = songs
-        self.current_songs = []
-        self.content_list.clear()
+        # Don't display songs until an item is selected
+        self.song_model.clear()
 
     def _show_playlist(self, playlist_title: str):
         """Show playlist songs"""
@@ -552,6 +532,7 @@ class MainWindow(QMainWindow):
                 break
 
         if playlist:
+            self.current_category = "playlist"
             self.info_label.setText(f"Playlist / {playlist.title}")
             self.extra_content.hide()
 
@@ -561,57 +542,55 @@ class MainWindow(QMainWindow):
     def _on_extra_content_clicked(self, item: QListWidgetItem):
         """Handle extra content item click"""
         text = item.text()
+        database = self.music_service.database
+        songs = None
 
-        if "Artists" in self.info_label.text():
-            # Filter by artist from base song list
-            songs = [s for s in self._base_songs if s.artist == text]
-            self._display_songs(songs)
+        if self.current_category.endswith("/artists"):
+            songs = database.get_songs_by_artist(text)
 
-        elif "Albums" in self.info_label.text():
-            # Filter by album
+        elif self.current_category.endswith("/albums"):
             # Extract album title from "Artist - Album" format
             if " - " in text:
                 artist, album_title = text.split(" - ", 1)
-                # Find album
-                album = None
-                for a in self.music_service.database.get_all_albums():
-                    if a.artist == artist and a.title == album_title:
-                        album = a
-                        break
-
+                album = database.find_album(artist, album_title)
                 if album:
-                    songs = []
-                    for song_id in album.songs:
-                        song = self.music_service.database.get_song(song_id)
-                        if song:
-                            songs.append(song)
-                    self._display_songs(songs)
-
-        elif "Genres" in self.info_label.text():
-            # Filter by genre from base song list
-            genre = None
-            for g in self.music_service.database.get_all_genres():
-                if g.name == text:
-                    genre = g
-                    break
+                    songs = database.get_songs(album.songs)
 
+        elif self.current_category.endswith("/genres"):
+            genre = database.find_genre_by_name(text)
             if genre:
-                songs = [s for s in self._base_songs if s.genre == genre.id]
-                self._display_songs(songs)
+                songs = database.get_songs_by_genre(genre.id)
+
+        if songs is None:
+            return
+
+        if self.current_category in ("library/artists", "library/genres"):
+            library_songs = self.library.songs
+            songs = [s for s in songs if s.id in library_songs]
 
-    def _on_song_double_clicked(self, item: QListWidgetItem):
+        self._display_songs(songs)
+
+    def _on_song_double_clicked(self, index: QModelIndex):
         """Handle song double click - play song"""
-        song = self._get_song_from_list_item(item)
+        song = self._get_song_from_index(index)
         if song:
-            try:
-                index = self.current_songs.index(song)
-                self._play_song_list(self.current_songs, index)
-            except ValueError:
-                # Song not in current list, just play it
-                self._play_song_list([song], 0)
-
-    def _play_song_list(self, songs: List[Song], index: int):
-        """Play song from list"""
+            self._play_song_list(list(self.current_songs), index.row())
+
+    def _on_library_button_clicked(self, index: QModelIndex):
+        """Handle library button click in a song row"""
+        song = self._get_song_from_index(index)
+        if song:
+            self._on_add_to_library(song)
+
+    def _on_menu_button_clicked(self, index: QModelIndex, pos: QPoint):
+        """Handle "..." button click in a song row"""
+        song = self._get_song_from_index(index)
+        if song:
+            self.content_list.setCurrentIndex(index)
+            self._on_more_actions(song, self.content_list.viewport().mapToGlobal(pos))
+
+    def _play_song_list(self, songs: Sequence[Song], index: int):
+        """Play song from list; the queue reads it in place, so pass a list the view won't change"""
         self.music_service.queue_service.set_queue(songs, index)
         song = songs[index]
         self._play_song(song)
@@ -633,34 +612,36 @@ class MainWindow(QMainWindow):
 
         # Load cover
         album = self.music_service.database.get_album(song.album)
-        if album:
-            cover_path = Path("data/covers") / f"cover_{album.cover}.jpg"
-            if cover_path.exists():
-                pixmap = QPixmap(str(cover_path))
-                self.cover_label.setPixmap(pixmap)
-            else:
-                self._set_default_cover()
-        else:
-            self._set_default_cover()
+        self._show_cover(album.cover if album else DEFAULT_COVER)
 
     def _set_default_cover(self):
         """Set default cover image"""
-        cover_path = Path("data/covers/cover_0.jpg")
-        if cover_path.exists():
-            pixmap = QPixmap(str(cover_path))
+        self._show_cover(DEFAULT_COVER)
+
+    def _show_cover(self, cover: str):
+        """Show cover from cache or request it; the old one stays until it is decoded"""
+        cache = self.music_service.cover_cache
+        cache.cancel_pending()
+        self._cover_key = (cover, COVER_SIZE)
+        pixmap = cache.get(cover, COVER_SIZE)
+        if pixmap is not None:
+            self.cover_label.setPixmap(pixmap)
+
+    def _on_cover_ready(self, cover: str, size: int, pixmap: QPixmap):
+        """Cover decoded in the background"""
+        if (cover, size) != self._cover_key:
+            return
+        if not pixmap.isNull():
             self.cover_label.setPixmap(pixmap)
+        elif cover != DEFAULT_COVER:
+            self._set_default_cover()
 
-    def _on_add_to_library(self, song: Song, widget: SongListItem = None):
+    def _on_add_to_library(self, song: Song):
         """Add song to library"""
         self.music_service.library_service.add_song_to_library(self.library, song.id)
-        # Update widget if provided
-        if widget:
-            widget.update_library_status(True)
-        else:
-            # Refresh entire display
-            self._display_songs(self.current_songs)
+        self.song_model.refresh_library_status()
 
-    def _on_more_actions(self, song: Song, widget: SongListItem):
+    def _on_more_actions(self, song: Song, pos: QPoint):
         """Show more actions menu"""
         menu = QMenu(self)
 
@@ -672,7 +653,7 @@ class MainWindow(QMainWindow):
             menu.addAction(remove_lib)
         else:
             add_lib = QAction("Add to library", self)
-            add_lib.triggered.connect(lambda: self._on_add_to_library(song, widget))
+            add_lib.triggered.connect(lambda: self._on_add_to_library(song))
             menu.addAction(add_lib)
 
         add_playlist = QAction("Add to playlist", self)
@@ -700,21 +681,20 @@ class MainWindow(QMainWindow):
         menu.addAction(info)
 
         # Show menu at button position
-        menu.exec(widget.menu_button.mapToGlobal(widget.menu_button.rect().bottomLeft()))
+        menu.exec(pos)
 
     def _play_song_from_current(self, song: Song):
         """Play song from current list"""
-        try:
-            index = self.current_songs.index(song)
-            self._play_song_list(self.current_songs, index)
-        except ValueError:
+        row = self.content_list.currentIndex().row()
+        if self.song_model.song_at(row) is song:
+            self._play_song_list(list(self.current_songs), row)
+        else:
             self._play_song_list([song], 0)
 
     def _remove_from_library(self, song: Song):
         """Remove song from library"""
         self.music_service.library_service.remove_song_from_library(self.library, song.id)
-        # Refresh display
-        self._display_songs(self.current_songs)
+        self.song_model.refresh_library_status()
 
     def _add_to_playlist(self, song: Song):
         """Show add to playlist dialog"""
@@ -731,8 +711,8 @@ class MainWindow(QMainWindow):
             action.triggered.connect(lambda checked, p=playlist, s=song: self._do_add_to_playlist(p, s))
             menu.addAction(action)
 
-        menu.exec(self.mapToGlobal(self.content_list.viewport().mapToGlobal(
-            self.content_list.visualItemRect(self.content_list.currentItem()).center())))
+        menu.exec(self.content_list.viewport().mapToGlobal(
+            self.content_list.visualRect(self.content_list.currentIndex()).center()))
 
     def _do_add_to_playlist(self, playlist: Playlist, song: Song):
         """Add song to playlist"""
@@ -819,6 +799,7 @@ class MainWindow(QMainWindow):
     def _on_repeat(self):
         """Handle repeat button"""
         self.music_service.queue_service.cycle_repeat_mode()
+        self.music_service.player_service.preload_next()
 
         # Update button text
         from music_service.queue_service import RepeatMode
@@ -880,7 +861,7 @@ class MainWindow(QMainWindow):
 
     def _on_position_changed(self, position: int):
         """Handle position changed from player"""
-        pass  # Handled by timer
+        self._update_position(position)
 
     def _on_duration_changed(self, duration: int):
         """Handle duration changed from player"""
@@ -890,17 +871,16 @@ class MainWindow(QMainWindow):
         self.duration_label.setText(f"{minutes}:{seconds:02d}")
 
     def _on_track_finished(self):
-        """Handle track finished"""
+        """Track finished and the next one was not preloaded"""
         self._on_next()
 
     def _on_queue_current_changed(self, index: int):
         """Handle queue current song changed"""
         pass
 
-    def _update_position(self):
+    def _update_position(self, position: int):
         """Update position slider and label"""
         if not self.slider_pressed:
-            position = self.music_service.player_service.current_position_ms()
             self.position_slider.blockSignals(True)
             self.position_slider.setValue(position)
             self.position_slider.blockSignals(False)
@@ -917,4 +897,36 @@ class MainWindow(QMainWindow):
         """Handle slider released"""
         self.slider_pressed = False
         position = self.position_slider.value()
-        self.music_service.player_service.seek(position)
\ No newline at end of file
+        self.music_service.player_service.seek(position)
+
+    def showEvent(self, event):
+        """Resume position updates"""
+        super().showEvent(event)
+        self._update_position_updates()
+
+    def hideEvent(self, event):
+        """No position updates while hidden"""
+        super().hideEvent(event)
+        self._update_position_updates()
+
+    def changeEvent(self, event):
+        """Minimizing does not always hide the window"""
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self._update_position_updates()
+
+    def _update_position_updates(self):
+        visible = self.isVisible() and not self.isMinimized()
+        self.music_service.player_service.set_position_updates(visible)
+
+    def closeEvent(self, event):
+        """Stop background search before closing"""
+        self.search_pipeline.wait()
+        self._cover_key = None
+        if self._cover_connected:
+            self._cover_connected = False
+            self.music_service.cover_cache.cover_ready.disconnect(self._on_cover_ready)
+        if self._restore_connected:
+            self._restore_connected = False
+            self.music_service.session_service.restored.disconnect(self._update_player_display)
+        super().closeEvent(event)
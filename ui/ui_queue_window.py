@@ -1,12 +1,81 @@
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QListWidget,
-    QPushButton, QLabel, QListWidgetItem
+    QDialog, QVBoxLayout, QHBoxLayout, QListView,
+    QPushButton, QLabel
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
 
 from music_service.queue_service import QueueService
 
 
+class QueueListModel(QAbstractListModel):
+    """Queue rows read straight from QueueService; its fine-grained signals
+    are applied as row inserts, removals and moves instead of a full reset."""
+
+    def __init__(self, queue_service: QueueService, parent=None):
+        super().__init__(parent)
+        self.queue_service = queue_service
+        # Row count the views know about; the service has already changed when its signals arrive
+        self._count = len(queue_service)
+
+        queue_service.queue_reset.connect(self._on_reset)
+        queue_service.rows_inserted.connect(self._on_rows_inserted)
+        queue_service.rows_removed.connect(self._on_rows_removed)
+        queue_service.row_moved.connect(self._on_row_moved)
+        queue_service.current_moved.connect(self._on_current_moved)
+
+    def disconnect_service(self) -> None:
+        self.queue_service.queue_reset.disconnect(self._on_reset)
+        self.queue_service.rows_inserted.disconnect(self._on_rows_inserted)
+        self.queue_service.rows_removed.disconnect(self._on_rows_removed)
+        self.queue_service.row_moved.disconnect(self._on_row_moved)
+        self.queue_service.current_moved.disconnect(self._on_current_moved)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._count
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < min(self._count, len(self.queue_service)):
+            return None
+
+        if role == Qt.DisplayRole:
+            song = self.queue_service.song_at(index.row())
+            text = f"{song.artist} - {song.title}"
+            if index.row() == self.queue_service.current_index:
+                text = f"▶ {text}"
+            return text
+        return None
+
+    def _on_reset(self):
+        self.beginResetModel()
+        self._count = len(self.queue_service)
+        self.endResetModel()
+
+    def _on_rows_inserted(self, first: int, count: int):
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self._count += count
+        self.endInsertRows()
+
+    def _on_rows_removed(self, first: int, count: int):
+        self.beginRemoveRows(QModelIndex(), first, first + count - 1)
+        self._count -= count
+        self.endRemoveRows()
+
+    def _on_row_moved(self, source: int, target: int):
+        # Qt expects the row it is moved in front of
+        destination = target + 1 if target > source else target
+        self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), destination)
+        self.endMoveRows()
+
+    def _on_current_moved(self, old: int, new: int):
+        """Only the two rows with the ▶ marker are repainted"""
+        for row in (old, new):
+            if 0 <= row < self._count:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+
 class QueueWindow(QDialog):
     def __init__(self, queue_service: QueueService):
         super().__init__()
@@ -23,7 +92,10 @@ class QueueWindow(QDialog):
         layout.addWidget(title)
 
         # Queue list
-        self.queue_list = QListWidget()
+        self.queue_model = QueueListModel(self.queue_service, self)
+        self.queue_list = QListView()
+        self.queue_list.setModel(self.queue_model)
+        self.queue_list.setUniformItemSizes(True)
         layout.addWidget(self.queue_list)
 
         # Buttons
@@ -48,51 +120,37 @@ class QueueWindow(QDialog):
         close_btn.clicked.connect(self.accept)
         layout.addWidget(close_btn, alignment=Qt.AlignCenter)
 
-        # Load queue
-        self._load_queue()
-
-        # Connect signals
-        self.queue_service.queue_changed.connect(self._load_queue)
-        self.queue_service.current_changed.connect(self._on_current_changed)
-
-    def _load_queue(self):
-        """Load queue into list"""
-        self.queue_list.clear()
-
-        queue = self.queue_service.get_queue()
-        current_index = self.queue_service.current_index
-
-        for i, song in enumerate(queue):
-            text = f"{song.artist} - {song.title}"
-            if i == current_index:
-                text = f"▶ {text}"
+        # Select current song
+        self._select_row(self.queue_service.current_index)
 
-            item = QListWidgetItem(text)
-            self.queue_list.addItem(item)
+    def done(self, result: int):
+        """Stop following the queue once the window is closed"""
+        self.queue_model.disconnect_service()
+        super().done(result)
 
-        if 0 <= current_index < self.queue_list.count():
-            self.queue_list.setCurrentRow(current_index)
+    def _current_row(self) -> int:
+        return self.queue_list.currentIndex().row()
 
-    def _on_current_changed(self, index: int):
-        """Handle current song changed"""
-        self._load_queue()
+    def _select_row(self, row: int):
+        if 0 <= row < self.queue_model.rowCount():
+            self.queue_list.setCurrentIndex(self.queue_model.index(row))
 
     def _on_remove(self):
         """Remove selected song from queue"""
-        current_row = self.queue_list.currentRow()
+        current_row = self._current_row()
         if current_row >= 0:
             self.queue_service.dequeue(current_row)
 
     def _on_move_up(self):
         """Move selected song up"""
-        current_row = self.queue_list.currentRow()
+        current_row = self._current_row()
         if current_row > 0:
             self.queue_service.move_up(current_row)
-            self.queue_list.setCurrentRow(current_row - 1)
+            self._select_row(current_row - 1)
 
     def _on_move_down(self):
         """Move selected song down"""
-        current_row = self.queue_list.currentRow()
-        if current_row >= 0 and current_row < self.queue_list.count() - 1:
+        current_row = self._current_row()
+        if current_row >= 0 and current_row < self.queue_model.rowCount() - 1:
             self.queue_service.move_down(current_row)
-            self.queue_list.setCurrentRow(current_row + 1)
+            self._select_row(current_row + 1)
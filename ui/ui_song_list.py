@@ -0,0 +1,222 @@
+from typing import TYPE_CHECKING, List, Optional
+
+from PySide6.QtWidgets import (
+    QStyledItemDelegate, QStyle, QStyleOptionButton, QStyleOptionViewItem,
+    QApplication, QToolTip
+)
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, Signal, QPoint
+from PySide6.QtGui import QFont, QPalette
+
+from models import Library, Song
+
+if TYPE_CHECKING:
+    from music_service.music_service import MusicService
+
+
+class SongListModel(QAbstractListModel):
+    """List model for songs. Album, genre and library status are looked up
+    only when a row is actually painted."""
+
+    SongRole = Qt.UserRole + 1
+    AlbumTitleRole = Qt.UserRole + 2
+    GenreNameRole = Qt.UserRole + 3
+    InLibraryRole = Qt.UserRole + 4
+
+    def __init__(self, music_service: 'MusicService', library: Library, parent=None):
+        super().__init__(parent)
+        self.music_service = music_service
+        self.library = library
+        self._songs: List[Song] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._songs)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._songs):
+            return None
+
+        song = self._songs[index.row()]
+
+        if role == Qt.DisplayRole:
+            return f"{song.artist} — {song.title}"
+        if role == self.SongRole:
+            return song
+        if role == self.AlbumTitleRole:
+            album = self.music_service.database.get_album(song.album)
+            return album.title if album else ""
+        if role == self.GenreNameRole:
+            genre = self.music_service.database.get_genre(song.genre)
+            return genre.name if genre else ""
+        if role == self.InLibraryRole:
+            return self.music_service.library_service.is_song_in_library(self.library, song.id)
+        return None
+
+    def songs(self) -> List[Song]:
+        return self._songs
+
+    def song_at(self, row: int) -> Optional[Song]:
+        if 0 <= row < len(self._songs):
+            return self._songs[row]
+        return None
+
+    def set_songs(self, songs: List[Song]) -> None:
+        self.beginResetModel()
+        self._songs = list(songs)
+        self.endResetModel()
+
+    def append_songs(self, songs: List[Song]) -> None:
+        if not songs:
+            return
+        first = len(self._songs)
+        self.beginInsertRows(QModelIndex(), first, first + len(songs) - 1)
+        self._songs.extend(songs)
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        self.set_songs([])
+
+    def refresh_library_status(self) -> None:
+        """Library status changed - the view repaints only visible rows"""
+        if self._songs:
+            self.dataChanged.emit(
+                self.index(0), self.index(len(self._songs) - 1),
+                [self.InLibraryRole]
+            )
+
+
+class SongItemDelegate(QStyledItemDelegate):
+    """Paints a song row: Artist — Title | Album • Genre • Duration [+] [...]"""
+
+    library_clicked = Signal(QModelIndex)
+    menu_clicked = Signal(QModelIndex, QPoint)  # index, menu position in viewport coordinates
+
+    ROW_HEIGHT = 33
+    BUTTON_SIZE = QSize(30, 25)
+    MARGIN = 5
+    SPACING = 8
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        return QSize(0, self.ROW_HEIGHT)
+
+    def _button_rects(self, rect: QRect):
+        """Return: library button rect, menu button rect"""
+        width = self.BUTTON_SIZE.width()
+        height = self.BUTTON_SIZE.height()
+        top = rect.top() + (rect.height() - height) // 2
+
+        menu_rect = QRect(rect.right() - self.MARGIN - width + 1, top, width, height)
+        lib_rect = QRect(menu_rect.left() - self.SPACING - width, top, width, height)
+        return lib_rect, menu_rect
+
+    def paint(self, painter, option, index: QModelIndex):
+        song = index.data(SongListModel.SongRole)
+        if song is None:
+            return
+
+        # Background, selection and alternating colors
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        widget = opt.widget
+        style = widget.style() if widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, opt, painter, widget)
+
+        lib_rect, menu_rect = self._button_rects(option.rect)
+        text_rect = QRect(
+            option.rect.left() + self.MARGIN, option.rect.top(),
+            lib_rect.left() - self.SPACING - option.rect.left() - self.MARGIN, option.rect.height()
+        )
+
+        selected = bool(option.state & QStyle.State_Selected)
+        text_color = option.palette.color(QPalette.HighlightedText if selected else QPalette.Text)
+
+        details = []
+        album_title = index.data(SongListModel.AlbumTitleRole)
+        if album_title:
+            details.append(album_title)
+        genre_name = index.data(SongListModel.GenreNameRole)
+        if genre_name:
+            details.append(genre_name)
+        details.append(song.get_duration_formatted())
+
+        painter.save()
+        painter.setClipRect(text_rect)
+
+        # <b>Artist</b> — Title   details
+        parts = [
+            (song.artist, True, text_color),
+            (f" — {song.title}   ", False, text_color),
+            (" • ".join(details), False, Qt.gray if not selected else text_color),
+        ]
+        x = text_rect.left()
+        for text, bold, color in parts:
+            remaining = text_rect.right() - x
+            if remaining <= 0:
+                break
+            font = QFont(option.font)
+            font.setBold(bold)
+            painter.setFont(font)
+            painter.setPen(color)
+            metrics = painter.fontMetrics()
+            text = metrics.elidedText(text, Qt.ElideRight, remaining)
+            painter.drawText(QRect(x, text_rect.top(), remaining, text_rect.height()),
+                             Qt.AlignVCenter | Qt.AlignLeft, text)
+            x += metrics.horizontalAdvance(text)
+
+        painter.restore()
+
+        # Buttons
+        in_library = bool(index.data(SongListModel.InLibraryRole))
+        self._draw_button(painter, option, lib_rect, "✓" if in_library else "+", not in_library)
+        self._draw_button(painter, option, menu_rect, "...", True)
+
+    def _draw_button(self, painter, option, rect: QRect, text: str, enabled: bool):
+        button = QStyleOptionButton()
+        button.rect = rect
+        button.text = text
+        button.palette = option.palette
+        button.state = QStyle.State_Raised
+        if enabled:
+            button.state |= QStyle.State_Enabled
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, widget)
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        """Handle clicks on the painted buttons"""
+        if event.type() not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease,
+                                QEvent.MouseButtonDblClick):
+            return super().editorEvent(event, model, option, index)
+
+        lib_rect, menu_rect = self._button_rects(option.rect)
+        pos = event.position().toPoint()
+
+        if lib_rect.contains(pos):
+            if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+                if not index.data(SongListModel.InLibraryRole):
+                    self.library_clicked.emit(index)
+            return True
+
+        if menu_rect.contains(pos):
+            if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+                self.menu_clicked.emit(index, menu_rect.bottomLeft())
+            return True
+
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index: QModelIndex) -> bool:
+        """Tooltips for the painted buttons"""
+        lib_rect, menu_rect = self._button_rects(option.rect)
+        pos = event.pos()
+
+        if lib_rect.contains(pos):
+            in_library = index.data(SongListModel.InLibraryRole)
+            QToolTip.showText(event.globalPos(), "Already in library" if in_library else "Add to library", view)
+            return True
+        if menu_rect.contains(pos):
+            QToolTip.showText(event.globalPos(), "More actions", view)
+            return True
+
+        return super().helpEvent(event, view, option, index)